@@ -0,0 +1,30 @@
+import argparse
+import time
+
+from sensirion_shdlc_driver import ShdlcSerialPort, ShdlcConnection
+
+from sensirion_uart_scc1.acquisition.sf06_stream import Scc1Sf06Stream
+from sensirion_uart_scc1.drivers.scc1_slf3x import Scc1Slf3x
+from sensirion_uart_scc1.drivers.slf_common import get_flow_unit_label
+from sensirion_uart_scc1.scc1_shdlc_device import Scc1ShdlcDevice
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--serial-port', '-p', default='COM5')
+args = parser.parse_args()
+
+with ShdlcSerialPort(port=args.serial_port, baudrate=115200) as port:
+    device = Scc1ShdlcDevice(ShdlcConnection(port), target_address=0)
+    device.sensor_reset()
+    device.set_sensor_type(Scc1Slf3x.SENSOR_TYPE)
+    sensor = Scc1Slf3x(device)
+
+    flow_scale, unit = sensor.get_flow_unit_and_scale()
+    unit_label = get_flow_unit_label(unit)
+
+    # The reader thread keeps draining the cable buffer while the samples are printed
+    with Scc1Sf06Stream(sensor, interval_ms=2) as stream:
+        end = time.monotonic() + 5
+        while time.monotonic() < end:
+            for flow, temperature, flag in stream.read(timeout=0.1):
+                print(f'{flow / flow_scale:.3f} {unit_label};\t{temperature / 200:.3f} C;\t{flag}')
+    print(f'Samples: {stream.samples_acquired}, bytes lost: {stream.bytes_lost}, dropped: {stream.samples_dropped}')
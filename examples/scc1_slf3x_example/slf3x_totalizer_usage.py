@@ -3,8 +3,9 @@ import time
 
 from sensirion_shdlc_driver import ShdlcSerialPort, ShdlcConnection
 
+from sensirion_uart_scc1.acquisition.totalizer import Scc1HostTotalizer
 from sensirion_uart_scc1.drivers.scc1_slf3x import Scc1Slf3x
-from sensirion_uart_scc1.drivers.slf_common import get_volume_unit_label, SlfProductName
+from sensirion_uart_scc1.drivers.slf_common import SlfProductName
 from sensirion_uart_scc1.scc1_shdlc_device import Scc1ShdlcDevice
 
 parser = argparse.ArgumentParser()
@@ -21,25 +22,26 @@ with ShdlcSerialPort(port=args.serial_port, baudrate=115200) as port:
     print(f"product id: 0x{sensor.product_id:08X}")
     print(f"Serial number: {sensor.serial_number}")
 
-    flow_scale, unit = sensor.get_flow_unit_and_scale()
-    if flow_scale is None or unit is None:
-        raise RuntimeError("Could not determine the sensor flow unit and scale")
-    volume_unit_label = get_volume_unit_label(unit)
+    interval_ms = 2
+    # totalizes the samples of the measurement buffer on the host, no polling of the firmware totalizator needed
+    totalizer = Scc1HostTotalizer.from_sensor(sensor, interval_ms=interval_ms)
 
     sensor.set_totalizator_status(True)
     sensor.reset_totalizator()
-    # Measure as fast as possible
-    sensor.start_continuous_measurement(interval_ms=0)
+    sensor.start_continuous_measurement(interval_ms=interval_ms)
     try:
-        for _ in range(10):
+        for i in range(10):
             time.sleep(1)
-            totalizer_value = sensor.get_totalizator_value()
-            if totalizer_value is None:
-                print("Totalizer value not available")
-                continue
-
-            totalized_flow = totalizer_value / flow_scale
-            print(f"Totalizer volume: {totalized_flow} {volume_unit_label}")
+            remaining = 1
+            while remaining:
+                remaining, lost, batch = sensor.read_extended_buffer_batch()
+                volumes = totalizer.process(remaining, lost, batch)
+            print(f"Totalized volume: {totalizer.volume} {totalizer.volume_unit_label} "
+                  f"({len(volumes)} samples in last read out)")
+            if i % 5 == 4:
+                # remove the error of estimated lost samples now and then
+                correction = totalizer.reconcile(sensor.get_totalizator_value())
+                print(f"Correction from firmware totalizator: {correction} {totalizer.volume_unit_label}")
 
     finally:
         sensor.stop_continuous_measurement()
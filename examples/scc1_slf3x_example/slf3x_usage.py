@@ -2,8 +2,9 @@ import argparse
 
 from sensirion_shdlc_driver import ShdlcSerialPort, ShdlcConnection
 
-from sensirion_uart_scc1.drivers.scc1_slf3x import Scc1Slf3x
-from sensirion_uart_scc1.drivers.slf_common import get_flow_unit_label, SlfProductName
+from sensirion_uart_scc1.drivers.scc1_driver_factory import create_sensor_driver
+from sensirion_uart_scc1.drivers.slf_common import SlfProductName
+from sensirion_uart_scc1.drivers.slf_converter import SlfSignalConverter
 from sensirion_uart_scc1.scc1_shdlc_device import Scc1ShdlcDevice
 
 parser = argparse.ArgumentParser()
@@ -12,27 +13,24 @@ args = parser.parse_args()
 
 with ShdlcSerialPort(port=args.serial_port, baudrate=115200) as port:
     device = Scc1ShdlcDevice(ShdlcConnection(port), target_address=0)
-    device.sensor_reset()
-    device.set_sensor_type(Scc1Slf3x.SENSOR_TYPE)
-    sensor = Scc1Slf3x(device)
+    # detects the product, configures the cable only if needed and returns the matching driver
+    sensor = create_sensor_driver(device)
 
     print(f'Product: {SlfProductName.from_product_id(sensor.product_id)}')
     print(f"product id: 0x{sensor.product_id:08X}")
     print(f"Serial number: {sensor.serial_number}")
 
     print("Flow;\tTemperature;\tAir In Line;\tHigh Flow")
-    flow_scale, unit = sensor.get_flow_unit_and_scale()
-    unit_label = get_flow_unit_label(unit)
+    converter = SlfSignalConverter.from_sensor(sensor, si_units=False)
+    unit_label = converter.flow_unit_label
     sensor.start_continuous_measurement(interval_ms=2)
     try:
         for _ in range(50):
-            remaining, lost, data = sensor.read_extended_buffer()
-            for flow, temperature, flag in data:
-                air_in_line = bool(flag & 0x01)
-                high_flow = bool((flag >> 1) & 0x01)
-                flow_scaled = flow / flow_scale
-                temperature_scaled = temperature / 200
-
-                print(f'{flow_scaled:.3f} {unit_label};\t{temperature_scaled:.3f} C;\t{air_in_line};\t{high_flow}')
+            remaining, lost, batch = sensor.read_extended_buffer_batch()
+            # scale the whole batch at once
+            values = converter.convert(batch)
+            for flow_scaled, temperature_scaled, air_in_line, high_flow in zip(*values):
+                print(f'{flow_scaled:.3f} {unit_label};\t{temperature_scaled:.3f} C;\t{bool(air_in_line)};\t'
+                      f'{bool(high_flow)}')
     finally:
         sensor.stop_continuous_measurement()
@@ -0,0 +1,325 @@
+# -*- coding: utf-8 -*-
+
+"""
+Streaming reduction of the samples read out of the measurement buffer.
+
+All stages work on windows of consecutive sample indexes (window k contains the samples k * window_size up to
+(k + 1) * window_size - 1), so their output is aligned with the sample indexes of the Scc1SampleTimestamper. Samples
+can be passed with the index of their first sample, lost samples are simply missing in their window. Every stage
+keeps at most two windows in memory.
+"""
+
+from abc import ABC, abstractmethod
+from array import array
+from typing import Any, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+from sensirion_uart_scc1.drivers.sf06_sample_batch import Sf06SampleBatch
+
+Samples = Union[Sequence[Tuple[int, ...]], Sf06SampleBatch]
+
+#: Decimation methods of create_decimator
+DECIMATION_AVERAGE = 'average'
+DECIMATION_MIN_MAX = 'minmax'
+DECIMATION_LTTB = 'lttb'
+
+_AIR_IN_LINE_FLAG = 0x01
+_HIGH_FLOW_FLAG = 0x02
+
+
+class WindowStatistics(NamedTuple):
+    """Statistics of one signal within one window"""
+    first_index: int  #: Index of the first sample of the window
+    count: int  #: Number of samples received in the window
+    mean: float
+    minimum: int
+    maximum: int
+    variance: float  #: Population variance
+    air_in_line: int  #: Number of samples with the air in line flag set
+    high_flow: int  #: Number of samples with the high flow flag set
+
+
+class DecimatedPoints(NamedTuple):
+    """Points selected or computed by a decimator"""
+    indexes: array  #: Sample index of every point, fractional for averages
+    values: array  #: Raw value of every point
+
+
+def _as_batch(samples: Samples) -> Sf06SampleBatch:
+    return samples if isinstance(samples, Sf06SampleBatch) else Sf06SampleBatch.from_samples(samples)
+
+
+class _WindowedStage(ABC):
+    """Splits the incoming samples at the window boundaries"""
+
+    def __init__(self, window_size: int, signal: int) -> None:
+        if window_size < 1:
+            raise ValueError("Window size must be at least 1")
+        self._window_size = window_size
+        self._signal = signal
+        self._next_index = 0
+        self._window: Optional[int] = None
+
+    @property
+    def window_size(self) -> int:
+        return self._window_size
+
+    def process(self, samples: Samples, first_index: Optional[int] = None) -> Any:
+        """
+        Add samples in the order of the measurement.
+
+        :param samples: The samples as list of tuples or as Sf06SampleBatch
+        :param first_index: Index of the first sample since the start of the measurement, e.g. from
+            TimestampedSamples (default: directly after the previous samples)
+        :return: The output of all windows completed by the samples
+        """
+        if first_index is None:
+            first_index = self._next_index
+        elif first_index < self._next_index:
+            raise ValueError("Samples must be passed in the order of the measurement")
+        batch = _as_batch(samples)
+        columns = self._columns(batch)
+        output = self._empty_output()
+        start, index, count = 0, first_index, len(batch)
+        while start < count:
+            window = index // self._window_size
+            if self._window is not None and window != self._window:
+                self._extend(output, self._close_window())
+            self._window = window
+            end = min(count, start + (window + 1) * self._window_size - index)
+            self._add(columns, start, end, index)
+            index += end - start
+            start = end
+        self._next_index = index
+        if self._window is not None and index >= (self._window + 1) * self._window_size:
+            self._extend(output, self._close_window())
+            self._window = None
+        return output
+
+    def flush(self) -> Any:
+        """
+        :return: The output of the incomplete window, e.g. at the end of the measurement
+        """
+        output = self._empty_output()
+        if self._window is not None:
+            self._extend(output, self._close_window())
+            self._window = None
+        self._extend(output, self._finish())
+        return output
+
+    def _columns(self, batch: Sf06SampleBatch) -> Tuple[array, ...]:
+        return (batch.column(self._signal),)
+
+    def _empty_output(self) -> Any:
+        return DecimatedPoints(array('d'), array('d'))
+
+    @staticmethod
+    def _extend(output: Any, items: Any) -> None:
+        output.indexes.extend(items.indexes)
+        output.values.extend(items.values)
+
+    @abstractmethod
+    def _add(self, columns: Tuple[array, ...], start: int, end: int, index: int) -> None:
+        """Add the samples start..end-1 of the columns, the first one has the given sample index"""
+
+    @abstractmethod
+    def _close_window(self) -> Any:
+        """
+        :return: The output of the current window
+        """
+
+    def _finish(self) -> Any:
+        return self._empty_output()
+
+
+class Scc1WindowAggregator(_WindowedStage):
+    """
+    Computes count, mean, minimum, maximum, variance and the flag counts of one signal per window.
+
+    The sums are kept as integers, so the statistics are exact regardless of the window size.
+
+    Usage::
+
+        aggregator = Scc1WindowAggregator(window_size=500)  # 1 s windows at 2 ms
+        for statistics in aggregator.process(sensor.read_extended_buffer_batch()[2]):
+            historian.write(statistics)
+    """
+
+    def __init__(self, window_size: int, signal: int = 0) -> None:
+        """
+        Initialize the aggregator.
+
+        :param window_size: Number of sample indexes per window
+        :param signal: Index of the aggregated signal (0: flow, 1: temperature)
+        """
+        super().__init__(window_size, signal)
+        self._reset_window()
+
+    def _reset_window(self) -> None:
+        self._count = 0
+        self._sum = 0
+        self._sum_of_squares = 0
+        self._minimum: Optional[int] = None
+        self._maximum: Optional[int] = None
+        self._air_in_line = 0
+        self._high_flow = 0
+
+    def _columns(self, batch: Sf06SampleBatch) -> Tuple[array, ...]:
+        flags = batch.flags if batch.num_signals > 2 else array('H', bytes(2 * len(batch)))
+        return batch.column(self._signal), flags
+
+    def _empty_output(self) -> List[WindowStatistics]:
+        return []
+
+    @staticmethod
+    def _extend(output: List[WindowStatistics], items: List[WindowStatistics]) -> None:
+        output.extend(items)
+
+    def _add(self, columns: Tuple[array, ...], start: int, end: int, index: int) -> None:
+        values, flags = columns[0][start:end], columns[1][start:end]
+        self._count += len(values)
+        self._sum += sum(values)
+        self._sum_of_squares += sum(map(int.__mul__, values, values))
+        low, high = min(values), max(values)
+        self._minimum = low if self._minimum is None else min(self._minimum, low)
+        self._maximum = high if self._maximum is None else max(self._maximum, high)
+        self._air_in_line += sum(map(_AIR_IN_LINE_FLAG.__and__, flags))
+        self._high_flow += sum(map(_HIGH_FLOW_FLAG.__and__, flags)) // _HIGH_FLOW_FLAG
+
+    def _close_window(self) -> List[WindowStatistics]:
+        n = self._count
+        statistics = WindowStatistics(self._window * self._window_size, n, self._sum / n, self._minimum,
+                                      self._maximum, (n * self._sum_of_squares - self._sum * self._sum) / (n * n),
+                                      self._air_in_line, self._high_flow)
+        self._reset_window()
+        return [statistics]
+
+
+class Scc1BlockAverageDecimator(_WindowedStage):
+    """Replaces every window by the mean of its samples, placed at the mean index of the samples"""
+
+    def __init__(self, window_size: int, signal: int = 0) -> None:
+        """
+        :param window_size: Number of sample indexes per output point
+        :param signal: Index of the decimated signal (0: flow, 1: temperature)
+        """
+        super().__init__(window_size, signal)
+        self._count = 0
+        self._sum = 0
+        self._index_sum = 0
+
+    def _add(self, columns: Tuple[array, ...], start: int, end: int, index: int) -> None:
+        n = end - start
+        self._count += n
+        self._sum += sum(columns[0][start:end])
+        self._index_sum += n * index + n * (n - 1) // 2
+
+    def _close_window(self) -> DecimatedPoints:
+        n = self._count
+        points = DecimatedPoints(array('d', [self._index_sum / n]), array('d', [self._sum / n]))
+        self._count = self._sum = self._index_sum = 0
+        return points
+
+
+class Scc1MinMaxDecimator(_WindowedStage):
+    """Replaces every window by its minimum and maximum sample, in the order of the samples (envelope)"""
+
+    def __init__(self, window_size: int, signal: int = 0) -> None:
+        """
+        :param window_size: Number of sample indexes per pair of output points
+        :param signal: Index of the decimated signal (0: flow, 1: temperature)
+        """
+        super().__init__(window_size, signal)
+        self._minimum: Optional[Tuple[int, int]] = None  # value, index
+        self._maximum: Optional[Tuple[int, int]] = None
+
+    def _add(self, columns: Tuple[array, ...], start: int, end: int, index: int) -> None:
+        values = columns[0]
+        low = min(range(start, end), key=values.__getitem__)
+        high = max(range(start, end), key=values.__getitem__)
+        if self._minimum is None or values[low] < self._minimum[0]:
+            self._minimum = values[low], index + low - start
+        if self._maximum is None or values[high] > self._maximum[0]:
+            self._maximum = values[high], index + high - start
+
+    def _close_window(self) -> DecimatedPoints:
+        points = sorted({(i, v) for v, i in (self._minimum, self._maximum)})
+        self._minimum = self._maximum = None
+        return DecimatedPoints(array('d', (i for i, _ in points)), array('d', (v for _, v in points)))
+
+
+class Scc1LttbDecimator(_WindowedStage):
+    """
+    Streaming Largest-Triangle-Three-Buckets decimation.
+
+    Every window is a bucket. From each bucket the sample forming the largest triangle with the point selected from
+    the previous bucket and the mean of the next bucket is kept, which preserves the visual shape of the signal. The
+    selection of a bucket is therefore output when the next bucket is complete. The first and the last sample are
+    always kept.
+    """
+
+    def __init__(self, window_size: int, signal: int = 0) -> None:
+        """
+        :param window_size: Number of sample indexes per bucket
+        :param signal: Index of the decimated signal (0: flow, 1: temperature)
+        """
+        super().__init__(window_size, signal)
+        self._selected: Optional[Tuple[float, float]] = None
+        self._first = False
+        self._pending: List[Tuple[int, int]] = []
+        self._bucket: List[Tuple[int, int]] = []
+
+    def _add(self, columns: Tuple[array, ...], start: int, end: int, index: int) -> None:
+        values = columns[0]
+        if self._selected is None:
+            self._selected = float(index), float(values[start])
+            self._first = True
+        self._bucket.extend(zip(range(index, index + end - start), values[start:end]))
+
+    def _close_window(self) -> DecimatedPoints:
+        n = len(self._bucket)
+        mean = sum(i for i, _ in self._bucket) / n, sum(v for _, v in self._bucket) / n
+        points = self._select(mean)
+        self._pending, self._bucket = self._bucket, []
+        return points
+
+    def _finish(self) -> DecimatedPoints:
+        if not self._pending:
+            return self._empty_output()
+        last = self._pending[-1]
+        points = self._select(last)
+        if self._selected[0] != last[0]:
+            self._extend(points, DecimatedPoints(array('d', [last[0]]), array('d', [last[1]])))
+        self._pending = []
+        return points
+
+    def _select(self, following: Tuple[float, float]) -> DecimatedPoints:
+        points = self._empty_output()
+        if self._first:
+            # the first sample is always kept
+            self._extend(points, DecimatedPoints(array('d', [self._selected[0]]), array('d', [self._selected[1]])))
+            self._first = False
+        candidates = [p for p in self._pending if p[0] > self._selected[0]]
+        if not candidates:
+            return points
+        (ax, ay), (cx, cy) = self._selected, following
+        index, value = max(candidates, key=lambda p: abs((ax - cx) * (p[1] - ay) - (ax - p[0]) * (cy - ay)))
+        self._selected = float(index), float(value)
+        self._extend(points, DecimatedPoints(array('d', [index]), array('d', [value])))
+        return points
+
+
+def create_decimator(method: str, window_size: int, signal: int = 0) -> _WindowedStage:
+    """
+    :param method: One of DECIMATION_AVERAGE, DECIMATION_MIN_MAX, DECIMATION_LTTB
+    :param window_size: Number of sample indexes per window
+    :param signal: Index of the decimated signal (0: flow, 1: temperature)
+    :return: The decimator, returning DecimatedPoints from process and flush
+    """
+    decimators = {
+        DECIMATION_AVERAGE: Scc1BlockAverageDecimator,
+        DECIMATION_MIN_MAX: Scc1MinMaxDecimator,
+        DECIMATION_LTTB: Scc1LttbDecimator,
+    }
+    if method not in decimators:
+        raise ValueError(f"Unknown decimation method: {method}")
+    return decimators[method](window_size, signal)
@@ -0,0 +1,339 @@
+# -*- coding: utf-8 -*-
+
+import math
+import mmap
+import os
+import struct
+import sys
+import time
+from array import array
+from typing import Any, Callable, Iterable, NamedTuple, Optional, Sequence, Tuple, Union
+
+from sensirion_uart_scc1.acquisition.timestamper import SampleGap, TimestampedSamples
+from sensirion_uart_scc1.drivers.scc1_sf06 import Scc1Sf06
+from sensirion_uart_scc1.drivers.sf06_sample_batch import Sf06SampleBatch
+from sensirion_uart_scc1.scc1_exceptions import Scc1NotSupportedException
+
+#: Magic bytes at the start of every capture file
+CAPTURE_MAGIC = b'SCC1CAP\x00'
+#: Version of the capture format
+CAPTURE_FORMAT_VERSION = 1
+#: Value written to all signals of a lost sample
+GAP_VALUE = -32768
+
+# magic, version, header size, number of signals, interval in us, product id, serial number, scale factor,
+# flow unit, host time of sample 0
+_HEADER = struct.Struct('<8sHHHIIQHHd')
+_HEADER_SIZE = 64
+
+
+class CaptureHeader(NamedTuple):
+    """Metadata stored at the start of a capture file"""
+    num_signals: int
+    interval_ms: float
+    product_id: int
+    serial_number: int
+    scale_factor: int
+    flow_unit: int
+    start_time: float  #: Host time of the first sample in seconds since the epoch
+
+    def pack(self) -> bytes:
+        data = _HEADER.pack(CAPTURE_MAGIC, CAPTURE_FORMAT_VERSION, _HEADER_SIZE, self.num_signals,
+                            int(round(self.interval_ms * 1000)), self.product_id, self.serial_number,
+                            self.scale_factor, self.flow_unit, self.start_time)
+        return data.ljust(_HEADER_SIZE, b'\x00')
+
+    @classmethod
+    def unpack(cls, data: bytes) -> 'CaptureHeader':
+        if len(data) < _HEADER.size:
+            raise ValueError("Capture header is truncated")
+        magic, version, header_size, num_signals, interval_us, product_id, serial_number, scale_factor, \
+            flow_unit, start_time = _HEADER.unpack_from(data)
+        if magic != CAPTURE_MAGIC or header_size != _HEADER_SIZE:
+            raise ValueError("Not a SCC1 capture file")
+        if version != CAPTURE_FORMAT_VERSION:
+            raise ValueError(f"Unsupported capture format version {version}")
+        return cls(num_signals, interval_us / 1000.0, product_id, serial_number, scale_factor, flow_unit,
+                   start_time)
+
+
+class Scc1CaptureWriter:
+    """
+    Append-only writer for long recordings of the continuous measurement.
+
+    Every sample is stored as a fixed-width record of little endian 16-bit signals, so the index of a sample
+    determines its position in the file and its time. Lost samples are stored as records with all signals set to
+    GAP_VALUE. Records are collected in chunks in memory, the file is synced at most once per fsync interval.
+
+    Writing to an existing capture with the same metadata continues the recording. The time between the end of the
+    capture and the start of the new session is stored as gap records, so the time of a sample still follows from its
+    index.
+    """
+
+    def __init__(self, path: str, interval_ms: float, num_signals: int = 3, product_id: int = 0,
+                 serial_number: int = 0, scale_factor: int = 0, flow_unit: int = 0,
+                 start_time: Optional[float] = None, chunk_size: int = 65536, fsync_interval: float = 1.0,
+                 clock: Callable[[], float] = time.monotonic, max_append_gap: float = 3600.0) -> None:
+        """
+        Open or create a capture file.
+
+        :param path: Path of the capture file
+        :param interval_ms: The measurement interval in milliseconds
+        :param num_signals: Number of signals per sample
+        :param product_id: Product id of the sensor
+        :param serial_number: Serial number of the sensor
+        :param scale_factor: Flow scale factor of the sensor
+        :param flow_unit: Raw flow unit of the sensor
+        :param start_time: Host time of the first sample of this session (default: now)
+        :param chunk_size: Number of bytes collected before they are written to the file
+        :param fsync_interval: Minimum time in seconds between two syncs of the file to the disk
+        :param clock: Monotonic clock used for the fsync interval
+        :param max_append_gap: Maximum time in seconds between the end of an existing capture and the start of this
+            session. Longer interruptions require a new capture.
+        """
+        header = CaptureHeader(num_signals, interval_ms, product_id, serial_number, scale_factor, flow_unit,
+                               time.time() if start_time is None else start_time)
+        self._record_size = 2 * num_signals
+        self._chunk_size = chunk_size
+        self._fsync_interval = fsync_interval
+        self._clock = clock
+        self._chunk = bytearray()
+        if os.path.exists(path) and os.path.getsize(path) >= _HEADER_SIZE:
+            with open(path, 'rb') as f:
+                existing = CaptureHeader.unpack(f.read(_HEADER_SIZE))
+            if existing.pack()[:_HEADER.size - 8] != header.pack()[:_HEADER.size - 8]:
+                raise ValueError("Existing capture was recorded with other metadata")
+            self._header = existing
+            self._file = open(path, 'r+b')
+            records = (os.path.getsize(path) - _HEADER_SIZE) // self._record_size
+            # drop a partially written record, e.g. after a power loss
+            self._file.truncate(_HEADER_SIZE + records * self._record_size)
+            self._file.seek(0, os.SEEK_END)
+            self._samples_written = records
+            downtime = header.start_time - (existing.start_time + records * existing.interval_ms / 1000.0)
+            gap = round(downtime * 1000.0 / existing.interval_ms)
+            if gap < 0 or downtime > max_append_gap:
+                self._file.close()
+                raise ValueError(f"Cannot append a session starting {downtime:.3f} s after the end of the capture")
+        else:
+            gap = 0
+            self._header = header
+            self._file = open(path, 'wb')
+            self._file.write(header.pack())
+            self._samples_written = 0
+        self._last_sync = self._clock()
+        self._gap_record = struct.pack('<' + 'h' * num_signals, *([GAP_VALUE] * num_signals))
+        if gap:
+            self.write_gap(gap)
+
+    @classmethod
+    def from_sensor(cls, path: str, sensor: Scc1Sf06, interval_ms: float, **kwargs: Any) -> 'Scc1CaptureWriter':
+        """
+        Create a writer with the metadata of a sensor.
+
+        :param path: Path of the capture file
+        :param sensor: The sensor driver
+        :param interval_ms: The measurement interval in milliseconds
+        :return: The writer
+        """
+        unit_and_scale = sensor.get_flow_unit_and_scale()
+        scale_factor, flow_unit = unit_and_scale if unit_and_scale else (0, 0)
+        return cls(path, interval_ms, product_id=sensor.product_id or 0, serial_number=sensor.serial_number or 0,
+                   scale_factor=scale_factor, flow_unit=flow_unit, **kwargs)
+
+    def __enter__(self) -> 'Scc1CaptureWriter':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    @property
+    def header(self) -> CaptureHeader:
+        return self._header
+
+    @property
+    def samples_written(self) -> int:
+        """Number of records in the capture, gaps included"""
+        return self._samples_written
+
+    def write(self, samples: Union[Sequence[Tuple[int, ...]], Sf06SampleBatch]) -> None:
+        """
+        Append samples as returned by read_extended_buffer or read_extended_buffer_batch.
+
+        :param samples: The samples
+        """
+        num_signals = self._header.num_signals
+        if isinstance(samples, Sf06SampleBatch):
+            if samples.num_signals != num_signals:
+                raise ValueError(f"Expected {num_signals} signals per sample")
+            values = samples.values
+        else:
+            if any(len(sample) != num_signals for sample in samples):
+                raise ValueError(f"Expected {num_signals} signals per sample")
+            values = array('h', (value for sample in samples for value in sample))
+        if sys.byteorder == 'big':
+            values = array('h', values)
+            values.byteswap()
+        self._chunk += values.tobytes()
+        self._samples_written += len(samples)
+        self._flush_chunk()
+
+    def write_gap(self, samples_lost: int) -> None:
+        """
+        Append placeholder records for lost samples.
+
+        :param samples_lost: Number of lost samples
+        """
+        self._chunk += self._gap_record * samples_lost
+        self._samples_written += samples_lost
+        self._flush_chunk()
+
+    def write_records(self, records: Iterable[Union[TimestampedSamples, SampleGap]]) -> None:
+        """
+        Append the output of a Scc1SampleTimestamper.
+
+        :param records: Timestamped samples and gaps
+        """
+        for record in records:
+            if isinstance(record, SampleGap):
+                self.write_gap(record.samples_lost)
+            else:
+                self.write(record.samples)
+
+    def flush(self, fsync: bool = False) -> None:
+        """
+        Write the pending records to the file.
+
+        :param fsync: Sync the file to the disk
+        """
+        if self._chunk:
+            self._file.write(self._chunk)
+            self._chunk.clear()
+        self._file.flush()
+        if fsync:
+            os.fsync(self._file.fileno())
+            self._last_sync = self._clock()
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+        self.flush(fsync=True)
+        self._file.close()
+
+    def _flush_chunk(self) -> None:
+        if len(self._chunk) < self._chunk_size:
+            return
+        self.flush(fsync=self._clock() - self._last_sync >= self._fsync_interval)
+
+
+class Scc1CaptureReader:
+    """
+    Memory mapped reader for capture files.
+
+    The samples are returned as views into the mapped file, nothing is copied or loaded in advance. The views must
+    be released before the reader is closed. Records appended after the reader was opened are not visible.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Open a capture file.
+
+        :param path: Path of the capture file
+        """
+        self._file = open(path, 'rb')
+        try:
+            self._header = CaptureHeader.unpack(self._file.read(_HEADER_SIZE))
+            self._record_size = 2 * self._header.num_signals
+            self._len = (os.fstat(self._file.fileno()).st_size - _HEADER_SIZE) // self._record_size
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except BaseException:
+            self._file.close()
+            raise
+
+    def __enter__(self) -> 'Scc1CaptureReader':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self._len
+
+    @property
+    def header(self) -> CaptureHeader:
+        return self._header
+
+    def close(self) -> None:
+        self._map.close()
+        self._file.close()
+
+    def index_range(self, start_time: Optional[float] = None, end_time: Optional[float] = None) -> Tuple[int, int]:
+        """
+        :param start_time: Host time of the first sample (default: start of the capture)
+        :param end_time: Host time after the last sample (default: end of the capture)
+        :return: The index range (start, stop) of the samples within the time range
+        """
+        interval = self._header.interval_ms / 1000.0
+
+        def index(t: Optional[float], default: int) -> int:
+            if t is None:
+                return default
+            # first sample at or after t, tolerating rounding errors of the time arithmetic
+            position = math.ceil((t - self._header.start_time) / interval - 1e-6)
+            return min(max(0, position), self._len)
+
+        start = index(start_time, 0)
+        return start, max(start, index(end_time, self._len))
+
+    def samples(self, start: int = 0, stop: Optional[int] = None) -> memoryview:
+        """
+        :param start: Index of the first sample
+        :param stop: Index after the last sample (default: end of the capture)
+        :return: A two dimensional view (samples x signals) of signed 16-bit values. Lost samples contain GAP_VALUE.
+        """
+        start, stop, _ = slice(start, stop).indices(self._len)
+        stop = max(start, stop)
+        n = self._header.num_signals
+        if stop == start:
+            # a view with zeros in its shape can only be created by slicing
+            return memoryview(bytes(self._record_size)).cast('h', shape=[1, n])[:0]
+        data = memoryview(self._map)[_HEADER_SIZE + start * self._record_size:_HEADER_SIZE + stop * self._record_size]
+        if sys.byteorder == 'big':
+            values = array('h', data)
+            values.byteswap()
+            data = memoryview(values).cast('B')
+        return data.cast('h', shape=[stop - start, n])
+
+    def samples_between(self, start_time: Optional[float] = None, end_time: Optional[float] = None) -> memoryview:
+        """
+        :param start_time: Host time of the first sample
+        :param end_time: Host time after the last sample
+        :return: A view of the samples within the time range, see samples
+        """
+        return self.samples(*self.index_range(start_time, end_time))
+
+    def timestamps(self, start: int = 0, stop: Optional[int] = None) -> array:
+        """
+        :param start: Index of the first sample
+        :param stop: Index after the last sample (default: end of the capture)
+        :return: The host time of every sample in the range
+        """
+        start, stop, _ = slice(start, stop).indices(self._len)
+        interval = self._header.interval_ms / 1000.0
+        t0 = self._header.start_time
+        return array('d', (t0 + i * interval for i in range(start, max(start, stop))))
+
+    def to_numpy(self, start: int = 0, stop: Optional[int] = None) -> Any:
+        """
+        :param start: Index of the first sample
+        :param stop: Index after the last sample (default: end of the capture)
+        :return: A NumPy array (samples x signals) sharing the memory with the mapped file
+        """
+        try:
+            import numpy as np
+        except ImportError as e:
+            raise Scc1NotSupportedException("NumPy is required to convert a capture into a NumPy array") from e
+        start, stop, _ = slice(start, stop).indices(self._len)
+        count = max(0, stop - start) * self._header.num_signals
+        values = np.frombuffer(self._map, dtype='<i2', count=count, offset=_HEADER_SIZE + start * self._record_size)
+        return values.reshape(-1, self._header.num_signals)
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+
+import time
+from typing import Any, Callable, List, Optional, Tuple
+
+from sensirion_uart_scc1.drivers.scc1_sf06 import Scc1Sf06
+
+
+class Scc1DrainController:
+    """
+    Adaptive scheduler for reading out the continuous measurement buffer of the cable.
+
+    The controller estimates the rate at which the cable buffer fills from the bytes read and the bytes remaining
+    reported by read_extended_buffer. The poll period is chosen such that the buffer reaches the target occupancy
+    until the next read out. When the cable reports lost bytes, the poll period is halved immediately.
+    """
+
+    def __init__(self, buffer_size: int = 2048, target_occupancy: float = 0.5, min_period: float = 0.001,
+                 max_period: float = 0.5, initial_period: float = 0.01, smoothing: float = 0.3,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        """
+        Initialize the drain controller.
+
+        :param buffer_size: Size of the measurement buffer of the cable in bytes
+        :param target_occupancy: Fraction of the buffer that may be filled between two read outs (0..1)
+        :param min_period: Shortest poll period in seconds
+        :param max_period: Longest poll period in seconds
+        :param initial_period: Poll period in seconds used until a fill rate is known
+        :param smoothing: Weight of the newest fill rate observation (0..1)
+        :param clock: Monotonic clock in seconds
+        """
+        if not 0.0 < target_occupancy <= 1.0:
+            raise ValueError("Target occupancy must be within (0, 1]")
+        if not 0.0 < smoothing <= 1.0:
+            raise ValueError("Smoothing must be within (0, 1]")
+        self._buffer_size = buffer_size
+        self._target_occupancy = target_occupancy
+        self._min_period = min_period
+        self._max_period = max_period
+        self._smoothing = smoothing
+        self._clock = clock
+        self._poll_period = min(max(initial_period, min_period), max_period)
+        self._fill_rate: Optional[float] = None
+        self._last_poll: Optional[float] = None
+        self._last_remaining = 0
+        self._bytes_lost = 0
+
+    @property
+    def poll_period(self) -> float:
+        """The time in seconds to wait until the next read out"""
+        return self._poll_period
+
+    @property
+    def fill_rate(self) -> Optional[float]:
+        """The estimated fill rate of the cable buffer in bytes per second, None if not yet known"""
+        return self._fill_rate
+
+    @property
+    def bytes_lost(self) -> int:
+        """Total number of bytes reported as lost"""
+        return self._bytes_lost
+
+    def reset(self) -> None:
+        """Forget the observed fill rate, e.g. after the measurement interval was changed"""
+        self._fill_rate = None
+        self._last_poll = None
+        self._last_remaining = 0
+
+    def update(self, bytes_read: int, bytes_remaining: int, bytes_lost: int, now: Optional[float] = None) -> float:
+        """
+        Update the fill rate estimate with the result of one read out.
+
+        :param bytes_read: Number of sample bytes read during the read out
+        :param bytes_remaining: Number of bytes remaining in the buffer after the read out
+        :param bytes_lost: Number of bytes reported as lost during the read out
+        :param now: Time of the read out (default: current time of the clock)
+        :return: The new poll period in seconds
+        """
+        if now is None:
+            now = self._clock()
+        self._bytes_lost += bytes_lost
+        if self._last_poll is not None and now > self._last_poll:
+            produced = bytes_read + bytes_remaining - self._last_remaining + bytes_lost
+            rate = max(0.0, produced / (now - self._last_poll))
+            if self._fill_rate is None:
+                self._fill_rate = rate
+            else:
+                self._fill_rate += self._smoothing * (rate - self._fill_rate)
+        self._last_poll = now
+        self._last_remaining = bytes_remaining
+
+        if bytes_lost:
+            period = self._poll_period / 2.0
+        elif self._fill_rate:
+            headroom = self._target_occupancy * self._buffer_size - bytes_remaining
+            period = max(0.0, headroom) / self._fill_rate
+        else:
+            period = self._poll_period
+        self._poll_period = min(max(period, self._min_period), self._max_period)
+        return self._poll_period
+
+    def drain(self, sensor: Scc1Sf06, max_reads: int = 64) -> Tuple[int, int, List[Tuple[Any, ...]]]:
+        """
+        Drain the buffer of the sensor and update the poll period.
+
+        :param sensor: The sensor with running continuous measurement
+        :param max_reads: Maximum number of buffer reads
+        :return: A tuple with (bytes_remaining, bytes_lost, data)
+        """
+        now = self._clock()
+        remaining, bytes_lost, data = sensor.drain_buffer(max_reads)
+        bytes_read = 2 * len(data[0]) * len(data) if data else 0
+        self.update(bytes_read, remaining, bytes_lost, now)
+        return remaining, bytes_lost, data
+
+    def run(self, sensor: Scc1Sf06, handle: Callable[[List[Tuple[Any, ...]]], None],
+            should_stop: Callable[[], bool], sleep: Callable[[float], Any] = time.sleep) -> None:
+        """
+        Drain the sensor buffer periodically until should_stop returns True.
+
+        :param sensor: The sensor with running continuous measurement
+        :param handle: Called with every non-empty batch of samples
+        :param should_stop: Called before every read out
+        :param sleep: Function used to wait for the next read out
+        """
+        while not should_stop():
+            start = self._clock()
+            _, _, data = self.drain(sensor)
+            if data:
+                handle(data)
+            wait = self._poll_period - (self._clock() - start)
+            if wait > 0:
+                sleep(wait)
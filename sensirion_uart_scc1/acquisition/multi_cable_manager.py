@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Iterator, List, NamedTuple, Optional, Sequence
+
+from sensirion_uart_scc1.drivers.scc1_sf06 import Scc1Sf06
+from sensirion_uart_scc1.drivers.sf06_sample_batch import Sf06SampleBatch
+
+log = logging.getLogger(__name__)
+
+
+class TaggedBatch(NamedTuple):
+    """A batch of samples read from one cable"""
+    cable_serial: str
+    host_timestamp: float
+    bytes_lost: int
+    samples: Sf06SampleBatch
+
+
+class CableStatistics(NamedTuple):
+    """Acquisition statistics of one cable"""
+    cable_serial: str
+    running: bool
+    samples: int
+    bytes_lost: int
+    error: Optional[BaseException]
+
+
+class _CableWorker:
+    """Acquisition thread of one cable"""
+
+    def __init__(self, manager: 'Scc1AcquisitionManager', sensor: Scc1Sf06, cable_serial: str) -> None:
+        self.sensor = sensor
+        self.cable_serial = cable_serial
+        self.samples = 0
+        self.bytes_lost = 0
+        self.error: Optional[BaseException] = None
+        self._manager = manager
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.running:
+            # a thread abandoned by stop is still blocked by the cable, a second thread must not use the same sensor
+            log.warning("Acquisition of SCC1-%s did not stop yet and is not restarted", self.cable_serial)
+            return
+        self.error = None
+        # every thread has its own stop event, so an abandoned thread stops as soon as its cable responds again
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(self._stop_event,),
+                                        name=f'scc1-acquisition-{self.cable_serial}', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+    def join(self, timeout: Optional[float]) -> None:
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self, stop_event: threading.Event) -> None:
+        manager = self._manager
+        try:
+            self.sensor.start_continuous_measurement(manager.interval_ms)
+            try:
+                while not stop_event.is_set():
+                    remaining, lost, batch = self.sensor.read_extended_buffer_batch()
+                    if lost:
+                        log.warning("SCC1-%s lost %d bytes in the cable buffer", self.cable_serial, lost)
+                        self.bytes_lost += lost
+                    if batch or lost:
+                        self.samples += len(batch)
+                        manager.publish(TaggedBatch(self.cable_serial, time.time(), lost, batch))
+                    if remaining == 0:
+                        stop_event.wait(manager.poll_interval)
+            finally:
+                self.sensor.stop_continuous_measurement()
+        except BaseException as e:  # noqa
+            log.exception("Acquisition of SCC1-%s terminated", self.cable_serial)
+            self.error = e
+
+
+class Scc1AcquisitionManager:
+    """
+    Concurrent acquisition from several SCC1 cables.
+
+    Every cable is read by its own worker thread, so a slow or hung cable does not delay the other cables. The
+    batches of all cables are merged into one bounded queue, tagged with the serial number of the cable and the host
+    time of the read out. If the consumer does not keep up, the oldest batches are dropped.
+
+    Usage::
+
+        with Scc1AcquisitionManager([sensor_1, sensor_2], interval_ms=2) as manager:
+            for batch in manager:
+                print(batch.cable_serial, len(batch.samples))
+    """
+
+    def __init__(self, sensors: Sequence[Scc1Sf06] = (), interval_ms: int = 0, poll_interval: float = 0.002,
+                 max_pending_batches: int = 10_000) -> None:
+        """
+        Initialize the manager.
+
+        :param sensors: The sensors to acquire from, each attached to a different cable
+        :param interval_ms: The measurement interval in milliseconds used for all sensors
+        :param poll_interval: Time in seconds a worker waits after the buffer of its cable was found empty
+        :param max_pending_batches: Maximum number of batches held for the consumer
+        """
+        self.interval_ms = interval_ms
+        self.poll_interval = poll_interval
+        self._workers: Dict[str, _CableWorker] = {}
+        self._pending: Deque[TaggedBatch] = deque(maxlen=max_pending_batches)
+        self._condition = threading.Condition()
+        self._batches_dropped = 0
+        self._running = False
+        for sensor in sensors:
+            self.add(sensor)
+
+    def __enter__(self) -> 'Scc1AcquisitionManager':
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.stop()
+
+    def __iter__(self) -> Iterator[TaggedBatch]:
+        """Iterate over the merged batches until the manager is stopped and all batches are consumed"""
+        while True:
+            batches = self.read(timeout=None)
+            if not batches:
+                return
+            yield from batches
+
+    @property
+    def cable_serials(self) -> List[str]:
+        return list(self._workers)
+
+    @property
+    def batches_dropped(self) -> int:
+        """Number of batches dropped because the consumer did not keep up"""
+        with self._condition:
+            return self._batches_dropped
+
+    def add(self, sensor: Scc1Sf06, cable_serial: Optional[str] = None) -> None:
+        """
+        Add a sensor. Sensors added while the manager is running are started immediately.
+
+        :param sensor: The sensor driver
+        :param cable_serial: The tag used for the batches of this sensor (default: serial number of the cable)
+        """
+        if cable_serial is None:
+            cable_serial = sensor.device.serial_number
+        if cable_serial in self._workers:
+            raise ValueError(f"Cable {cable_serial} was already added")
+        worker = _CableWorker(self, sensor, cable_serial)
+        self._workers[cable_serial] = worker
+        if self._running:
+            worker.start()
+
+    def start(self) -> None:
+        """
+        Start the acquisition on all cables. A worker abandoned by a previous stop is not started a second time, the
+        cable is restarted with restart_cable after the worker terminated.
+        """
+        if self._running:
+            return
+        self._running = True
+        for worker in self._workers.values():
+            worker.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """
+        Stop the acquisition on all cables. Batches already read remain available.
+
+        :param timeout: Maximum time in seconds to wait for every worker. A worker blocked by a hung cable is
+            abandoned after the timeout, it terminates as soon as the cable responds again.
+        """
+        for worker in self._workers.values():
+            worker.stop()
+        for worker in self._workers.values():
+            worker.join(timeout)
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+
+    def restart_cable(self, cable_serial: str) -> None:
+        """
+        Restart the worker of a cable that terminated, e.g. after the cable was reconnected.
+
+        :param cable_serial: The serial number of the cable
+        """
+        worker = self._workers[cable_serial]
+        if self._running and not worker.running:
+            worker.start()
+
+    def publish(self, batch: TaggedBatch) -> None:
+        """
+        Add a batch to the merged stream. Called by the workers.
+
+        :param batch: The batch to add
+        """
+        with self._condition:
+            if len(self._pending) == self._pending.maxlen:
+                self._batches_dropped += 1
+            self._pending.append(batch)
+            self._condition.notify_all()
+
+    def read(self, timeout: Optional[float] = 0.0) -> List[TaggedBatch]:
+        """
+        Read all pending batches of all cables.
+
+        :param timeout: Time in seconds to wait for a batch (None waits until a batch arrives or the manager stops)
+        :return: The pending batches in the order they were read
+        """
+        with self._condition:
+            if timeout is None or timeout > 0:
+                self._condition.wait_for(lambda: self._pending or not self._running, timeout)
+            batches = list(self._pending)
+            self._pending.clear()
+            return batches
+
+    def statistics(self) -> List[CableStatistics]:
+        """
+        :return: The acquisition statistics of all cables
+        """
+        return [CableStatistics(w.cable_serial, w.running, w.samples, w.bytes_lost, w.error)
+                for w in self._workers.values()]
@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import multiprocessing
+import queue
+from functools import partial
+from typing import Any, Callable, Optional
+
+from sensirion_uart_scc1.acquisition.shared_ring import Scc1SharedRingReader, Scc1SharedSampleRing
+from sensirion_uart_scc1.drivers.scc1_sf06 import Scc1Sf06
+from sensirion_uart_scc1.drivers.slf_common import SlfMode
+
+log = logging.getLogger(__name__)
+
+SensorFactory = Callable[[], Scc1Sf06]
+
+
+def open_sensor(port: str, baudrate: int = 115200, liquid_mode: Optional[SlfMode] = None) -> Scc1Sf06:
+    """
+    Open a serial port and create the driver of the attached sensor, see create_sensor_driver.
+
+    :param port: Name of the serial port
+    :param baudrate: Baudrate of the cable in bit/s
+    :param liquid_mode: The liquid that is measured
+    :return: The sensor driver
+    """
+    from sensirion_shdlc_driver import ShdlcConnection, ShdlcSerialPort
+
+    from sensirion_uart_scc1.drivers.scc1_driver_factory import create_sensor_driver
+    from sensirion_uart_scc1.scc1_shdlc_device import Scc1ShdlcDevice
+
+    shdlc_port = ShdlcSerialPort(port=port, baudrate=baudrate)
+    try:
+        return create_sensor_driver(Scc1ShdlcDevice(ShdlcConnection(shdlc_port)), liquid_mode)
+    except BaseException:
+        shdlc_port.close()
+        raise
+
+
+def _acquisition_worker(sensor_factory: SensorFactory, ring_name: str, interval_ms: int, poll_interval: float,
+                        stop_event: Any, errors: Any) -> None:
+    ring = Scc1SharedSampleRing.attach(ring_name)
+    try:
+        sensor = sensor_factory()
+        try:
+            sensor.start_continuous_measurement(interval_ms)
+            try:
+                while not stop_event.is_set():
+                    remaining, lost, batch = sensor.read_extended_buffer_batch()
+                    if batch or lost:
+                        ring.write(batch, lost // (2 * batch.num_signals))
+                    if remaining == 0:
+                        stop_event.wait(poll_interval)
+            finally:
+                sensor.stop_continuous_measurement()
+        finally:
+            sensor.device.connection.port.close()
+    except BaseException as e:  # noqa
+        errors.put(f"{type(e).__name__}: {e}")
+    finally:
+        ring.close()
+
+
+class Scc1ProcessAcquisition:
+    """
+    Runs the acquisition of one sensor in a separate worker process.
+
+    The worker creates the device and the sensor driver, reads the measurement buffer and writes the decoded samples
+    into a Scc1SharedSampleRing. The timing of the read outs is therefore independent of the consumers, which read
+    the ring from the parent process or attach to it by name from other processes.
+
+    Usage::
+
+        with Scc1ProcessAcquisition.from_port('/dev/ttyUSB0', interval_ms=2) as acquisition:
+            reader = acquisition.reader()
+            while True:
+                first_index, batch = reader.read()
+                ...
+    """
+
+    def __init__(self, sensor_factory: SensorFactory, interval_ms: int = 0, capacity: int = 262144,
+                 num_signals: int = 3, poll_interval: float = 0.002, start_method: Optional[str] = None) -> None:
+        """
+        Initialize the acquisition.
+
+        :param sensor_factory: Picklable callable creating the sensor driver in the worker process, e.g.
+            functools.partial(open_sensor, 'COM1')
+        :param interval_ms: The measurement interval in milliseconds
+        :param capacity: Number of samples held by the shared ring
+        :param num_signals: Number of signals per sample
+        :param poll_interval: Time in seconds the worker waits when the buffer of the cable was empty
+        :param start_method: The multiprocessing start method (default: the platform default)
+        """
+        self._sensor_factory = sensor_factory
+        self._interval_ms = interval_ms
+        self._capacity = capacity
+        self._num_signals = num_signals
+        self._poll_interval = poll_interval
+        self._context = multiprocessing.get_context(start_method)
+        self._ring: Optional[Scc1SharedSampleRing] = None
+        self._process: Optional[Any] = None
+        self._stop_event = self._context.Event()
+        self._errors = self._context.Queue()
+        self._error: Optional[str] = None
+
+    @classmethod
+    def from_port(cls, port: str, baudrate: int = 115200, liquid_mode: Optional[SlfMode] = None,
+                  **kwargs: Any) -> 'Scc1ProcessAcquisition':
+        """
+        Create an acquisition of the sensor attached to the cable on a serial port.
+
+        :param port: Name of the serial port
+        :param baudrate: Baudrate of the cable in bit/s
+        :param liquid_mode: The liquid that is measured
+        :return: The acquisition
+        """
+        return cls(partial(open_sensor, port, baudrate, liquid_mode), **kwargs)
+
+    def __enter__(self) -> 'Scc1ProcessAcquisition':
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.stop()
+
+    @property
+    def ring(self) -> Scc1SharedSampleRing:
+        """The shared ring, available after start"""
+        if self._ring is None:
+            raise RuntimeError("The acquisition was not started")
+        return self._ring
+
+    @property
+    def running(self) -> bool:
+        return self._process is not None and self._process.is_alive()
+
+    @property
+    def error(self) -> Optional[str]:
+        """Description of the error that terminated the worker, None if no error occurred"""
+        if self._error is None:
+            try:
+                self._error = self._errors.get_nowait()
+            except queue.Empty:
+                pass
+        return self._error
+
+    def reader(self, from_start: bool = False) -> Scc1SharedRingReader:
+        """
+        :param from_start: Start with the oldest sample in the ring
+        :return: A new reader of the shared ring
+        """
+        return self.ring.reader(from_start)
+
+    def start(self) -> None:
+        """Create the shared ring and start the worker process"""
+        if self.running:
+            return
+        if self._ring is None:
+            self._ring = Scc1SharedSampleRing(self._capacity, self._num_signals)
+        self._stop_event.clear()
+        self._error = None
+        self._process = self._context.Process(
+            target=_acquisition_worker, name='scc1-acquisition', daemon=True,
+            args=(self._sensor_factory, self._ring.name, self._interval_ms, self._poll_interval, self._stop_event,
+                  self._errors))
+        self._process.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """
+        Stop the worker process and free the shared ring. Readers of other processes must detach before.
+
+        :param timeout: Time in seconds to wait for the worker to stop the measurement before it is terminated
+        """
+        if self._process is not None:
+            self._stop_event.set()
+            self._process.join(timeout)
+            if self._process.is_alive():
+                log.warning("Terminating acquisition worker %d", self._process.pid)
+                self._process.terminate()
+                self._process.join()
+            self._process = None
+        if self._ring is not None:
+            self._ring.close()
+            self._ring = None
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+
+from array import array
+from threading import Condition
+from typing import List, Optional, Sequence, Tuple
+
+
+class SampleRingBuffer:
+    """
+    Bounded, preallocated and thread-safe ring buffer for raw sensor samples.
+
+    The samples are stored as signed 16-bit integers in one preallocated array. When the buffer is full, the oldest
+    samples are overwritten and counted in samples_dropped.
+    """
+
+    def __init__(self, capacity: int, num_signals: int = 3) -> None:
+        """
+        Initialize the ring buffer.
+
+        :param capacity: Maximum number of samples held by the buffer
+        :param num_signals: Number of signals per sample
+        """
+        if capacity <= 0:
+            raise ValueError("Capacity must be positive")
+        if num_signals <= 0:
+            raise ValueError("Number of signals must be positive")
+        self._capacity = capacity
+        self._num_signals = num_signals
+        self._data = array('h', bytes(2 * capacity * num_signals))
+        self._head = 0  # index of the oldest sample
+        self._size = 0
+        self._samples_dropped = 0
+        self._closed = False
+        self._condition = Condition()
+
+    def __len__(self) -> int:
+        with self._condition:
+            return self._size
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    @property
+    def num_signals(self) -> int:
+        return self._num_signals
+
+    @property
+    def samples_dropped(self) -> int:
+        """Number of samples overwritten because the consumer did not keep up"""
+        with self._condition:
+            return self._samples_dropped
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def open(self) -> None:
+        """Reopen a closed buffer"""
+        with self._condition:
+            self._closed = False
+
+    def close(self) -> None:
+        """Close the buffer. Blocked consumers are woken up and receive the remaining samples."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    def put(self, samples: Sequence[Tuple[int, ...]]) -> int:
+        """
+        Append samples to the buffer.
+
+        :param samples: The samples to append, every sample must have num_signals values
+        :return: The number of old samples that were overwritten
+        """
+        if not samples:
+            return 0
+        n = self._num_signals
+        if any(len(sample) != n for sample in samples):
+            raise ValueError(f"Expected {n} signals per sample")
+        with self._condition:
+            excess = max(0, len(samples) - self._capacity)
+            if excess:
+                samples = samples[excess:]
+            overwritten = max(0, self._size + len(samples) - self._capacity)
+            write = (self._head + self._size) % self._capacity
+            for sample in samples:
+                self._data[write * n:(write + 1) * n] = array('h', sample)
+                write += 1
+                if write == self._capacity:
+                    write = 0
+            self._head = (self._head + overwritten) % self._capacity
+            self._size = min(self._capacity, self._size + len(samples))
+            self._samples_dropped += excess + overwritten
+            self._condition.notify_all()
+            return excess + overwritten
+
+    def get(self, max_samples: Optional[int] = None, timeout: Optional[float] = None) -> List[Tuple[int, ...]]:
+        """
+        Remove and return the oldest samples.
+
+        :param max_samples: Maximum number of samples to return (None for all available samples)
+        :param timeout: Time in seconds to wait for samples if the buffer is empty. None waits until samples are
+            available or the buffer is closed, 0 does not wait at all.
+        :return: A list of samples, empty if no samples arrived within the timeout
+        """
+        with self._condition:
+            if timeout is None or timeout > 0:
+                self._condition.wait_for(lambda: self._size > 0 or self._closed, timeout)
+            count = self._size if max_samples is None else min(max_samples, self._size)
+            n = self._num_signals
+            out = []
+            read = self._head
+            for _ in range(count):
+                out.append(tuple(self._data[read * n:(read + 1) * n]))
+                read += 1
+                if read == self._capacity:
+                    read = 0
+            self._head = read
+            self._size -= count
+            return out
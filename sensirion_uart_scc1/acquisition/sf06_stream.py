@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import threading
+import time
+from typing import Iterator, List, Optional, Tuple
+
+from sensirion_uart_scc1.acquisition.drain_controller import Scc1DrainController
+from sensirion_uart_scc1.acquisition.sample_ring_buffer import SampleRingBuffer
+from sensirion_uart_scc1.drivers.scc1_sf06 import Scc1Sf06
+
+log = logging.getLogger(__name__)
+
+
+class Scc1Sf06Stream:
+    """
+    Background acquisition of the continuous measurement of a SF06 sensor.
+
+    A dedicated reader thread drains the measurement buffer of the cable with read_extended_buffer and stores the
+    samples in a bounded ring buffer. Consumers read the samples from the ring buffer, so a slow consumer does not
+    delay the read out of the cable buffer.
+
+    Usage::
+
+        with Scc1Sf06Stream(sensor, interval_ms=2) as stream:
+            for samples in stream:
+                ...
+    """
+
+    def __init__(self, sensor: Scc1Sf06, interval_ms: int = 0, buffer_capacity: int = 100_000,
+                 num_signals: int = 3, poll_interval: float = 0.002,
+                 drain_controller: Optional[Scc1DrainController] = None) -> None:
+        """
+        Initialize the stream.
+
+        :param sensor: The sensor driver
+        :param interval_ms: The measurement interval in milliseconds
+        :param buffer_capacity: Number of samples the ring buffer can hold
+        :param num_signals: Number of signals per sample delivered by the sensor
+        :param poll_interval: Time in seconds the reader waits after the cable buffer was found empty
+        :param drain_controller: If given, the cable buffer is drained completely on every read out and the time
+            between read outs is adapted to the fill rate of the buffer instead of using poll_interval.
+        """
+        self._sensor = sensor
+        self._interval_ms = interval_ms
+        self._poll_interval = poll_interval
+        self._drain_controller = drain_controller
+        self._buffer = SampleRingBuffer(buffer_capacity, num_signals)
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._error: Optional[BaseException] = None
+        self._bytes_lost = 0
+        self._samples_acquired = 0
+
+    def __enter__(self) -> 'Scc1Sf06Stream':
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.stop()
+
+    def __iter__(self) -> Iterator[List[Tuple[int, ...]]]:
+        """Iterate over batches of samples until the stream is stopped and all samples are consumed"""
+        while True:
+            samples = self.read(timeout=None)
+            if not samples:
+                return
+            yield samples
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def buffer(self) -> SampleRingBuffer:
+        return self._buffer
+
+    @property
+    def bytes_lost(self) -> int:
+        """Number of bytes the cable reported as lost since the stream was started"""
+        return self._bytes_lost
+
+    @property
+    def samples_acquired(self) -> int:
+        """Number of samples read from the cable since the stream was started"""
+        return self._samples_acquired
+
+    @property
+    def samples_dropped(self) -> int:
+        """Number of samples overwritten in the ring buffer because the consumer did not keep up"""
+        return self._buffer.samples_dropped
+
+    @property
+    def error(self) -> Optional[BaseException]:
+        """The exception that terminated the reader thread, if any"""
+        return self._error
+
+    def start(self) -> None:
+        """Start the continuous measurement and the reader thread"""
+        if self.is_running:
+            return
+        self._stop_event.clear()
+        self._error = None
+        self._buffer.open()
+        if self._drain_controller is not None:
+            self._drain_controller.reset()
+        self._sensor.start_continuous_measurement(self._interval_ms)
+        self._thread = threading.Thread(target=self._run, name=f'{type(self).__name__}-reader', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the reader thread and the continuous measurement. Samples already read remain available."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._sensor.stop_continuous_measurement()
+        self._buffer.close()
+
+    def read(self, max_samples: Optional[int] = None, timeout: Optional[float] = 0.0) -> List[Tuple[int, ...]]:
+        """
+        Read samples from the ring buffer.
+
+        :param max_samples: Maximum number of samples to return (None for all available samples)
+        :param timeout: Time in seconds to wait for samples (None waits until samples arrive or the stream stops)
+        :return: The oldest samples in the buffer
+        :raises: The exception that terminated the reader thread once all samples are consumed
+        """
+        samples = self._buffer.get(max_samples, timeout)
+        if not samples and self._error is not None:
+            raise self._error
+        return samples
+
+    def _run(self) -> None:
+        try:
+            while not self._stop_event.is_set():
+                start = time.monotonic()
+                if self._drain_controller is not None:
+                    remaining, lost, data = self._drain_controller.drain(self._sensor)
+                    wait = self._drain_controller.poll_period - (time.monotonic() - start)
+                else:
+                    remaining, lost, data = self._sensor.read_extended_buffer()
+                    wait = self._poll_interval if remaining == 0 else 0.0
+                if lost:
+                    log.warning("%s lost %d bytes in the cable buffer", self, lost)
+                    self._bytes_lost += lost
+                if data:
+                    self._samples_acquired += len(data)
+                    self._buffer.put(data)
+                if wait > 0:
+                    self._stop_event.wait(wait)
+        except BaseException as e:  # noqa
+            log.exception("Reader thread terminated")
+            self._error = e
+            self._buffer.close()
@@ -0,0 +1,290 @@
+# -*- coding: utf-8 -*-
+
+import struct
+import sys
+import time
+from array import array
+from multiprocessing import shared_memory
+from typing import List, Optional, Tuple
+
+from sensirion_uart_scc1.drivers.sf06_sample_batch import Sf06SampleBatch
+
+#: Magic bytes at the start of the shared memory block
+RING_MAGIC = b'SCC1RING'
+
+# magic, number of signals, capacity in samples, write index, samples lost, time of the last write, reserve index,
+# number of gaps, gap horizon, followed by the table of the latest gaps
+_HEADER = struct.Struct('<8sIIQQdQQQ')
+_WRITE_INDEX_OFFSET = 16
+_SAMPLES_LOST_OFFSET = 24
+_WRITE_TIME_OFFSET = 32
+_RESERVE_INDEX_OFFSET = 40
+_GAP_COUNT_OFFSET = 48
+_GAP_HORIZON_OFFSET = 56
+# first index and number of samples of a gap
+_GAP = struct.Struct('<QQ')
+_GAP_SLOTS = 32
+_HEADER_SIZE = _HEADER.size + _GAP_SLOTS * _GAP.size
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    memory = shared_memory.SharedMemory(name=name)
+    # only the creator owns the block, the resource tracker would otherwise unlink it when the reader exits
+    from multiprocessing import resource_tracker
+    resource_tracker.unregister(memory._name, 'shared_memory')
+    return memory
+
+
+class Scc1SharedSampleRing:
+    """
+    Ring buffer for decoded samples in shared memory, written by one process and read by any number of processes.
+
+    Sample k of the measurement is stored in slot k % capacity. Before the writer touches any slot it publishes the
+    reserve index, the end of the samples being written, and after the samples it publishes the write index. Readers
+    only copy samples below the write index and validate after copying against the reserve index that the copied
+    slots were not overwritten meanwhile, so no lock is needed. Readers get the samples with one copy out of the
+    shared memory, without pickling.
+
+    Samples lost by the cable advance the indexes, so the index of a sample is its index since the start of the
+    measurement. The latest gaps are recorded in the header and skipped by the readers.
+    """
+
+    def __init__(self, capacity: int, num_signals: int = 3, name: Optional[str] = None) -> None:
+        """
+        Create a ring in a new shared memory block.
+
+        :param capacity: Number of samples held by the ring
+        :param num_signals: Number of signals per sample
+        :param name: Name of the shared memory block (default: a unique name)
+        """
+        if capacity <= 0:
+            raise ValueError("Capacity must be positive")
+        if num_signals <= 0:
+            raise ValueError("Number of signals must be positive")
+        memory = shared_memory.SharedMemory(name=name, create=True, size=_HEADER_SIZE + 2 * capacity * num_signals)
+        _HEADER.pack_into(memory.buf, 0, RING_MAGIC, num_signals, capacity, 0, 0, 0.0, 0, 0, 0)
+        self._init(memory, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> 'Scc1SharedSampleRing':
+        """
+        Attach to a ring created by another process.
+
+        :param name: Name of the shared memory block
+        :return: The ring
+        """
+        memory = _attach(name)
+        ring = cls.__new__(cls)
+        try:
+            ring._init(memory, owner=False)
+        except BaseException:
+            memory.close()
+            raise
+        return ring
+
+    def _init(self, memory: shared_memory.SharedMemory, owner: bool) -> None:
+        magic, num_signals, capacity = _HEADER.unpack_from(memory.buf)[:3]
+        if magic != RING_MAGIC:
+            raise ValueError(f"{memory.name} is not a SCC1 sample ring")
+        self._memory = memory
+        self._owner = owner
+        self._num_signals = num_signals
+        self._capacity = capacity
+        self._header = memory.buf[:_HEADER_SIZE]
+        self._data = memory.buf[_HEADER_SIZE:_HEADER_SIZE + 2 * capacity * num_signals].cast('h')
+
+    def __enter__(self) -> 'Scc1SharedSampleRing':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    @property
+    def name(self) -> str:
+        """Name of the shared memory block, used to attach from other processes"""
+        return self._memory.name
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    @property
+    def num_signals(self) -> int:
+        return self._num_signals
+
+    @property
+    def write_index(self) -> int:
+        """Number of samples written or lost since the creation of the ring"""
+        return struct.unpack_from('<Q', self._header, _WRITE_INDEX_OFFSET)[0]
+
+    @property
+    def reserve_index(self) -> int:
+        """End of the samples being written, slots below reserve_index - capacity may be overwritten"""
+        return struct.unpack_from('<Q', self._header, _RESERVE_INDEX_OFFSET)[0]
+
+    @property
+    def samples_lost(self) -> int:
+        """Number of samples reported as lost by the cable"""
+        return struct.unpack_from('<Q', self._header, _SAMPLES_LOST_OFFSET)[0]
+
+    @property
+    def last_write_time(self) -> float:
+        """Host time of the last write, 0 if nothing was written yet"""
+        return struct.unpack_from('<d', self._header, _WRITE_TIME_OFFSET)[0]
+
+    def write(self, batch: Sf06SampleBatch, samples_lost: int = 0) -> None:
+        """
+        Append samples. Only one process may write to a ring.
+
+        :param batch: The samples
+        :param samples_lost: Number of samples lost by the cable before the batch
+        """
+        n = self._num_signals
+        if batch.num_signals != n:
+            raise ValueError(f"Expected {n} signals per sample")
+        values = batch.values
+        start = self.write_index
+        if samples_lost:
+            self._add_gap(start, samples_lost)
+            start += samples_lost
+        end = start + len(batch)
+        if len(batch) > self._capacity:
+            # only the newest samples fit into the ring
+            values = values[-self._capacity * n:]
+        count = len(values) // n
+        # announce the slots before they are overwritten
+        struct.pack_into('<Q', self._header, _RESERVE_INDEX_OFFSET, end)
+        slot = (end - count) % self._capacity
+        first = min(count, self._capacity - slot)
+        self._data[slot * n:(slot + first) * n] = values[:first * n]
+        if first < count:
+            self._data[:(count - first) * n] = values[first * n:]
+        if samples_lost:
+            struct.pack_into('<Q', self._header, _SAMPLES_LOST_OFFSET, self.samples_lost + samples_lost)
+        struct.pack_into('<d', self._header, _WRITE_TIME_OFFSET, time.time())
+        # publish the samples after they were written
+        struct.pack_into('<Q', self._header, _WRITE_INDEX_OFFSET, end)
+
+    def _add_gap(self, start: int, count: int) -> None:
+        gap_count = struct.unpack_from('<Q', self._header, _GAP_COUNT_OFFSET)[0]
+        offset = _HEADER.size + (gap_count % _GAP_SLOTS) * _GAP.size
+        if gap_count >= _GAP_SLOTS:
+            # readers skip the samples up to the end of the dropped gap, it is no longer known where it was
+            evicted_start, evicted_count = _GAP.unpack_from(self._header, offset)
+            struct.pack_into('<Q', self._header, _GAP_HORIZON_OFFSET, evicted_start + evicted_count)
+        _GAP.pack_into(self._header, offset, start, count)
+        struct.pack_into('<Q', self._header, _GAP_COUNT_OFFSET, gap_count + 1)
+
+    def _gaps(self) -> Tuple[List[Tuple[int, int]], int]:
+        """
+        :return: The recorded gaps as (first index, end index) and the gap horizon, the index up to which gaps may
+            have been dropped from the table
+        """
+        gap_count = struct.unpack_from('<Q', self._header, _GAP_COUNT_OFFSET)[0]
+        gaps = [_GAP.unpack_from(self._header, _HEADER.size + (i % _GAP_SLOTS) * _GAP.size)
+                for i in range(max(0, gap_count - _GAP_SLOTS), gap_count)]
+        # read after the table, gaps overwritten meanwhile start below the horizon
+        horizon = struct.unpack_from('<Q', self._header, _GAP_HORIZON_OFFSET)[0]
+        return sorted((start, start + count) for start, count in gaps if start >= horizon), horizon
+
+    def reader(self, from_start: bool = False) -> 'Scc1SharedRingReader':
+        """
+        :param from_start: Start with the oldest sample in the ring instead of the next written sample
+        :return: A new reader of this ring
+        """
+        return Scc1SharedRingReader(self, from_start)
+
+    def close(self) -> None:
+        """Detach from the shared memory, the creator also frees it"""
+        if self._data is None:
+            return
+        self._data.release()
+        self._header.release()
+        self._data = self._header = None
+        self._memory.close()
+        if self._owner:
+            self._memory.unlink()
+
+
+class Scc1SharedRingReader:
+    """Reading position of one consumer of a Scc1SharedSampleRing"""
+
+    def __init__(self, ring: Scc1SharedSampleRing, from_start: bool = False) -> None:
+        """
+        :param ring: The ring to read
+        :param from_start: Start with the oldest sample in the ring instead of the next written sample
+        """
+        self._ring = ring
+        write_index = ring.write_index
+        self._read_index = max(0, write_index - ring.capacity) if from_start else write_index
+        self._samples_overrun = 0
+        self._samples_lost = 0
+
+    @property
+    def read_index(self) -> int:
+        """Index of the next sample returned by read"""
+        return self._read_index
+
+    @property
+    def samples_overrun(self) -> int:
+        """Number of samples overwritten by the writer before this reader read them"""
+        return self._samples_overrun
+
+    @property
+    def samples_lost(self) -> int:
+        """Number of samples lost by the cable that were skipped by this reader"""
+        return self._samples_lost
+
+    @property
+    def available(self) -> int:
+        """Number of samples that can be read"""
+        return min(self._ring.write_index - self._read_index, self._ring.capacity)
+
+    def read(self, max_samples: Optional[int] = None) -> Tuple[int, Sf06SampleBatch]:
+        """
+        Read the consecutive samples written since the previous read. Samples after a gap are returned by the next
+        read, the gap is skipped and counted in samples_lost.
+
+        :param max_samples: Maximum number of samples to read (default: all available samples)
+        :return: The index of the first sample since the start of the measurement and the samples. If the reader
+            fell behind by more than the capacity, the overwritten samples are skipped and counted in
+            samples_overrun.
+        """
+        ring = self._ring
+        n, capacity = ring.num_signals, ring.capacity
+        write_index = ring.write_index
+        gaps, horizon = ring._gaps()
+        self._skip_overwritten(max(ring.reserve_index - capacity, horizon))
+        stop = write_index
+        for gap_start, gap_end in gaps:
+            if gap_end <= self._read_index:
+                continue
+            if gap_start > self._read_index:
+                stop = min(stop, gap_start)
+                break
+            self._samples_lost += gap_end - self._read_index
+            self._read_index = gap_end
+        count = max(0, stop - self._read_index)
+        if max_samples is not None:
+            count = min(count, max_samples)
+        start = self._read_index
+        slot = start % capacity
+        first = min(count, capacity - slot)
+        values = array('h', ring._data[slot * n:(slot + first) * n])
+        if first < count:
+            values.extend(ring._data[:(count - first) * n])
+        # samples the writer started to overwrite while they were copied are dropped
+        overwritten = max(0, ring.reserve_index - capacity - start)
+        if overwritten:
+            values = values[min(overwritten, count) * n:]
+            start += min(overwritten, count)
+            self._samples_overrun += min(overwritten, count)
+        self._read_index = start + len(values) // n
+        return start, Sf06SampleBatch(values, n)
+
+    def _skip_overwritten(self, oldest: int) -> None:
+        if self._read_index < oldest:
+            self._samples_overrun += oldest - self._read_index
+            self._read_index = oldest
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+
+import time
+from array import array
+from typing import Callable, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+from sensirion_uart_scc1.drivers.sf06_sample_batch import Sf06SampleBatch
+
+Samples = Union[Sequence[Tuple[int, ...]], Sf06SampleBatch]
+
+
+class TimestampedSamples(NamedTuple):
+    """Consecutive samples with their host timestamps"""
+    first_index: int  #: Index of the first sample since the start of the measurement, lost samples included
+    timestamps: array  #: Host time of every sample in seconds
+    samples: Samples
+
+
+class SampleGap(NamedTuple):
+    """Samples lost by the cable because its buffer was full"""
+    first_index: int  #: Index of the first lost sample since the start of the measurement
+    timestamp: float  #: Host time of the first lost sample in seconds
+    samples_lost: int
+
+
+class Scc1SampleTimestamper:
+    """
+    Assigns host timestamps to the samples read from the measurement buffer of the cable.
+
+    The cable stores one sample per measurement interval, timed by its own clock. The timestamper extrapolates the
+    time of sample k from the newest sample of the previous read out with the estimated period. After every read out,
+    the newest sample produced by the cable must be older than the time of the read out, in average by half a period.
+    The deviation from this expectation corrects the time of the newest sample and, slowly, the period, which
+    compensates the drift between the cable clock and the host clock. Reads that
+    are delayed by USB jitter correct the model only slightly, whereas a sample that would lie in the future of its
+    read out corrects the offset immediately.
+
+    When the buffer of the cable is full, new samples are discarded. The lost samples are therefore placed behind
+    the samples that were in the buffer at the time of the read out, and are reported as SampleGap.
+    """
+
+    def __init__(self, interval_ms: float, offset_gain: float = 0.1, drift_gain: float = 0.01,
+                 max_drift: float = 0.05, clock: Callable[[], float] = time.time) -> None:
+        """
+        Initialize the timestamper.
+
+        :param interval_ms: The measurement interval configured on the cable in milliseconds
+        :param offset_gain: Weight of the timing error of one read out for the offset correction (0..1)
+        :param drift_gain: Weight of the timing error of one read out for the period correction (0..1)
+        :param max_drift: Largest accepted relative deviation of the period from the interval
+        :param clock: Host clock in seconds used when no read time is passed
+        """
+        if interval_ms <= 0:
+            raise ValueError("Measurement interval must be positive")
+        self._nominal_period = interval_ms / 1000.0
+        self._offset_gain = offset_gain
+        self._drift_gain = drift_gain
+        self._max_drift = max_drift
+        self._clock = clock
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget the timing model, e.g. when the measurement is restarted"""
+        self._period = self._nominal_period
+        self._anchor_time: Optional[float] = None
+        self._anchor_index = 0
+        self._next_index = 0
+        self._delivered = 0
+        self._pending_gaps: List[Tuple[int, int]] = []
+        self._samples_lost = 0
+
+    @property
+    def period(self) -> float:
+        """The estimated measurement period in seconds of the host clock"""
+        return self._period
+
+    @property
+    def drift_ppm(self) -> float:
+        """The estimated drift of the cable clock relative to the host clock in parts per million"""
+        return (self._period / self._nominal_period - 1.0) * 1e6
+
+    @property
+    def samples_lost(self) -> int:
+        """Total number of samples reported as lost"""
+        return self._samples_lost
+
+    def timestamp(self, index: int) -> float:
+        """
+        :param index: Index of a sample since the start of the measurement
+        :return: The host time of the sample
+        """
+        if self._anchor_time is None:
+            raise ValueError("No samples were processed yet")
+        return self._anchor_time + (index - self._anchor_index) * self._period
+
+    def process(self, bytes_remaining: int, bytes_lost: int, samples: Samples, num_signals: int = 3,
+                read_time: Optional[float] = None) -> List[Union[TimestampedSamples, SampleGap]]:
+        """
+        Timestamp the result of one read out of the measurement buffer.
+
+        :param bytes_remaining: Bytes remaining in the buffer as returned by the read out
+        :param bytes_lost: Bytes lost as returned by the read out
+        :param samples: The samples of the read out, as list of tuples or as Sf06SampleBatch
+        :param num_signals: Number of signals per sample, used to convert bytes to samples
+        :param read_time: Host time when the read out was requested (default: current time of the clock). The time
+            of the request is closer to the moment the cable empties its buffer than the time of the response, which
+            is delayed by the transfer of the samples.
+        :return: The timestamped samples and gaps in the order of the measurement
+        """
+        if read_time is None:
+            read_time = self._clock()
+        sample_size = 2 * num_signals
+        count = len(samples)
+        if bytes_lost:
+            lost = bytes_lost // sample_size
+            self._samples_lost += lost
+            self._pending_gaps.append((self._delivered + count + bytes_remaining // sample_size, lost))
+        pending_lost = sum(lost for _, lost in self._pending_gaps)
+        newest = self._next_index + count + bytes_remaining // sample_size + pending_lost - 1
+        if newest >= 0:
+            self._update_model(newest, read_time)
+        if self._anchor_time is None:
+            return []
+
+        records: List[Union[TimestampedSamples, SampleGap]] = []
+        start = 0
+        while True:
+            gap = self._pending_gaps[0] if self._pending_gaps else None
+            end = count if gap is None else min(count, gap[0] - self._delivered + start)
+            if end > start:
+                records.append(self._timestamped(samples, start, end))
+                self._delivered += end - start
+                start = end
+            if gap is None or gap[0] != self._delivered:
+                break
+            self._pending_gaps.pop(0)
+            records.append(SampleGap(self._next_index, self.timestamp(self._next_index), gap[1]))
+            self._next_index += gap[1]
+        return records
+
+    def _update_model(self, newest: int, read_time: float) -> None:
+        expected = read_time - self._period / 2.0
+        if self._anchor_time is None:
+            self._anchor_time, self._anchor_index = expected, newest
+            return
+        predicted = self.timestamp(newest)
+        error = expected - predicted
+        produced = newest - self._anchor_index
+        if produced > 0:
+            period = self._period + self._drift_gain * error / produced
+            limit = self._nominal_period * self._max_drift
+            self._period = min(max(period, self._nominal_period - limit), self._nominal_period + limit)
+        if error < -self._period / 2.0:
+            # the newest sample would lie after the read out: the read out was not delayed, correct fully
+            self._anchor_time = expected
+        else:
+            self._anchor_time = predicted + self._offset_gain * error
+        self._anchor_index = newest
+
+    def _timestamped(self, samples: Samples, start: int, end: int) -> TimestampedSamples:
+        first = self._next_index
+        t0, period = self.timestamp(first), self._period
+        timestamps = array('d', (t0 + i * period for i in range(end - start)))
+        if isinstance(samples, Sf06SampleBatch):
+            n = samples.num_signals
+            part: Samples = samples if start == 0 and end == len(samples) else \
+                Sf06SampleBatch(samples.values[start * n:end * n], n)
+        else:
+            part = samples[start:end]
+        self._next_index += end - start
+        return TimestampedSamples(first, timestamps, part)
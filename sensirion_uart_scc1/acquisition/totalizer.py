@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+
+from array import array
+from itertools import accumulate, islice
+from typing import Any, List, Optional, Sequence, Tuple, Union
+
+from sensirion_uart_scc1.drivers.scc1_sf06 import Scc1Sf06
+from sensirion_uart_scc1.drivers.sf06_sample_batch import Sf06SampleBatch
+from sensirion_uart_scc1.drivers.slf_common import FLOW_UNIT_TIME_BASE_SECONDS, get_volume_unit_label
+from sensirion_uart_scc1.scc1_exceptions import Scc1InvalidDataReceived, Scc1NotSupportedException
+
+#: Lost samples are linearly interpolated between the samples before and after the gap
+GAP_INTERPOLATE = 'interpolate'
+#: Lost samples are assumed to have the flow of the last sample before the gap
+GAP_HOLD = 'hold'
+#: Lost samples are not totalized
+GAP_IGNORE = 'ignore'
+
+
+class Scc1HostTotalizer:
+    """
+    Totalizes the flow on the host from the samples read out of the measurement buffer.
+
+    Every sample adds its flow times the measurement interval, so the volume is known per sample without polling the
+    firmware totalizator. The volume is given in the volume unit of the flow unit (see get_volume_unit_label).
+
+    Samples lost because the buffer of the cable was full are placed behind the samples that were in the buffer at
+    the time of the read out, as reported by the cable, and are estimated with the gap policy.
+    """
+
+    def __init__(self, scale_factor: int, flow_unit: int, interval_ms: float,
+                 gap_policy: str = GAP_INTERPOLATE) -> None:
+        """
+        Initialize the totalizer.
+
+        :param scale_factor: The flow scale factor reported by the sensor
+        :param flow_unit: The raw flow unit reported by the sensor
+        :param interval_ms: The measurement interval configured on the cable in milliseconds
+        :param gap_policy: Estimation of lost samples: GAP_INTERPOLATE, GAP_HOLD or GAP_IGNORE
+        """
+        if not scale_factor:
+            raise ValueError("Scale factor must not be 0")
+        if interval_ms <= 0:
+            raise ValueError("Measurement interval must be positive")
+        if gap_policy not in (GAP_INTERPOLATE, GAP_HOLD, GAP_IGNORE):
+            raise ValueError(f"Unknown gap policy: {gap_policy}")
+        time_base = FLOW_UNIT_TIME_BASE_SECONDS.get((flow_unit >> 4) & 0xF)
+        if time_base is None:
+            raise Scc1NotSupportedException(f"Flow unit 0x{flow_unit:04X} has no time base")
+        self._volume_factor = interval_ms / 1000.0 / time_base / scale_factor
+        self._volume_unit_label = get_volume_unit_label(flow_unit)
+        self._gap_policy = gap_policy
+        self.reset()
+
+    @classmethod
+    def from_sensor(cls, sensor: Scc1Sf06, interval_ms: float, command: Optional[int] = None,
+                    **kwargs: Any) -> 'Scc1HostTotalizer':
+        """
+        Create a totalizer with the scale factor and unit of a sensor.
+
+        :param sensor: The sensor driver
+        :param interval_ms: The measurement interval in milliseconds
+        :param command: The measurement command (default: the command of the current liquid mode)
+        :return: The totalizer
+        """
+        unit_and_scale = sensor.get_flow_unit_and_scale(command)
+        if unit_and_scale is None:
+            raise Scc1InvalidDataReceived("Could not determine the sensor flow unit and scale")
+        scale_factor, flow_unit = unit_and_scale
+        return cls(scale_factor, flow_unit, interval_ms, **kwargs)
+
+    def reset(self) -> None:
+        """Set the volume to zero, e.g. together with the firmware totalizator"""
+        self._raw_sum: float = 0
+        self._last_flow: Optional[int] = None
+        self._delivered = 0
+        self._pending_gaps: List[Tuple[int, int]] = []
+        self._gap_samples = 0
+        self._samples = 0
+        self._samples_estimated = 0
+
+    @property
+    def volume(self) -> float:
+        """The totalized volume in the volume unit"""
+        return self._raw_sum * self._volume_factor
+
+    @property
+    def volume_unit_label(self) -> str:
+        return self._volume_unit_label
+
+    @property
+    def raw_sum(self) -> float:
+        """Sum of the raw flow values, comparable to the value of the firmware totalizator"""
+        return self._raw_sum
+
+    @property
+    def samples(self) -> int:
+        """Number of totalized samples"""
+        return self._samples
+
+    @property
+    def samples_estimated(self) -> int:
+        """Number of lost samples estimated with the gap policy"""
+        return self._samples_estimated
+
+    def process(self, bytes_remaining: int, bytes_lost: int,
+                samples: Union[Sequence[Tuple[int, ...]], Sf06SampleBatch], num_signals: int = 3) -> array:
+        """
+        Totalize the result of one read out of the measurement buffer.
+
+        :param bytes_remaining: Bytes remaining in the buffer as returned by the read out
+        :param bytes_lost: Bytes lost as returned by the read out
+        :param samples: The samples of the read out, as list of tuples or as Sf06SampleBatch
+        :param num_signals: Number of signals per sample, used to convert bytes to samples
+        :return: The totalized volume after every sample
+        """
+        batch = samples if isinstance(samples, Sf06SampleBatch) else Sf06SampleBatch.from_samples(samples, num_signals)
+        sample_size = 2 * num_signals
+        count = len(batch)
+        if bytes_lost:
+            self._pending_gaps.append((self._delivered + count + bytes_remaining // sample_size,
+                                       bytes_lost // sample_size))
+        flow = batch.flow
+        volumes = array('d')
+        start = 0
+        while True:
+            if self._pending_gaps and self._pending_gaps[0][0] <= self._delivered:
+                self._add_gap(self._pending_gaps.pop(0)[1])
+                continue
+            if start >= count:
+                break
+            end = count if not self._pending_gaps else min(count, start + self._pending_gaps[0][0] - self._delivered)
+            self._add_samples(flow[start:end], volumes)
+            self._delivered += end - start
+            start = end
+        return volumes
+
+    def reconcile(self, firmware_value: int) -> float:
+        """
+        Replace the totalized volume with the value of the firmware totalizator.
+
+        The firmware totalizes all samples, lost samples included, so reconciling removes the error of the gap
+        estimation. The firmware value must be read right after a read out that emptied the buffer, and both
+        totalizators must have been reset together.
+
+        :param firmware_value: The value returned by get_totalizator_value
+        :return: The applied correction in the volume unit
+        """
+        if self._gap_samples:
+            # count a pending interpolation with the last flow, the firmware value already contains the gap
+            self._add_gap_estimate(self._gap_samples * (self._last_flow or 0))
+        correction = firmware_value - self._raw_sum
+        self._raw_sum = firmware_value
+        return correction * self._volume_factor
+
+    def _add_gap(self, lost: int) -> None:
+        self._samples_estimated += lost
+        if self._gap_policy == GAP_HOLD:
+            self._raw_sum += lost * (self._last_flow or 0)
+        elif self._gap_policy == GAP_INTERPOLATE:
+            self._gap_samples += lost
+
+    def _add_gap_estimate(self, raw: float) -> None:
+        self._raw_sum += raw
+        self._gap_samples = 0
+
+    def _add_samples(self, flow: array, volumes: array) -> None:
+        if self._gap_samples:
+            before = flow[0] if self._last_flow is None else self._last_flow
+            # mean of the samples interpolated linearly between the samples before and after the gap
+            self._add_gap_estimate(self._gap_samples * (before + flow[0]) / 2.0)
+        factor = self._volume_factor
+        raw_sums = list(accumulate(flow, initial=self._raw_sum))
+        volumes.extend(map(factor.__mul__, islice(raw_sums, 1, None)))
+        self._raw_sum = raw_sums[-1]
+        self._last_flow = flow[-1]
+        self._samples += len(flow)
@@ -0,0 +1,326 @@
+# -*- coding: utf-8 -*-
+
+"""
+Detection of flag edges and signal triggers in the samples read out of the measurement buffer.
+
+The triggers evaluate their condition for a whole batch with builtin functions and search the condition changes
+with bytes.find, so the cost per sample is a few C operations and Python code only runs per event.
+"""
+
+from abc import ABC, abstractmethod
+from array import array
+from functools import partial
+from operator import ge, le, lt, sub
+from typing import Callable, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+from sensirion_uart_scc1.drivers.sf06_sample_batch import Sf06SampleBatch
+
+Samples = Union[Sequence[Tuple[int, ...]], Sf06SampleBatch]
+
+#: Edges of a trigger condition
+EDGE_RISING = 'rising'
+EDGE_FALLING = 'falling'
+EDGE_BOTH = 'both'
+
+#: Signaling flags of SF06 sensors
+AIR_IN_LINE_FLAG = 0x01
+HIGH_FLOW_FLAG = 0x02
+
+
+class TriggerEvent(NamedTuple):
+    """A change of a trigger condition"""
+    trigger: str  #: Name of the trigger
+    index: int  #: Index of the first sample with the new condition
+    edge: str  #: EDGE_RISING if the condition became true, EDGE_FALLING if it became false
+    value: int  #: Raw value of the trigger signal at the event
+
+
+class CapturedWindow(NamedTuple):
+    """The samples around one or more events"""
+    first_index: int  #: Index of the first sample of the window
+    samples: Sf06SampleBatch
+    events: List[TriggerEvent]
+
+
+class TriggerResult(NamedTuple):
+    """Result of processing one batch"""
+    events: List[TriggerEvent]  #: Events found in the batch, ordered by index
+    windows: List[CapturedWindow]  #: Windows completed by the batch
+
+
+class Scc1Trigger(ABC):
+    """
+    Base class of the triggers. A trigger evaluates a condition for every sample and reports its edges.
+    """
+
+    def __init__(self, name: str, signal: int, edge: str = EDGE_RISING, holdoff: int = 0) -> None:
+        """
+        :param name: Name of the trigger, reported in the events
+        :param signal: Index of the signal (0: flow, 1: temperature, 2: flags)
+        :param edge: The reported edges: EDGE_RISING, EDGE_FALLING or EDGE_BOTH
+        :param holdoff: Minimum number of samples between two events, suppresses events of noisy signals
+        """
+        if edge not in (EDGE_RISING, EDGE_FALLING, EDGE_BOTH):
+            raise ValueError(f"Unknown edge: {edge}")
+        self._name = name
+        self._signal = signal
+        self._edge = edge
+        self._holdoff = holdoff
+        self.reset()
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    def reset(self) -> None:
+        """Forget the condition of the previous samples"""
+        self._state = False
+        self._last_value: Optional[int] = None
+        self._last_event: Optional[int] = None
+
+    def process(self, batch: Sf06SampleBatch, first_index: int) -> List[TriggerEvent]:
+        """
+        :param batch: The samples
+        :param first_index: Index of the first sample
+        :return: The events within the batch
+        """
+        if not batch:
+            return []
+        values = batch.column(self._signal)
+        conditions = self._conditions(values)
+        edges: List[Tuple[int, str]] = []
+        sequence = (b'\x01' if self._state else b'\x00') + conditions
+        if self._edge != EDGE_FALLING:
+            edges.extend((p, EDGE_RISING) for p in self._find(sequence, b'\x00\x01'))
+        if self._edge != EDGE_RISING:
+            edges.extend((p, EDGE_FALLING) for p in self._find(sequence, b'\x01\x00'))
+        self._state = bool(conditions[-1])
+        self._last_value = values[-1]
+        events = []
+        for position, edge in sorted(edges):
+            index = first_index + position
+            if self._last_event is not None and index - self._last_event < self._holdoff:
+                continue
+            self._last_event = index
+            events.append(TriggerEvent(self._name, index, edge, values[position]))
+        return events
+
+    @abstractmethod
+    def _conditions(self, values: array) -> bytes:
+        """
+        :return: One byte per sample, 1 if the condition is true
+        """
+
+    @staticmethod
+    def _find(sequence: bytes, pattern: bytes) -> List[int]:
+        positions = []
+        position = sequence.find(pattern)
+        while position >= 0:
+            positions.append(position)
+            position = sequence.find(pattern, position + 1)
+        return positions
+
+
+class Scc1FlagTrigger(Scc1Trigger):
+    """Triggers on the signaling flags, e.g. air in line"""
+
+    def __init__(self, name: str, mask: int, edge: str = EDGE_RISING, holdoff: int = 0) -> None:
+        """
+        :param name: Name of the trigger
+        :param mask: The flag bits, the condition is true if any of them is set
+        :param edge: The reported edges
+        :param holdoff: Minimum number of samples between two events
+        """
+        super().__init__(name, 2, edge, holdoff)
+        self._mask = mask
+
+    @classmethod
+    def air_in_line(cls, edge: str = EDGE_BOTH, holdoff: int = 0) -> 'Scc1FlagTrigger':
+        return cls('air_in_line', AIR_IN_LINE_FLAG, edge, holdoff)
+
+    @classmethod
+    def high_flow(cls, edge: str = EDGE_BOTH, holdoff: int = 0) -> 'Scc1FlagTrigger':
+        return cls('high_flow', HIGH_FLOW_FLAG, edge, holdoff)
+
+    def _conditions(self, values: array) -> bytes:
+        return bytes(map(bool, map(self._mask.__and__, values)))
+
+
+class Scc1ThresholdTrigger(Scc1Trigger):
+    """Triggers when a signal crosses a threshold, rising edges are crossings from below"""
+
+    def __init__(self, name: str, threshold: float, signal: int = 0, edge: str = EDGE_RISING,
+                 holdoff: int = 0) -> None:
+        """
+        :param name: Name of the trigger
+        :param threshold: The threshold in raw signal units, the condition is true above the threshold
+        :param signal: Index of the signal (0: flow, 1: temperature)
+        :param edge: The reported edges
+        :param holdoff: Minimum number of samples between two events
+        """
+        super().__init__(name, signal, edge, holdoff)
+        self._above = partial(lt, threshold)
+
+    def _conditions(self, values: array) -> bytes:
+        return bytes(map(self._above, values))
+
+
+class Scc1SlopeTrigger(Scc1Trigger):
+    """Triggers when a signal changes by at least the given slope from one sample to the next"""
+
+    def __init__(self, name: str, slope: float, signal: int = 0, holdoff: int = 0) -> None:
+        """
+        :param name: Name of the trigger
+        :param slope: Change per sample in raw signal units. Positive slopes trigger on increases, negative slopes
+            on decreases.
+        :param signal: Index of the signal (0: flow, 1: temperature)
+        :param holdoff: Minimum number of samples between two events
+        """
+        if not slope:
+            raise ValueError("Slope must not be 0")
+        super().__init__(name, signal, EDGE_RISING, holdoff)
+        self._steep = partial(le, slope) if slope > 0 else partial(ge, slope)
+
+    def _conditions(self, values: array) -> bytes:
+        previous = array(values.typecode, [values[0] if self._last_value is None else self._last_value])
+        previous.extend(values[:-1])
+        return bytes(map(self._steep, map(sub, values, previous)))
+
+
+class _OpenWindow:
+    __slots__ = ('start', 'end', 'filled', 'data', 'events')
+
+    def __init__(self, start: int, end: int, event: TriggerEvent) -> None:
+        self.start = start
+        self.end = end
+        self.filled = start
+        self.data = array('h')
+        self.events = [event]
+
+
+class Scc1TriggerEngine:
+    """
+    Evaluates triggers on the samples read out of the measurement buffer and captures the samples around the events.
+
+    The engine keeps the last pre_samples samples, so a captured window starts pre_samples before its event and ends
+    post_samples after it. Windows of events that are closer together are merged. Samples outside of the windows are
+    discarded, only the windows have to be persisted.
+
+    Usage::
+
+        engine = Scc1TriggerEngine([Scc1FlagTrigger.air_in_line(), Scc1ThresholdTrigger('high', 5000)],
+                                   pre_samples=500, post_samples=1000, on_window=store)
+        while running:
+            engine.process(sensor.read_extended_buffer_batch()[2])
+    """
+
+    def __init__(self, triggers: Sequence[Scc1Trigger], pre_samples: int = 0, post_samples: int = 0,
+                 num_signals: int = 3, on_event: Optional[Callable[[TriggerEvent], None]] = None,
+                 on_window: Optional[Callable[[CapturedWindow], None]] = None) -> None:
+        """
+        Initialize the engine.
+
+        :param triggers: The evaluated triggers
+        :param pre_samples: Number of samples captured before an event
+        :param post_samples: Number of samples captured after an event
+        :param num_signals: Number of signals per sample
+        :param on_event: Called for every event
+        :param on_window: Called for every completed window
+        """
+        if pre_samples < 0 or post_samples < 0:
+            raise ValueError("Number of samples must not be negative")
+        self._triggers = list(triggers)
+        self._pre = pre_samples
+        self._post = post_samples
+        self._num_signals = num_signals
+        self._on_event = on_event
+        self._on_window = on_window
+        self._history = array('h')
+        self._next_index = 0
+        self._window: Optional[_OpenWindow] = None
+
+    def reset(self) -> None:
+        """Discard the history and the open window, e.g. when the measurement is restarted"""
+        for trigger in self._triggers:
+            trigger.reset()
+        self._history = array('h')
+        self._next_index = 0
+        self._window = None
+
+    def process(self, samples: Samples, first_index: Optional[int] = None) -> TriggerResult:
+        """
+        Evaluate the triggers on samples in the order of the measurement.
+
+        :param samples: The samples as list of tuples or as Sf06SampleBatch
+        :param first_index: Index of the first sample since the start of the measurement, e.g. from
+            TimestampedSamples (default: directly after the previous samples). After lost samples, the history is
+            discarded and an open window is completed early.
+        :return: The events and the completed windows
+        """
+        batch = samples if isinstance(samples, Sf06SampleBatch) else \
+            Sf06SampleBatch.from_samples(samples, self._num_signals)
+        if batch.num_signals != self._num_signals:
+            raise ValueError(f"Expected {self._num_signals} signals per sample")
+        if first_index is None:
+            first_index = self._next_index
+        elif first_index < self._next_index:
+            raise ValueError("Samples must be passed in the order of the measurement")
+        windows: List[CapturedWindow] = []
+        if first_index > self._next_index:
+            self._history = array('h')
+            if self._window is not None:
+                windows.append(self._close_window())
+        events = sorted((e for trigger in self._triggers for e in trigger.process(batch, first_index)),
+                        key=lambda e: e.index)
+        n = self._num_signals
+        end_index = first_index + len(batch)
+        if events or self._window is not None:
+            source = self._history + batch.values
+            source_start = first_index - len(self._history) // n
+            for event in events:
+                if self._on_event is not None:
+                    self._on_event(event)
+                if self._window is not None and event.index - self._pre <= self._window.end:
+                    self._window.end = max(self._window.end, event.index + self._post + 1)
+                    self._window.events.append(event)
+                    continue
+                if self._window is not None:
+                    self._fill_window(source, source_start, end_index)
+                    windows.append(self._close_window())
+                self._window = _OpenWindow(max(event.index - self._pre, source_start), event.index + self._post + 1,
+                                           event)
+            self._fill_window(source, source_start, end_index)
+            if self._window.filled >= self._window.end:
+                windows.append(self._close_window())
+        if self._pre:
+            values = batch.values
+            keep = self._pre * n
+            self._history = values[-keep:] if len(values) >= keep else (self._history + values)[-keep:]
+        self._next_index = end_index
+        if self._on_window is not None:
+            for window in windows:
+                self._on_window(window)
+        return TriggerResult(events, windows)
+
+    def flush(self) -> List[CapturedWindow]:
+        """
+        :return: The open window, completed early, e.g. at the end of the measurement
+        """
+        if self._window is None:
+            return []
+        window = self._close_window()
+        if self._on_window is not None:
+            self._on_window(window)
+        return [window]
+
+    def _fill_window(self, source: array, source_start: int, end_index: int) -> None:
+        window, n = self._window, self._num_signals
+        stop = min(window.end, end_index)
+        if stop > window.filled:
+            window.data.extend(source[(window.filled - source_start) * n:(stop - source_start) * n])
+            window.filled = stop
+
+    def _close_window(self) -> CapturedWindow:
+        window = self._window
+        self._window = None
+        return CapturedWindow(window.start, Sf06SampleBatch(window.data, self._num_signals), window.events)
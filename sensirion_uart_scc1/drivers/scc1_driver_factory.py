@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+
+import logging
+from struct import unpack
+from typing import Dict, Optional, Tuple, Type
+
+from sensirion_shdlc_driver.command import ShdlcCommand
+from sensirion_shdlc_driver.errors import ShdlcDeviceError
+
+from sensirion_uart_scc1.drivers.scc1_ld20 import Scc1Ld20
+from sensirion_uart_scc1.drivers.scc1_sf06 import Scc1Sf06
+from sensirion_uart_scc1.drivers.scc1_slf3x import Scc1Slf3x
+from sensirion_uart_scc1.drivers.slf_common import SLF_PRODUCT_LIQUI_MAP, SlfMode, SlfProduct
+from sensirion_uart_scc1.scc1_exceptions import Scc1NotSupportedException
+from sensirion_uart_scc1.scc1_shdlc_device import Scc1ShdlcDevice
+
+log = logging.getLogger(__name__)
+
+#: Driver class for every product family
+DRIVER_CLASSES: Dict[SlfProduct, Type[Scc1Sf06]] = {
+    SlfProduct.SLF3x: Scc1Slf3x,
+    SlfProduct.LD20: Scc1Ld20,
+    SlfProduct.SF06: Scc1Sf06,
+}
+
+Identity = Tuple[Optional[int], Optional[int]]
+
+
+def _read_configuration(device: Scc1ShdlcDevice) -> Tuple[Optional[int], Optional[int], Optional[Identity]]:
+    """
+    :return: Configured sensor type, interval of a running continuous measurement and the sensor identity (None if
+        it could not be read)
+    """
+    try:
+        sensor_type, interval, product = device.execute_pipelined([
+            ShdlcCommand(id=0x24, data=[], max_response_time=0.025),
+            ShdlcCommand(id=0x33, data=[], max_response_time=0.01),
+            ShdlcCommand(id=0x50, data=[], max_response_time=0.01),
+        ])
+    except ShdlcDeviceError:
+        # the product cannot be read from a misconfigured or busy sensor, read the configuration alone
+        return device.get_sensor_type(), device.get_continuous_measurement_status(), None
+    sensor_type = int(sensor_type[0]) if sensor_type else None
+    interval = int(unpack('>H', interval)[0]) if interval else None
+    # the product is only meaningful if it was read with the sensor type of the SF06 protocol
+    identity = Scc1Sf06.parse_serial_number_and_product_id(product) \
+        if sensor_type == Scc1Sf06.SENSOR_TYPE and interval is None else None
+    return sensor_type, interval, identity
+
+
+def _read_identity(device: Scc1ShdlcDevice) -> Identity:
+    try:
+        return Scc1Sf06.parse_serial_number_and_product_id(device.transceive(0x50, [], 0.01))
+    except ShdlcDeviceError:
+        return None, None
+
+
+def create_sensor_driver(device: Scc1ShdlcDevice, liquid_mode: Optional[SlfMode] = None) -> Scc1Sf06:
+    """
+    Detect the sensor attached to the cable and create the matching driver.
+
+    The configuration of the cable and the sensor product are read with execute_pipelined. The continuous
+    measurement is only stopped if it is running, the sensor type is only written if it differs, and the sensor is
+    only reset if its product can not be read otherwise. A correctly configured, idle cable is therefore detected
+    with three commands, in a single round trip if the device was created with pipelined=True.
+
+    Usage::
+
+        sensor = create_sensor_driver(Scc1ShdlcDevice(ShdlcConnection(port)))
+        print(SlfProductName.from_product_id(sensor.product_id))
+
+    :param device: The Scc1 device the sensor is attached to
+    :param liquid_mode: The liquid that is measured (default: first liquid supported by the product)
+    :return: The driver for the detected product, with its identity already loaded
+    """
+    sensor_type, interval, identity = _read_configuration(device)
+    if interval is not None:
+        log.debug("Stopping running continuous measurement (%d ms) of %s", interval, device)
+        device.transceive(0x34, [], 0.01)
+        identity = None
+    if sensor_type != Scc1Sf06.SENSOR_TYPE:
+        log.debug("Configuring sensor type %d (was %s) on %s", Scc1Sf06.SENSOR_TYPE, sensor_type, device)
+        device.set_sensor_type(Scc1Sf06.SENSOR_TYPE)
+        identity = None
+    if identity is None or identity[1] is None:
+        identity = _read_identity(device)
+    if identity[1] is None:
+        log.debug("Resetting sensor on %s", device)
+        device.sensor_reset()
+        identity = _read_identity(device)
+    if identity[1] is None:
+        raise Scc1NotSupportedException(f"No sensor detected on {device}")
+
+    product = SlfProduct.from_product_id(identity[1])
+    liquid_config = SLF_PRODUCT_LIQUI_MAP[product]
+    if liquid_mode is None:
+        liquid_mode = liquid_config.supported_liqui_modes[0]
+    elif liquid_mode not in liquid_config.supported_liqui_modes:
+        raise Scc1NotSupportedException(f"Liquid mode {liquid_mode} is not supported by {product.value}")
+    return DRIVER_CLASSES[product](device, liquid_mode, identity)
@@ -4,10 +4,16 @@ import struct
 import time
 from typing import List, Tuple, Optional, Any
 
+from sensirion_uart_scc1.drivers.sf06_sample_batch import Sf06SampleBatch
 from sensirion_uart_scc1.drivers.slf_common import SlfMeasurementCommand, SlfMode, SLF_PRODUCT_LIQUI_MAP, SlfProduct
 from sensirion_uart_scc1.scc1_exceptions import Scc1InvalidDataReceived
 from sensirion_uart_scc1.scc1_shdlc_device import Scc1ShdlcDevice
 
+#: Header of the extended buffer response: bytes lost, bytes remaining, number of signals
+_BUFFER_HEADER = struct.Struct('>IHH')
+#: Decoders for samples with a given number of signals
+_SAMPLE_FORMATS = {3: struct.Struct('>hhh')}
+
 
 class Scc1Sf06:
     """
@@ -17,21 +23,30 @@ class Scc1Sf06:
     SENSOR_TYPE = 3
     START_MEASUREMENT_DELAY_S = 0.015
 
-    def __init__(self, device: Scc1ShdlcDevice, liquid_mode: SlfMode = SlfMode.LIQUI_1) -> None:
+    def __init__(self, device: Scc1ShdlcDevice, liquid_mode: SlfMode = SlfMode.LIQUI_1,
+                 identity: Optional[Tuple[Optional[int], Optional[int]]] = None) -> None:
         """
         Initialize object instance.
 
         :param device: The Scc1 device that provides the access to the sensor.
         :param liquid_mode: The liquid that is measured.
+        :param identity: Serial number and product id of the sensor if already known, read on first access otherwise
         """
         self._scc1 = device
         self._liquid_config = SLF_PRODUCT_LIQUI_MAP[SlfProduct.SF06]
-        self._serial_number, self._product_id = self._get_serial_number_and_product_id()
+        self._identity = identity
         self._is_measuring = False
         self._sampling_interval_ms = 100  # Default 10Hz
         self._liquid_mode = liquid_mode
         self._measurement_command = SlfMeasurementCommand.from_mode(self._liquid_mode)
 
+    @property
+    def device(self) -> Scc1ShdlcDevice:
+        """
+        The Scc1 device the sensor is attached to
+        """
+        return self._scc1
+
     @property
     def serial_number(self) -> Optional[int]:
         """
@@ -39,7 +54,7 @@ class Scc1Sf06:
 
         :return: The serial number as integer
         """
-        return self._serial_number
+        return self._get_identity()[0]
 
     @property
     def product_id(self) -> Optional[int]:
@@ -48,7 +63,7 @@ class Scc1Sf06:
 
         :return: The product identifier as integer
         """
-        return self._product_id
+        return self._get_identity()[1]
 
     @property
     def liquid_mode(self) -> SlfMode:
@@ -118,7 +133,7 @@ class Scc1Sf06:
 
         :return: The sensor serial number
         """
-        return self._serial_number
+        return self._get_identity()[0]
 
     def get_flow_unit_and_scale(self, command: Optional[int] = None) -> Optional[Tuple[int, int]]:
         """
@@ -131,6 +146,19 @@ class Scc1Sf06:
         """
         if command is None:
             command = self._measurement_command
+        if self._scc1.metadata_cache is None:
+            # the identity is only needed as key of the cache
+            return self._read_flow_unit_and_scale(command)
+        # the identity is taken from the cache as well, so a cached value does not need any command
+        product_id, serial_number = self.product_id, self.serial_number
+        if product_id is None:
+            return self._read_flow_unit_and_scale(command)
+        result = self._scc1.get_cached_metadata(f'{product_id:08X}:{serial_number:X}',
+                                                f'flow_unit_and_scale/0x{int(command):04X}',
+                                                lambda: self._read_flow_unit_and_scale(command))
+        return None if result is None else (result[0], result[1])
+
+    def _read_flow_unit_and_scale(self, command: int) -> Optional[Tuple[int, int]]:
         args = list(struct.pack('>h', command))
         data = self._scc1.transceive(0x53, args, 0.01)
         if len(data) != 6:
@@ -183,20 +211,69 @@ class Scc1Sf06:
         data = self._scc1.transceive(0x36, [self.SENSOR_TYPE], 0.01)
         if not data:
             return 0, 0, []
-        bytes_lost = int(struct.unpack('>I', data[:4])[0])
-        bytes_remaining = int(struct.unpack('>H', data[4:6])[0])
-        num_signals = struct.unpack('>H', data[6:8])[0]
+        bytes_lost, bytes_remaining, num_signals = _BUFFER_HEADER.unpack_from(data)
+        payload = memoryview(data)[_BUFFER_HEADER.size:]
         # For SF06, signals are typically i16
-        num_packets = int(len(data[8:]) / 2 / num_signals)
-        buffer = list(struct.unpack(">" + "h" * (num_packets * num_signals), data[8:]))
-
-        if len(buffer) % num_signals != 0:
+        if num_signals == 0 or len(payload) % (2 * num_signals) != 0:
             raise Scc1InvalidDataReceived("Received unexpected amount of data")
+        sample_format = _SAMPLE_FORMATS.get(num_signals)
+        if sample_format is None:
+            sample_format = _SAMPLE_FORMATS.setdefault(num_signals, struct.Struct('>' + 'h' * num_signals))
+        samples = list(sample_format.iter_unpack(payload))
+        metrics = self._scc1.metrics
+        if metrics is not None:
+            metrics.record_buffer_read(len(samples), bytes_lost)
+        return bytes_remaining, bytes_lost, samples
+
+    def read_extended_buffer_batch(self) -> Tuple[int, int, Sf06SampleBatch]:
+        """
+        Read out measurement buffer for SF06 into a compact batch.
 
-        num_samples = len(buffer) // num_signals
-        out = [tuple(buffer[i * num_signals:(i + 1) * num_signals])
-               for i in range(num_samples)]
-        return bytes_remaining, bytes_lost, out
+        In contrast to read_extended_buffer, the samples are decoded into a single array. Sample tuples are only
+        created when the batch is iterated.
+
+        :return: A tuple with (bytes_remaining, bytes_lost, batch)
+        """
+        data = self._scc1.transceive(0x36, [self.SENSOR_TYPE], 0.01)
+        if not data:
+            return 0, 0, Sf06SampleBatch.empty()
+        bytes_lost, bytes_remaining, num_signals = _BUFFER_HEADER.unpack_from(data)
+        batch = Sf06SampleBatch.from_buffer(memoryview(data)[_BUFFER_HEADER.size:], num_signals)
+        metrics = self._scc1.metrics
+        if metrics is not None:
+            metrics.record_buffer_read(len(batch), bytes_lost)
+        return bytes_remaining, bytes_lost, batch
+
+    def drain_buffer(self, max_reads: int = 64) -> Tuple[int, int, List[Tuple[Any, ...]]]:
+        """
+        Read out the measurement buffer until it is empty.
+
+        The buffer is read with read_extended_buffer until bytes_remaining is 0 or max_reads is reached. The result
+        list is preallocated from the number of bytes remaining reported by the first read.
+
+        :param max_reads: Maximum number of buffer reads, limits the time spent when the buffer fills faster than it
+            can be read.
+        :return: A tuple with (bytes_remaining, bytes_lost, data)
+        """
+        remaining, bytes_lost, data = self.read_extended_buffer()
+        if not data:
+            return remaining, bytes_lost, []
+        sample_size = 2 * len(data[0])
+        batch: List[Any] = [None] * (len(data) + remaining // sample_size)
+        count = len(data)
+        batch[:count] = data
+        reads = 1
+        while remaining > 0 and reads < max_reads:
+            remaining, lost, data = self.read_extended_buffer()
+            bytes_lost += lost
+            reads += 1
+            end = count + len(data)
+            if end > len(batch):
+                batch.extend([None] * (end - len(batch) + remaining // sample_size))
+            batch[count:end] = data
+            count = end
+        del batch[count:]
+        return remaining, bytes_lost, batch
 
     def get_totalizator_status(self) -> Optional[bool]:
         """
@@ -244,14 +321,44 @@ class Scc1Sf06:
         """
         return self._scc1.get_continuous_measurement_status()
 
+    def _get_identity(self) -> Tuple[Optional[int], Optional[int]]:
+        """
+        :return: The sensor serial number and product id, taken from the metadata cache or read from the cable on
+            first access
+        """
+        if self._identity is None:
+            if self._scc1.metadata_cache is None:
+                self._identity = self._get_serial_number_and_product_id()
+            else:
+                identity = self._scc1.get_cached_metadata(f'sensor_type/{self.SENSOR_TYPE}', 'identity',
+                                                          self._read_known_identity)
+                self._identity = (None, None) if identity is None else (identity[0], identity[1])
+        return self._identity
+
+    def _read_known_identity(self) -> Optional[Tuple[int, int]]:
+        """
+        :return: The sensor serial number and product id, None if the product is unknown
+        """
+        serial_number, product_id = self._get_serial_number_and_product_id()
+        if serial_number is None or product_id is None:
+            return None
+        return serial_number, product_id
+
     def _get_serial_number_and_product_id(self) -> Tuple[Optional[int], Optional[int]]:
         """
         :return: The sensor serial number and product id as tuple
         """
-        data = self._scc1.transceive(0x50, [], 0.01)
+        return self.parse_serial_number_and_product_id(self._scc1.transceive(0x50, [], 0.01))
+
+    @staticmethod
+    def parse_serial_number_and_product_id(data: bytes) -> Tuple[Optional[int], Optional[int]]:
+        """
+        :param data: The response of the sensor product command (0x50)
+        :return: The sensor serial number and product id as tuple
+        """
         if not data:
             return None, None
-        data = data.rstrip(b'\x00').decode('utf-8')
-        product_id = int(data[:8], 16)
-        serial_number = int(data[8:], 16)
+        text = data.rstrip(b'\x00').decode('utf-8')
+        product_id = int(text[:8], 16)
+        serial_number = int(text[8:], 16)
         return serial_number, product_id
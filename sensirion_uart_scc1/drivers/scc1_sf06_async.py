@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+from typing import Any, AsyncGenerator, AsyncIterator, List, Optional, Tuple, Type
+
+from sensirion_uart_scc1.drivers.scc1_sf06 import Scc1Sf06
+from sensirion_uart_scc1.drivers.sf06_sample_batch import Sf06SampleBatch
+from sensirion_uart_scc1.drivers.slf_common import SlfMode
+from sensirion_uart_scc1.scc1_async_device import AsyncScc1ShdlcDevice
+
+
+class AsyncSf06Stream:
+    """
+    Async iterator over the batches of the continuous measurement, returned by AsyncScc1Sf06.stream.
+
+    Used as async context manager, the measurement is stopped when the block is left, also if the iteration was left
+    early with break. Without context manager, aclose must be awaited after leaving the iteration early, otherwise
+    the measurement keeps running until the stream is garbage collected.
+    """
+
+    def __init__(self, batches: AsyncGenerator[Sf06SampleBatch, None]) -> None:
+        self._batches = batches
+
+    def __aiter__(self) -> 'AsyncSf06Stream':
+        return self
+
+    async def __anext__(self) -> Sf06SampleBatch:
+        return await self._batches.__anext__()
+
+    async def __aenter__(self) -> 'AsyncSf06Stream':
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Stop the measurement if it was started"""
+        await self._batches.aclose()
+
+
+class AsyncScc1Sf06:
+    """
+    asyncio counterpart of the Scc1Sf06 driver.
+
+    All commands are executed through the AsyncScc1ShdlcDevice, so they are serialized with the other commands sent
+    to the same cable.
+
+    Usage::
+
+        sensor = await AsyncScc1Sf06.create(async_device)
+        async with sensor.stream(interval_ms=2) as batches:
+            async for batch in batches:
+                ...
+    """
+
+    def __init__(self, device: AsyncScc1ShdlcDevice, sensor: Scc1Sf06) -> None:
+        """
+        Wrap an existing sensor driver.
+
+        :param device: The async device of the cable the sensor is attached to
+        :param sensor: The synchronous sensor driver using the same cable
+        """
+        self._device = device
+        self._sensor = sensor
+        self._bytes_lost = 0
+
+    @classmethod
+    async def create(cls, device: AsyncScc1ShdlcDevice, liquid_mode: SlfMode = SlfMode.LIQUI_1,
+                     driver_class: Type[Scc1Sf06] = Scc1Sf06) -> 'AsyncScc1Sf06':
+        """
+        Create the sensor driver and read its identity without blocking the event loop.
+
+        :param device: The async device of the cable
+        :param liquid_mode: The liquid that is measured
+        :param driver_class: The synchronous driver class, e.g. Scc1Slf3x
+        :return: The async sensor driver
+        """
+        sensor = await device.run(driver_class, device.device, liquid_mode)
+        await device.run(sensor.get_serial_number)
+        return cls(device, sensor)
+
+    @property
+    def sensor(self) -> Scc1Sf06:
+        """The wrapped synchronous driver. Do not use it concurrently to the async methods."""
+        return self._sensor
+
+    @property
+    def bytes_lost(self) -> int:
+        """Number of bytes reported as lost while iterating over stream"""
+        return self._bytes_lost
+
+    @property
+    def serial_number(self) -> Optional[int]:
+        return self._sensor.serial_number
+
+    @property
+    def product_id(self) -> Optional[int]:
+        return self._sensor.product_id
+
+    async def get_flow_unit_and_scale(self, command: Optional[int] = None) -> Optional[Tuple[int, int]]:
+        return await self._device.run(self._sensor.get_flow_unit_and_scale, command)
+
+    async def get_last_measurement(self) -> Optional[Tuple[int, int, int]]:
+        return await self._device.run(self._sensor.get_last_measurement)
+
+    async def start_continuous_measurement(self, interval_ms: int = 0) -> None:
+        await self._device.run(self._sensor.start_continuous_measurement, interval_ms)
+
+    async def stop_continuous_measurement(self) -> None:
+        await self._device.run(self._sensor.stop_continuous_measurement)
+
+    async def read_extended_buffer(self) -> Tuple[int, int, List[Tuple[Any, ...]]]:
+        """
+        Read out the measurement buffer.
+
+        :return: A tuple with (bytes_remaining, bytes_lost, data)
+        """
+        return await self._device.run(self._sensor.read_extended_buffer)
+
+    async def read_extended_buffer_batch(self) -> Tuple[int, int, Sf06SampleBatch]:
+        """
+        Read out the measurement buffer into a compact batch.
+
+        :return: A tuple with (bytes_remaining, bytes_lost, batch)
+        """
+        return await self._device.run(self._sensor.read_extended_buffer_batch)
+
+    async def get_totalizator_value(self) -> Optional[int]:
+        return await self._device.run(self._sensor.get_totalizator_value)
+
+    async def get_sensor_status(self) -> Optional[int]:
+        return await self._device.run(self._sensor.get_sensor_status)
+
+    def stream(self, interval_ms: int = 0, poll_interval: float = 0.002) -> AsyncSf06Stream:
+        """
+        Start the continuous measurement and iterate over the read out batches.
+
+        The measurement is started with the first iteration and stopped when the stream is closed, see
+        AsyncSf06Stream.
+
+        :param interval_ms: The measurement interval in milliseconds
+        :param poll_interval: Time in seconds to wait after the buffer of the cable was found empty
+        :return: An async iterator over non-empty batches, to be used as async context manager
+        """
+        return AsyncSf06Stream(self._stream(interval_ms, poll_interval))
+
+    async def _stream(self, interval_ms: int, poll_interval: float) -> AsyncIterator[Sf06SampleBatch]:
+        await self.start_continuous_measurement(interval_ms)
+        try:
+            while True:
+                remaining, lost, batch = await self.read_extended_buffer_batch()
+                self._bytes_lost += lost
+                if batch:
+                    yield batch
+                if remaining == 0:
+                    await asyncio.sleep(poll_interval)
+        finally:
+            await self.stop_continuous_measurement()
@@ -1,5 +1,7 @@
 # -*- coding: utf-8 -*-
 
+from typing import Optional, Tuple
+
 from sensirion_uart_scc1.drivers.scc1_sf06 import Scc1Sf06
 from sensirion_uart_scc1.drivers.slf_common import SlfMode, SLF_PRODUCT_LIQUI_MAP, SlfProduct
 from sensirion_uart_scc1.scc1_shdlc_device import Scc1ShdlcDevice
@@ -15,12 +17,14 @@ class Scc1Slf3x(Scc1Sf06):
     SENSOR_TYPE = 3  #: Sensor type for SLF3x
     START_MEASUREMENT_DELAY_S = 0.015
 
-    def __init__(self, device: Scc1ShdlcDevice, liquid_mode: SlfMode = SlfMode.LIQUI_1) -> None:
+    def __init__(self, device: Scc1ShdlcDevice, liquid_mode: SlfMode = SlfMode.LIQUI_1,
+                 identity: Optional[Tuple[Optional[int], Optional[int]]] = None) -> None:
         """
         Initialize object instance.
 
         :param device: The Scc1 device that provides the access to the sensor.
         :param liquid_mode: The liquid that is measured.
+        :param identity: Serial number and product id of the sensor if already known, read on first access otherwise
         """
-        super().__init__(device, liquid_mode)
+        super().__init__(device, liquid_mode, identity)
         self._liquid_config = SLF_PRODUCT_LIQUI_MAP[SlfProduct.SLF3x]
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+
+import sys
+from array import array
+from itertools import chain
+from typing import Any, Iterator, List, Sequence, Tuple, Union
+
+from sensirion_uart_scc1.scc1_exceptions import Scc1InvalidDataReceived, Scc1NotSupportedException
+
+#: Names of the first signals delivered by SF06 sensors
+SF06_SIGNAL_NAMES = ('flow', 'temperature', 'flags')
+
+
+class Sf06SampleBatch:
+    """
+    Compact representation of the samples returned by one read out of the measurement buffer.
+
+    All signals are stored interleaved in one array of signed 16-bit integers. Sample tuples are only created when
+    the batch is indexed or iterated, the columns can be accessed without creating per-sample objects.
+    """
+
+    __slots__ = ('_values', '_num_signals')
+
+    def __init__(self, values: array, num_signals: int) -> None:
+        """
+        :param values: Interleaved signed 16-bit values in native byte order
+        :param num_signals: Number of signals per sample
+        """
+        if num_signals <= 0 or len(values) % num_signals != 0:
+            raise Scc1InvalidDataReceived("Received unexpected amount of data")
+        self._values = values
+        self._num_signals = num_signals
+
+    @classmethod
+    def from_buffer(cls, data: Union[bytes, bytearray, memoryview], num_signals: int) -> 'Sf06SampleBatch':
+        """
+        Decode big-endian sample data as received from the cable.
+
+        :param data: The sample data without the buffer header
+        :param num_signals: Number of signals per sample
+        :return: The decoded batch
+        """
+        if num_signals <= 0 or len(data) % (2 * num_signals) != 0:
+            raise Scc1InvalidDataReceived("Received unexpected amount of data")
+        values = array('h')
+        values.frombytes(data)
+        if sys.byteorder == 'little':
+            values.byteswap()
+        return cls(values, num_signals)
+
+    @classmethod
+    def from_samples(cls, samples: Sequence[Tuple[int, ...]], num_signals: int = 3) -> 'Sf06SampleBatch':
+        """
+        Create a batch from sample tuples as returned by read_extended_buffer.
+
+        :param samples: The samples
+        :param num_signals: Number of signals per sample, used if samples is empty
+        :return: The batch
+        """
+        if samples:
+            num_signals = len(samples[0])
+        return cls(array('h', chain.from_iterable(samples)), num_signals)
+
+    @classmethod
+    def empty(cls, num_signals: int = 3) -> 'Sf06SampleBatch':
+        return cls(array('h'), num_signals)
+
+    def __len__(self) -> int:
+        return len(self._values) // self._num_signals
+
+    def __bool__(self) -> bool:
+        return len(self._values) > 0
+
+    def __getitem__(self, index: int) -> Tuple[int, ...]:
+        n = self._num_signals
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("Sample index out of range")
+        return tuple(self._values[index * n:(index + 1) * n])
+
+    def __iter__(self) -> Iterator[Tuple[int, ...]]:
+        n = self._num_signals
+        values = self._values
+        for start in range(0, len(values), n):
+            yield tuple(values[start:start + n])
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, Sf06SampleBatch):
+            return self._num_signals == other._num_signals and self._values == other._values
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}(samples={len(self)}, num_signals={self._num_signals})'
+
+    @property
+    def num_signals(self) -> int:
+        return self._num_signals
+
+    @property
+    def values(self) -> array:
+        """The interleaved values of all signals"""
+        return self._values
+
+    def column(self, index: int) -> array:
+        """
+        :param index: The index of the signal (0: flow, 1: temperature, 2: flags, ...)
+        :return: All values of one signal
+        """
+        if not 0 <= index < self._num_signals:
+            raise IndexError("Signal index out of range")
+        return self._values[index::self._num_signals]
+
+    @property
+    def flow(self) -> array:
+        """Raw flow values"""
+        return self.column(0)
+
+    @property
+    def temperature(self) -> array:
+        """Raw temperature values"""
+        return self.column(1)
+
+    @property
+    def flags(self) -> array:
+        """Signaling flags as unsigned 16-bit values"""
+        return array('H', self.column(2).tobytes())
+
+    def to_list(self) -> List[Tuple[int, ...]]:
+        """
+        :return: The samples as list of tuples, as returned by read_extended_buffer
+        """
+        return list(self)
+
+    def to_numpy(self) -> Any:
+        """
+        Create a NumPy structured array that shares the memory with this batch.
+
+        The fields are named flow, temperature and flags, further signals are named signal_3, signal_4, ...
+
+        :return: A structured numpy array with one record per sample
+        """
+        try:
+            import numpy as np
+        except ImportError as e:
+            raise Scc1NotSupportedException("NumPy is required to convert a batch into a NumPy array") from e
+        fields = [(SF06_SIGNAL_NAMES[i] if i < len(SF06_SIGNAL_NAMES) else f'signal_{i}', 'u2' if i == 2 else 'i2')
+                  for i in range(self._num_signals)]
+        return np.frombuffer(memoryview(self._values), dtype=np.dtype(fields))
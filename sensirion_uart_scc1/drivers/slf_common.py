@@ -7,7 +7,8 @@ from __future__ import annotations
 
 from collections import OrderedDict
 from enum import Enum
-from typing import Optional
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
 
 from sensirion_uart_scc1.scc1_exceptions import Scc1InvalidProductId
 
@@ -81,30 +82,31 @@ class SlfProduct(Enum):
 
     @staticmethod
     def from_product_id(product_id: Optional[int]) -> SlfProduct:
-        # remove last byte of the product id for detection
-        product_id = product_id >> 8
-        if product_id in SLF3x_PRODUCT_IDS:
-            return SlfProduct.SLF3x
-        elif product_id in LD20_2600B_PRODUCT_IDS:
-            return SlfProduct.LD20
-        elif product_id in SF06_PRODUCT_IDS:
-            return SlfProduct.SF06
-        raise Scc1InvalidProductId(product_id)
+        return _product_index_entry(product_id)[0]
 
 
 class SlfProductName:
     @staticmethod
     def from_product_id(product_id: Optional[int]) -> str:
-        # remove last byte of the product id for detection
-        product = SlfProduct.from_product_id(product_id)
-        product_id = product_id >> 8
-        if product is SlfProduct.SLF3x:
-            return SLF3x_PRODUCT_NAME.get(product_id, 'SLF3x')
-        elif product is SlfProduct.LD20:
-            return LD20_PRODUCT_NAME.get(product_id, 'LD20')
-        elif product is SlfProduct.SF06:
-            return SF06_PRODUCT_NAME.get(product_id, 'SF06')
+        return _product_index_entry(product_id)[1]
+
+
+#: Product family and product name by product id without the last byte, precomputed from the name mappings
+PRODUCT_INDEX: Dict[int, Tuple[SlfProduct, str]] = {
+    **{product_id: (SlfProduct.SLF3x, name) for product_id, name in SLF3x_PRODUCT_NAME.items()},
+    **{product_id: (SlfProduct.LD20, name) for product_id, name in LD20_PRODUCT_NAME.items()},
+    **{product_id: (SlfProduct.SF06, name) for product_id, name in SF06_PRODUCT_NAME.items()},
+}
+
+
+def _product_index_entry(product_id: Optional[int]) -> Tuple[SlfProduct, str]:
+    if product_id is None:
         raise Scc1InvalidProductId(product_id)
+    # remove last byte of the product id for detection
+    entry = PRODUCT_INDEX.get(product_id >> 8)
+    if entry is None:
+        raise Scc1InvalidProductId(product_id >> 8)
+    return entry
 
 
 class SlfLiquiConfig(object):
@@ -170,6 +172,42 @@ FLOW_UNIT_VOLUME = {
 }
 
 
+#: Factor of the flow unit prefixes
+FLOW_UNIT_PREFIX_FACTOR = {
+    3: 1e-9,
+    4: 1e-6,
+    5: 1e-3,
+    6: 1e-2,
+    7: 1e-1,
+    8: 1.0,
+    9: 10.0,
+    10: 1e2,
+    11: 1e3,
+    12: 1e6,
+    13: 1e9
+}
+
+#: Duration of the flow unit time bases in seconds
+FLOW_UNIT_TIME_BASE_SECONDS = {
+    1: 1e-6,
+    2: 1e-3,
+    3: 1.0,
+    4: 60.0,
+    5: 3600.0,
+    6: 86400.0
+}
+
+#: Factor and SI unit of the flow unit volumes (norm and standard liters are converted to m3 at their reference
+#: conditions)
+FLOW_UNIT_VOLUME_SI = {
+    0: (1e-3, 'm3'),
+    1: (1e-3, 'm3'),
+    8: (1e-3, 'm3'),
+    9: (1e-3, 'kg'),
+}
+
+
+@lru_cache(maxsize=None)
 def get_flow_unit_label(flow_unit_raw: int) -> str:
     prefix = FLOW_UNIT_PREFIX.get(flow_unit_raw & 0xF, '')
     time_base = FLOW_UNIT_TIME_BASE.get((flow_unit_raw >> 4) & 0xF, '')
@@ -177,7 +215,34 @@ def get_flow_unit_label(flow_unit_raw: int) -> str:
     return f'{prefix}{volume}/{time_base}'
 
 
+@lru_cache(maxsize=None)
 def get_volume_unit_label(flow_unit_raw: int) -> str:
     prefix = FLOW_UNIT_PREFIX.get(flow_unit_raw & 0xF, '')
     volume = FLOW_UNIT_VOLUME.get((flow_unit_raw >> 8) & 0xF, '')
     return f'{prefix}{volume}'
+
+
+@lru_cache(maxsize=None)
+def get_flow_unit_si_factor(flow_unit_raw: int) -> Optional[float]:
+    """
+    Get the factor that converts a flow in the given unit into SI units (m3/s or kg/s).
+
+    :param flow_unit_raw: The raw flow unit as reported by the sensor
+    :return: The conversion factor, None if the unit is not known
+    """
+    prefix = FLOW_UNIT_PREFIX_FACTOR.get(flow_unit_raw & 0xF)
+    time_base = FLOW_UNIT_TIME_BASE_SECONDS.get((flow_unit_raw >> 4) & 0xF)
+    volume = FLOW_UNIT_VOLUME_SI.get((flow_unit_raw >> 8) & 0xF)
+    if prefix is None or time_base is None or volume is None:
+        return None
+    return prefix * volume[0] / time_base
+
+
+@lru_cache(maxsize=None)
+def get_flow_unit_si_label(flow_unit_raw: int) -> str:
+    """
+    :param flow_unit_raw: The raw flow unit as reported by the sensor
+    :return: The SI unit used by get_flow_unit_si_factor
+    """
+    _, unit = FLOW_UNIT_VOLUME_SI.get((flow_unit_raw >> 8) & 0xF, (None, ''))
+    return f'{unit}/s'
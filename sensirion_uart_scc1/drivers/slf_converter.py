@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+
+from array import array
+from typing import Any, NamedTuple, Optional, Sequence, Tuple, Union
+
+from sensirion_uart_scc1.drivers.scc1_sf06 import Scc1Sf06
+from sensirion_uart_scc1.drivers.sf06_sample_batch import Sf06SampleBatch
+from sensirion_uart_scc1.drivers.slf_common import get_flow_unit_label, get_flow_unit_si_factor, \
+    get_flow_unit_si_label
+from sensirion_uart_scc1.scc1_exceptions import Scc1InvalidDataReceived, Scc1NotSupportedException
+
+
+class SlfConvertedSamples(NamedTuple):
+    """Physical values of a batch of samples, one column per signal"""
+    flow: Any
+    temperature: Any
+    air_in_line: Any
+    high_flow: Any
+
+
+class SlfSignalConverter:
+    """
+    Converts batches of raw SF06/SLF3x/LD20 samples into physical values.
+
+    The scale factor and the unit are resolved once when the converter is created. The conversion works on whole
+    columns of a batch. Without NumPy the columns are returned as arrays (flow and temperature as 'd', the flags as
+    'B' with values 0 and 1), with NumPy as float64 and bool arrays.
+    """
+    TEMPERATURE_SCALE = 200.0
+    AIR_IN_LINE_FLAG = 0x01
+    HIGH_FLOW_FLAG = 0x02
+
+    def __init__(self, scale_factor: int, flow_unit: int, si_units: bool = True, use_numpy: bool = False) -> None:
+        """
+        Initialize the converter.
+
+        :param scale_factor: The flow scale factor reported by the sensor
+        :param flow_unit: The raw flow unit reported by the sensor
+        :param si_units: If True, the flow is converted into m3/s (kg/s for mass flow), otherwise into the unit of
+            the sensor.
+        :param use_numpy: If True, NumPy arrays are returned
+        """
+        if not scale_factor:
+            raise ValueError("Scale factor must not be 0")
+        if si_units:
+            si_factor = get_flow_unit_si_factor(flow_unit)
+            if si_factor is None:
+                raise Scc1NotSupportedException(f"Unknown flow unit: 0x{flow_unit:04X}")
+            self._flow_factor = si_factor / scale_factor
+            self._flow_unit_label = get_flow_unit_si_label(flow_unit)
+        else:
+            self._flow_factor = 1.0 / scale_factor
+            self._flow_unit_label = get_flow_unit_label(flow_unit)
+        self._scale_factor = scale_factor
+        self._flow_unit = flow_unit
+        self._np: Any = None
+        if use_numpy:
+            try:
+                import numpy
+            except ImportError as e:
+                raise Scc1NotSupportedException("NumPy is required for use_numpy=True") from e
+            self._np = numpy
+
+    @classmethod
+    def from_sensor(cls, sensor: Scc1Sf06, command: Optional[int] = None, si_units: bool = True,
+                    use_numpy: bool = False) -> 'SlfSignalConverter':
+        """
+        Create a converter with the scale factor and unit of a sensor.
+
+        :param sensor: The sensor driver
+        :param command: The measurement command (default: the command of the current liquid mode)
+        :param si_units: If True, the flow is converted into SI units
+        :param use_numpy: If True, NumPy arrays are returned
+        :return: The converter
+        """
+        unit_and_scale = sensor.get_flow_unit_and_scale(command)
+        if unit_and_scale is None:
+            raise Scc1InvalidDataReceived("Could not determine the sensor flow unit and scale")
+        scale_factor, flow_unit = unit_and_scale
+        return cls(scale_factor, flow_unit, si_units, use_numpy)
+
+    @property
+    def scale_factor(self) -> int:
+        return self._scale_factor
+
+    @property
+    def flow_unit(self) -> int:
+        return self._flow_unit
+
+    @property
+    def flow_factor(self) -> float:
+        """Factor converting a raw flow value into the flow unit of this converter"""
+        return self._flow_factor
+
+    @property
+    def flow_unit_label(self) -> str:
+        return self._flow_unit_label
+
+    def convert_sample(self, sample: Tuple[int, ...]) -> Tuple[float, float, bool, bool]:
+        """
+        Convert a single sample, e.g. as returned by get_last_measurement.
+
+        :param sample: The raw sample (flow, temperature, flags, ...)
+        :return: A tuple with (flow, temperature, air_in_line, high_flow)
+        """
+        flow, temperature, flags = sample[:3]
+        return (flow * self._flow_factor, temperature / self.TEMPERATURE_SCALE,
+                bool(flags & self.AIR_IN_LINE_FLAG), bool(flags & self.HIGH_FLOW_FLAG))
+
+    def convert(self, samples: Union[Sf06SampleBatch, Sequence[Tuple[int, ...]]]) -> SlfConvertedSamples:
+        """
+        Convert a batch of samples.
+
+        :param samples: A batch or the list of samples returned by read_extended_buffer
+        :return: The converted columns
+        """
+        batch = samples if isinstance(samples, Sf06SampleBatch) else Sf06SampleBatch.from_samples(samples)
+        if batch.num_signals < 3:
+            raise Scc1InvalidDataReceived("Samples must contain flow, temperature and flags")
+        if self._np is not None:
+            return self._convert_numpy(batch)
+        flags = batch.flags
+        return SlfConvertedSamples(
+            flow=array('d', map(self._flow_factor.__mul__, batch.flow)),
+            temperature=array('d', map((1.0 / self.TEMPERATURE_SCALE).__mul__, batch.temperature)),
+            air_in_line=array('B', map(bool, map(self.AIR_IN_LINE_FLAG.__and__, flags))),
+            high_flow=array('B', map(bool, map(self.HIGH_FLOW_FLAG.__and__, flags))),
+        )
+
+    def _convert_numpy(self, batch: Sf06SampleBatch) -> SlfConvertedSamples:
+        records = batch.to_numpy()
+        flags = records['flags']
+        return SlfConvertedSamples(
+            flow=records['flow'] * self._flow_factor,
+            temperature=records['temperature'] / self.TEMPERATURE_SCALE,
+            air_in_line=(flags & self.AIR_IN_LINE_FLAG) != 0,
+            high_flow=(flags & self.HIGH_FLOW_FLAG) != 0,
+        )
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+import functools
+from concurrent.futures import Executor
+from typing import Any, Callable, Iterable, List, Optional, TypeVar, Union
+
+from sensirion_shdlc_driver import ShdlcConnection
+
+from sensirion_uart_scc1.scc1_shdlc_device import Scc1ShdlcDevice, Scc1StatusSnapshot
+
+T = TypeVar('T')
+
+
+class AsyncScc1ShdlcDevice:
+    """
+    asyncio counterpart of the Scc1ShdlcDevice.
+
+    The serial communication itself is blocking, therefore every command is executed in an executor while the event
+    loop stays responsive. Commands to the same cable are serialized with a lock, commands to different cables run
+    concurrently. All cables may share one executor, so the number of threads does not grow with the number of
+    cables.
+    """
+
+    def __init__(self, device: Scc1ShdlcDevice, executor: Optional[Executor] = None) -> None:
+        """
+        Wrap an existing device.
+
+        :param device: The synchronous device
+        :param executor: Executor used for the blocking calls (default: the executor of the event loop)
+        """
+        self._device = device
+        self._executor = executor
+        self._lock: Optional[asyncio.Lock] = None
+
+    @classmethod
+    async def create(cls, connection: ShdlcConnection, target_address: int = 0,
+                     executor: Optional[Executor] = None) -> 'AsyncScc1ShdlcDevice':
+        """
+        Create the device and read its identity without blocking the event loop.
+
+        :param connection: The used ShdlcConnection
+        :param target_address: The SHDLC target address used by this device
+        :param executor: Executor used for the blocking calls
+        :return: The async device
+        """
+        loop = asyncio.get_running_loop()
+        device = await loop.run_in_executor(executor, functools.partial(Scc1ShdlcDevice, connection, target_address,
+                                                                        eager=True))
+        return cls(device, executor)
+
+    def __str__(self) -> str:
+        return str(self._device)
+
+    @property
+    def device(self) -> Scc1ShdlcDevice:
+        """The wrapped synchronous device. Do not use it concurrently to the async methods."""
+        return self._device
+
+    @property
+    def serial_number(self) -> str:
+        return self._device.serial_number
+
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """
+        Execute a blocking function that communicates with this cable.
+
+        :param func: The function to execute
+        :return: The return value of the function
+        """
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        loop = asyncio.get_running_loop()
+        async with self._lock:
+            return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    async def transceive(self, command: int, data: Union[bytes, Iterable], timeout: float = -1.0) -> bytes:
+        """
+        Send a SHDLC command and wait for the response without blocking the event loop.
+
+        :param command: The command to send (one byte).
+        :param data: Byte array of the data to send as arguments to the command.
+        :param timeout: Response timeout in seconds (-1 for using the default value).
+        :return: The returned data as bytes.
+        """
+        return await self.run(self._device.transceive, command, data, timeout)
+
+    async def get_sensor_type(self) -> Optional[int]:
+        return await self.run(self._device.get_sensor_type)
+
+    async def set_sensor_type(self, sensor_type: int) -> None:
+        await self.run(self._device.set_sensor_type, sensor_type)
+
+    async def get_sensor_address(self) -> Optional[int]:
+        return await self.run(self._device.get_sensor_address)
+
+    async def perform_i2c_scan(self) -> List[int]:
+        return await self.run(self._device.perform_i2c_scan)
+
+    async def get_sensor_status(self) -> Optional[int]:
+        return await self.run(self._device.get_sensor_status)
+
+    async def get_continuous_measurement_status(self) -> Optional[int]:
+        return await self.run(self._device.get_continuous_measurement_status)
+
+    async def get_status_snapshot(self) -> Scc1StatusSnapshot:
+        return await self.run(self._device.get_status_snapshot)
+
+    async def sensor_reset(self) -> None:
+        await self.run(self._device.sensor_reset)
@@ -0,0 +1,301 @@
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark of the sample throughput and the per-call latency of the different read paths.
+
+The benchmark can be run against a real cable or against the emulator::
+
+    python -m sensirion_uart_scc1.scc1_benchmark --serial-port COM5 --output results.json
+    python -m sensirion_uart_scc1.scc1_benchmark --emulate --frame-latency 0.001
+
+The results are printed as table and optionally written as JSON in order to compare them between releases.
+"""
+
+import argparse
+import json
+import platform
+import struct
+import sys
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from sensirion_shdlc_driver import ShdlcConnection, ShdlcSerialPort
+
+from sensirion_uart_scc1.drivers.scc1_sf06 import Scc1Sf06
+from sensirion_uart_scc1.scc1_emulator import Scc1EmulatorPort, sensirion_crc8
+from sensirion_uart_scc1.scc1_exceptions import Scc1InvalidDataReceived
+from sensirion_uart_scc1.scc1_shdlc_device import Scc1ShdlcDevice
+
+PATH_READ_EXTENDED_BUFFER = 'read_extended_buffer'
+PATH_GET_LAST_MEASUREMENT = 'get_last_measurement'
+PATH_PUBLIC_DRIVER = 'public_driver'
+
+ALL_PATHS = (PATH_READ_EXTENDED_BUFFER, PATH_GET_LAST_MEASUREMENT, PATH_PUBLIC_DRIVER)
+
+#: SF06 I2C commands used for the public driver path
+SF06_I2C_START_WATER_MEASUREMENT = 0x3608
+SF06_I2C_STOP_MEASUREMENT = 0x3FF9
+
+
+class BenchmarkResult(NamedTuple):
+    """Result of benchmarking one read path at one measurement interval"""
+    path: str
+    interval_ms: int
+    duration_s: float
+    calls: int
+    samples: int
+    samples_per_s: float
+    samples_lost: int
+    latency_p50_ms: float
+    latency_p90_ms: float
+    latency_p99_ms: float
+    latency_max_ms: float
+    cpu_us_per_sample: Optional[float]
+
+
+def percentile(values: Sequence[float], fraction: float) -> float:
+    """
+    Compute a percentile with linear interpolation.
+
+    :param values: The values, need not be sorted
+    :param fraction: The percentile as fraction between 0 and 1
+    :return: The percentile or 0.0 for an empty sequence
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def _run_loop(read: Callable[[], int], duration: float) -> Tuple[float, float, List[float], int]:
+    """
+    Call read back to back for the given duration.
+
+    :param read: Function performing one read and returning the number of samples received
+    :param duration: Benchmark duration in seconds
+    :return: A tuple with (elapsed time, cpu time, latencies, samples)
+    """
+    latencies: List[float] = []
+    samples = 0
+    cpu_start = time.process_time()
+    start = time.perf_counter()
+    end = start + duration
+    now = start
+    while now < end:
+        samples += read()
+        call_end = time.perf_counter()
+        latencies.append(call_end - now)
+        now = call_end
+    return now - start, time.process_time() - cpu_start, latencies, samples
+
+
+def _make_polled_result(path: str, interval_ms: int, elapsed: float, cpu: float, latencies: List[float],
+                        reads: int) -> BenchmarkResult:
+    """
+    Create the result for a path that reads one sample per call. Reading faster than the measurement interval
+    returns the same sample again, reading slower loses samples.
+    """
+    if interval_ms <= 0:
+        return _make_result(path, interval_ms, elapsed, cpu, latencies, reads, 0)
+    expected = int(elapsed * 1000.0 / interval_ms)
+    return _make_result(path, interval_ms, elapsed, cpu, latencies, min(reads, expected), max(0, expected - reads))
+
+
+def _make_result(path: str, interval_ms: int, elapsed: float, cpu: float, latencies: List[float],
+                 samples: int, samples_lost: int) -> BenchmarkResult:
+    return BenchmarkResult(
+        path=path,
+        interval_ms=interval_ms,
+        duration_s=elapsed,
+        calls=len(latencies),
+        samples=samples,
+        samples_per_s=samples / elapsed if elapsed > 0 else 0.0,
+        samples_lost=samples_lost,
+        latency_p50_ms=percentile(latencies, 0.5) * 1000.0,
+        latency_p90_ms=percentile(latencies, 0.9) * 1000.0,
+        latency_p99_ms=percentile(latencies, 0.99) * 1000.0,
+        latency_max_ms=max(latencies, default=0.0) * 1000.0,
+        cpu_us_per_sample=cpu / samples * 1e6 if samples else None,
+    )
+
+
+def benchmark_read_extended_buffer(sensor: Scc1Sf06, interval_ms: int, duration: float) -> BenchmarkResult:
+    """
+    Benchmark draining the cable buffer with read_extended_buffer.
+
+    :param sensor: The sensor driver, the measurement must not be running
+    :param interval_ms: The measurement interval in milliseconds
+    :param duration: Benchmark duration in seconds
+    :return: The benchmark result
+    """
+    bytes_lost = 0
+    bytes_per_sample = 6
+
+    def read() -> int:
+        nonlocal bytes_lost, bytes_per_sample
+        _, lost, data = sensor.read_extended_buffer()
+        bytes_lost += lost
+        if data:
+            bytes_per_sample = 2 * len(data[0])
+        return len(data)
+
+    sensor.start_continuous_measurement(interval_ms)
+    try:
+        elapsed, cpu, latencies, samples = _run_loop(read, duration)
+    finally:
+        sensor.stop_continuous_measurement()
+    return _make_result(PATH_READ_EXTENDED_BUFFER, interval_ms, elapsed, cpu, latencies, samples,
+                        bytes_lost // bytes_per_sample)
+
+
+def benchmark_get_last_measurement(sensor: Scc1Sf06, interval_ms: int, duration: float) -> BenchmarkResult:
+    """
+    Benchmark polling single samples with get_last_measurement.
+
+    Samples are lost if the path is not able to poll at least once per measurement interval.
+
+    :param sensor: The sensor driver, the measurement must not be running
+    :param interval_ms: The measurement interval in milliseconds
+    :param duration: Benchmark duration in seconds
+    :return: The benchmark result
+    """
+    def read() -> int:
+        return 0 if sensor.get_last_measurement() is None else 1
+
+    sensor.start_continuous_measurement(interval_ms)
+    try:
+        elapsed, cpu, latencies, samples = _run_loop(read, duration)
+    finally:
+        sensor.stop_continuous_measurement()
+    return _make_polled_result(PATH_GET_LAST_MEASUREMENT, interval_ms, elapsed, cpu, latencies, samples)
+
+
+def benchmark_public_driver(device: Scc1ShdlcDevice, interval_ms: int, duration: float,
+                            i2c_address: int = 0x08) -> BenchmarkResult:
+    """
+    Benchmark the I2C transceiver used by the public python drivers.
+
+    The SF06 I2C commands are issued the same way as the public driver does (one I2C transfer per command) but
+    without depending on the public driver package.
+
+    :param device: The SCC1 device
+    :param interval_ms: The interval at which the public driver is expected to read samples
+    :param duration: Benchmark duration in seconds
+    :param i2c_address: The I2C address of the sensor
+    :return: The benchmark result
+    """
+    transceiver = device.get_i2c_transceiver()
+
+    def read() -> int:
+        data = transceiver.transceive(i2c_address, None, 9, 0.0)
+        for offset in range(0, len(data), 3):
+            if sensirion_crc8(data[offset:offset + 2]) != data[offset + 2]:
+                raise Scc1InvalidDataReceived("CRC mismatch in I2C response")
+        return 1 if len(data) == 9 else 0
+
+    transceiver.transceive(i2c_address, struct.pack('>H', SF06_I2C_START_WATER_MEASUREMENT), 0, 0.0)
+    time.sleep(Scc1Sf06.START_MEASUREMENT_DELAY_S)
+    try:
+        elapsed, cpu, latencies, samples = _run_loop(read, duration)
+    finally:
+        transceiver.transceive(i2c_address, struct.pack('>H', SF06_I2C_STOP_MEASUREMENT), 0, 0.0)
+    return _make_polled_result(PATH_PUBLIC_DRIVER, interval_ms, elapsed, cpu, latencies, samples)
+
+
+def run_benchmarks(device: Scc1ShdlcDevice, intervals_ms: Sequence[int] = (0, 2, 5, 10), duration: float = 2.0,
+                   paths: Sequence[str] = ALL_PATHS) -> List[BenchmarkResult]:
+    """
+    Run the selected benchmark paths for all intervals.
+
+    :param device: The SCC1 device with an attached SF06 sensor
+    :param intervals_ms: Measurement intervals in milliseconds
+    :param duration: Duration of every single benchmark in seconds
+    :param paths: The read paths to benchmark
+    :return: A list of benchmark results
+    """
+    unknown = set(paths) - set(ALL_PATHS)
+    if unknown:
+        raise ValueError(f"Unknown benchmark path(s): {', '.join(sorted(unknown))}")
+    sensor = Scc1Sf06(device)
+    i2c_address = device.get_sensor_address() or 0x08
+    results = []
+    for interval_ms in intervals_ms:
+        if PATH_READ_EXTENDED_BUFFER in paths:
+            results.append(benchmark_read_extended_buffer(sensor, interval_ms, duration))
+        if PATH_GET_LAST_MEASUREMENT in paths:
+            results.append(benchmark_get_last_measurement(sensor, interval_ms, duration))
+        if PATH_PUBLIC_DRIVER in paths:
+            results.append(benchmark_public_driver(device, interval_ms, duration, i2c_address))
+    return results
+
+
+def results_to_json(device: Scc1ShdlcDevice, results: Sequence[BenchmarkResult]) -> Dict:
+    """
+    :param device: The benchmarked device
+    :param results: The benchmark results
+    :return: A JSON serializable dictionary with the environment and the results
+    """
+    try:
+        from importlib.metadata import version
+        package_version = version('sensirion-uart-scc1')
+    except Exception:  # noqa
+        package_version = 'unknown'
+    return {
+        'package_version': package_version,
+        'python_version': platform.python_version(),
+        'platform': platform.platform(),
+        'device': str(device),
+        'firmware_version': str(device.firmware_version),
+        'results': [result._asdict() for result in results],
+    }
+
+
+def format_results(results: Sequence[BenchmarkResult]) -> str:
+    """
+    :param results: The benchmark results
+    :return: The results formatted as table
+    """
+    lines = [f"{'path':<22}{'interval':>9}{'samples/s':>11}{'lost':>7}{'p50 ms':>9}{'p99 ms':>9}{'cpu us':>10}"]
+    for r in results:
+        cpu = f'{r.cpu_us_per_sample:.1f}' if r.cpu_us_per_sample is not None else '-'
+        lines.append(f'{r.path:<22}{r.interval_ms:>9}{r.samples_per_s:>11.1f}{r.samples_lost:>7}'
+                     f'{r.latency_p50_ms:>9.2f}{r.latency_p99_ms:>9.2f}{cpu:>10}')
+    return '\n'.join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark the read paths of the SCC1 cable')
+    parser.add_argument('--serial-port', '-p', help='Serial port of the cable')
+    parser.add_argument('--emulate', action='store_true', help='Use the emulated cable instead of a serial port')
+    parser.add_argument('--baudrate', type=int, default=115200)
+    parser.add_argument('--frame-latency', type=float, default=0.001,
+                        help='Per-frame latency of the emulated cable in seconds')
+    parser.add_argument('--intervals', type=int, nargs='+', default=[0, 2, 5, 10],
+                        help='Measurement intervals in milliseconds')
+    parser.add_argument('--duration', type=float, default=2.0, help='Duration of every benchmark in seconds')
+    parser.add_argument('--paths', nargs='+', default=list(ALL_PATHS), choices=ALL_PATHS)
+    parser.add_argument('--output', '-o', help='Write the results as JSON to this file')
+    args = parser.parse_args(argv)
+
+    if args.emulate:
+        port = Scc1EmulatorPort(baudrate=args.baudrate, frame_latency=args.frame_latency)
+    elif args.serial_port:
+        port = ShdlcSerialPort(port=args.serial_port, baudrate=args.baudrate)
+    else:
+        parser.error('Either --serial-port or --emulate is required')
+
+    with port:
+        device = Scc1ShdlcDevice(ShdlcConnection(port), target_address=0)
+        results = run_benchmarks(device, args.intervals, args.duration, args.paths)
+        print(format_results(results))
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(results_to_json(device, results), f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
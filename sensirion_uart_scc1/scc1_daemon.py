@@ -0,0 +1,623 @@
+# -*- coding: utf-8 -*-
+
+"""
+Acquisition daemon sharing cables with many local client processes over a Unix domain socket.
+
+Every message starts with a header of message type (u8), request id (u32) and payload length (u32), all little
+endian. Clients send requests, the daemon answers every request with MSG_REPLY or MSG_ERROR carrying the request id
+and sends MSG_BATCH messages (request id 0) to subscribed clients.
+"""
+
+import argparse
+import json
+import logging
+import os
+import socket
+import stat
+import struct
+import sys
+import threading
+from array import array
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Sequence, Set, Tuple
+
+from sensirion_shdlc_driver.errors import ShdlcTimeoutError
+from sensirion_shdlc_driver.port import ShdlcPort
+
+from sensirion_uart_scc1.acquisition.multi_cable_manager import Scc1AcquisitionManager, TaggedBatch
+from sensirion_uart_scc1.drivers.scc1_sf06 import Scc1Sf06
+from sensirion_uart_scc1.drivers.sf06_sample_batch import Sf06SampleBatch
+from sensirion_uart_scc1.scc1_exceptions import Scc1DaemonError, Scc1NotSupportedException
+
+log = logging.getLogger(__name__)
+
+#: Requests
+MSG_LIST_CABLES = 0x01
+MSG_SUBSCRIBE = 0x02
+MSG_UNSUBSCRIBE = 0x03
+MSG_TRANSCEIVE = 0x04
+#: Messages of the daemon
+MSG_REPLY = 0x80
+MSG_ERROR = 0x81
+MSG_BATCH = 0x82
+
+#: SHDLC commands reserved for the daemon: stop and read out of the measurement, selftest, sensor and device reset
+RESERVED_COMMANDS = frozenset({0x22, 0x34, 0x36, 0x65, 0xD3})
+#: SHDLC commands that are passed through as getters, but are reserved as setters (with data): supply voltage, sensor
+#: type, I2C address, I2C delay, start of the measurement, slave address and baudrate
+RESERVED_SETTINGS = frozenset({0x23, 0x24, 0x25, 0x28, 0x33, 0x90, 0x91})
+
+_MESSAGE = struct.Struct('<BII')
+# host timestamp, bytes lost, number of signals, batches dropped for the subscriber
+_BATCH_HEADER = struct.Struct('<dIHI')
+# slave address, command id, response timeout
+_TRANSCEIVE = struct.Struct('<BBd')
+# slave address, command id, state
+_TRANSCEIVE_REPLY = struct.Struct('<BBB')
+
+
+def _pack_serial(cable_serial: str) -> bytes:
+    encoded = cable_serial.encode('utf-8')
+    return bytes([len(encoded)]) + encoded
+
+
+def _unpack_serial(payload: bytes) -> Tuple[str, int]:
+    length = payload[0]
+    return payload[1:1 + length].decode('utf-8'), 1 + length
+
+
+def _little_endian(values: array) -> bytes:
+    if sys.byteorder == 'big':
+        values = array('h', values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _encode_batch(batch: TaggedBatch) -> Tuple[bytes, bytes]:
+    """
+    :return: The cable serial and the sample values, shared by all subscribers
+    """
+    return _pack_serial(batch.cable_serial), _little_endian(batch.samples.values)
+
+
+def _check_unix_sockets() -> None:
+    if not hasattr(socket, 'AF_UNIX'):
+        raise Scc1NotSupportedException("Unix domain sockets are not supported on this platform")
+
+
+class _ClientSession:
+    """Connection of one client with its own queue of batches"""
+
+    def __init__(self, daemon: 'Scc1Daemon', connection: socket.socket) -> None:
+        self._daemon = daemon
+        self._socket = connection
+        self._condition = threading.Condition()
+        self._replies: Deque[bytes] = deque()
+        self._batches: Deque[Tuple[TaggedBatch, bytes, bytes]] = deque()
+        self._subscriptions: Set[str] = set()
+        self._max_pending_batches = 0
+        self._batches_dropped = 0
+        self._closed = False
+        self._receiver = threading.Thread(target=self._receive_loop, name='scc1-daemon-receiver', daemon=True)
+        self._sender = threading.Thread(target=self._send_loop, name='scc1-daemon-sender', daemon=True)
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def start(self) -> None:
+        self._receiver.start()
+        self._sender.start()
+
+    def close(self) -> None:
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._condition.notify_all()
+        try:
+            self._socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._socket.close()
+
+    def offer_batch(self, batch: TaggedBatch, encoded: Tuple[bytes, bytes]) -> None:
+        """
+        Queue a batch for the client if it is subscribed to the cable. If the queue is full, the oldest batch is
+        dropped, so a slow client does not delay the acquisition or the other clients.
+        """
+        with self._condition:
+            if batch.cable_serial not in self._subscriptions:
+                return
+            if len(self._batches) >= self._max_pending_batches:
+                self._batches.popleft()
+                self._batches_dropped += 1
+            self._batches.append((batch, encoded[0], encoded[1]))
+            self._condition.notify_all()
+
+    def _reply(self, message_type: int, request_id: int, payload: bytes) -> None:
+        with self._condition:
+            self._replies.append(_MESSAGE.pack(message_type, request_id, len(payload)) + payload)
+            self._condition.notify_all()
+
+    def _send_loop(self) -> None:
+        try:
+            while True:
+                with self._condition:
+                    self._condition.wait_for(lambda: self._replies or self._batches or self._closed)
+                    if self._closed:
+                        return
+                    if self._replies:
+                        message = self._replies.popleft()
+                    else:
+                        batch, serial, values = self._batches.popleft()
+                        header = _BATCH_HEADER.pack(batch.host_timestamp, batch.bytes_lost,
+                                                    batch.samples.num_signals, self._batches_dropped)
+                        size = len(serial) + len(header) + len(values)
+                        message = b''.join((_MESSAGE.pack(MSG_BATCH, 0, size), serial, header, values))
+                self._socket.sendall(message)
+        except OSError:
+            self.close()
+
+    def _receive_loop(self) -> None:
+        try:
+            while True:
+                header = self._receive_exactly(_MESSAGE.size)
+                if header is None:
+                    break
+                message_type, request_id, size = _MESSAGE.unpack(header)
+                payload = self._receive_exactly(size) if size else b''
+                if payload is None:
+                    break
+                try:
+                    self._reply(MSG_REPLY, request_id, self._handle(message_type, payload))
+                except ShdlcTimeoutError as e:
+                    self._reply(MSG_ERROR, request_id, json.dumps({'type': 'timeout', 'message': str(e)}).encode())
+                except Exception as e:  # noqa
+                    self._reply(MSG_ERROR, request_id, json.dumps({'type': type(e).__name__,
+                                                                   'message': str(e)}).encode())
+        except OSError:
+            pass
+        finally:
+            self.close()
+            self._daemon._remove_session(self)
+
+    def _receive_exactly(self, size: int) -> Optional[bytes]:
+        data = bytearray()
+        while len(data) < size:
+            chunk = self._socket.recv(size - len(data))
+            if not chunk:
+                return None
+            data += chunk
+        return bytes(data)
+
+    def _handle(self, message_type: int, payload: bytes) -> bytes:
+        if message_type == MSG_LIST_CABLES:
+            return json.dumps(self._daemon.cables()).encode()
+        if message_type == MSG_SUBSCRIBE:
+            request = json.loads(payload.decode('utf-8'))
+            serials = request.get('cables') or self._daemon.cable_serials
+            unknown = set(serials) - set(self._daemon.cable_serials)
+            if unknown:
+                raise ValueError(f"Unknown cables: {', '.join(sorted(unknown))}")
+            with self._condition:
+                self._subscriptions = set(serials)
+                self._max_pending_batches = max(1, int(request.get('max_pending_batches', 1000)))
+            return b''
+        if message_type == MSG_UNSUBSCRIBE:
+            with self._condition:
+                self._subscriptions = set()
+                self._batches.clear()
+            return b''
+        if message_type == MSG_TRANSCEIVE:
+            cable_serial, offset = _unpack_serial(payload)
+            slave_address, command_id, timeout = _TRANSCEIVE.unpack_from(payload, offset)
+            data = payload[offset + _TRANSCEIVE.size:]
+            address, command, state, response = self._daemon.transceive(cable_serial, slave_address, command_id,
+                                                                        data, timeout)
+            return _TRANSCEIVE_REPLY.pack(address, command, state) + bytes(response)
+        raise ValueError(f"Unknown message type 0x{message_type:02X}")
+
+
+class Scc1Daemon:
+    """
+    Owns one or more cables, runs their continuous measurement and shares the streams and the command access with
+    local clients over a Unix domain socket.
+
+    The sensors are initialized once by the daemon. Every client has its own bounded queue of batches, a client that
+    does not keep up loses its oldest batches without affecting the acquisition or the other clients. Commands are
+    passed through to the cable, except the commands that would disturb the acquisition of the other clients, see
+    RESERVED_COMMANDS and RESERVED_SETTINGS.
+
+    Usage::
+
+        with Scc1Daemon('/tmp/scc1.sock', [sensor_1, sensor_2], interval_ms=2):
+            threading.Event().wait()
+    """
+
+    def __init__(self, path: str, sensors: Sequence[Scc1Sf06], interval_ms: int = 0,
+                 poll_interval: float = 0.002) -> None:
+        """
+        Initialize the daemon.
+
+        :param path: Path of the Unix domain socket
+        :param sensors: The sensors to share, each attached to a different cable
+        :param interval_ms: The measurement interval in milliseconds used for all sensors
+        :param poll_interval: Time in seconds a worker waits after the buffer of its cable was found empty
+        """
+        _check_unix_sockets()
+        self._path = path
+        self._interval_ms = interval_ms
+        self._sensors: Dict[str, Scc1Sf06] = {sensor.device.serial_number: sensor for sensor in sensors}
+        self._manager = Scc1AcquisitionManager(interval_ms=interval_ms, poll_interval=poll_interval)
+        for cable_serial, sensor in self._sensors.items():
+            self._manager.add(sensor, cable_serial)
+        self._sessions: List[_ClientSession] = []
+        self._lock = threading.Lock()
+        self._socket: Optional[socket.socket] = None
+        self._stop_event = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._cables: Optional[List[Dict[str, Any]]] = None
+
+    def __enter__(self) -> 'Scc1Daemon':
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.stop()
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @property
+    def cable_serials(self) -> List[str]:
+        return list(self._sensors)
+
+    @property
+    def client_count(self) -> int:
+        with self._lock:
+            return len(self._sessions)
+
+    def cables(self) -> List[Dict[str, Any]]:
+        """
+        :return: The identity and configuration of the shared cables and sensors, read once at the start
+        """
+        if self._cables is None:
+            cables = []
+            for cable_serial, sensor in self._sensors.items():
+                unit_and_scale = sensor.get_flow_unit_and_scale()
+                scale_factor, flow_unit = unit_and_scale if unit_and_scale else (None, None)
+                cables.append({
+                    'cable_serial': cable_serial,
+                    'firmware_version': str(sensor.device.firmware_version),
+                    'com_port': sensor.device.com_port,
+                    'product_id': sensor.product_id,
+                    'sensor_serial': sensor.serial_number,
+                    'liquid_mode': sensor.liquid_mode.name,
+                    'interval_ms': self._interval_ms,
+                    'scale_factor': scale_factor,
+                    'flow_unit': flow_unit,
+                })
+            self._cables = cables
+        return self._cables
+
+    def transceive(self, cable_serial: str, slave_address: int, command_id: int, data: bytes,
+                   timeout: float) -> Tuple[int, int, int, bytes]:
+        """
+        Send a raw SHDLC frame to a cable.
+
+        :return: The raw response as tuple with (address, command id, state, data)
+        """
+        sensor = self._sensors.get(cable_serial)
+        if sensor is None:
+            raise ValueError(f"Unknown cable {cable_serial}")
+        if command_id in RESERVED_COMMANDS or (command_id in RESERVED_SETTINGS and data):
+            raise Scc1NotSupportedException(f"Command 0x{command_id:02X} is reserved for the acquisition")
+        return sensor.device.connection.port.transceive(slave_address, command_id, data, timeout)
+
+    def start(self) -> None:
+        """Start the acquisition and accept clients"""
+        if self._socket is not None:
+            return
+        self._remove_stale_socket()
+        self.cables()
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.bind(self._path)
+        self._socket.listen()
+        # stop is noticed by the accept loop within this time
+        self._socket.settimeout(0.2)
+        self._stop_event.clear()
+        self._manager.start()
+        self._threads = [threading.Thread(target=self._accept_loop, name='scc1-daemon-accept', daemon=True),
+                         threading.Thread(target=self._dispatch_loop, name='scc1-daemon-dispatch', daemon=True)]
+        for thread in self._threads:
+            thread.start()
+        log.info("SCC1 daemon serving %s on %s", ', '.join(self._sensors), self._path)
+
+    def stop(self, timeout: Optional[float] = 5.0) -> None:
+        """
+        Stop the acquisition and disconnect all clients.
+
+        :param timeout: Maximum time in seconds to wait for every acquisition worker
+        """
+        if self._socket is None:
+            return
+        self._stop_event.set()
+        for thread in self._threads:
+            thread.join()
+        self._socket.close()
+        self._socket = None
+        self._manager.stop(timeout)
+        with self._lock:
+            sessions, self._sessions = self._sessions, []
+        for session in sessions:
+            session.close()
+        if os.path.exists(self._path):
+            os.unlink(self._path)
+
+    def _remove_stale_socket(self) -> None:
+        """Remove the socket file left by a daemon that terminated, refuse to take over the socket of a running one"""
+        try:
+            mode = os.stat(self._path).st_mode
+        except FileNotFoundError:
+            return
+        if not stat.S_ISSOCK(mode):
+            raise Scc1DaemonError(f"{self._path} exists and is not a socket")
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self._path)
+        except (ConnectionRefusedError, FileNotFoundError):
+            log.info("Removing stale socket %s", self._path)
+            os.unlink(self._path)
+            return
+        finally:
+            probe.close()
+        raise Scc1DaemonError(f"Another daemon is serving {self._path}")
+
+    def _accept_loop(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                connection, _ = self._socket.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            connection.settimeout(None)
+            session = _ClientSession(self, connection)
+            with self._lock:
+                self._sessions.append(session)
+            session.start()
+
+    def _dispatch_loop(self) -> None:
+        while not self._stop_event.is_set():
+            for batch in self._manager.read(timeout=0.1):
+                encoded = _encode_batch(batch)
+                with self._lock:
+                    sessions = list(self._sessions)
+                for session in sessions:
+                    session.offer_batch(batch, encoded)
+
+    def _remove_session(self, session: _ClientSession) -> None:
+        with self._lock:
+            if session in self._sessions:
+                self._sessions.remove(session)
+
+
+class Scc1DaemonClient:
+    """
+    Client of a Scc1Daemon.
+
+    Usage::
+
+        with Scc1DaemonClient('/tmp/scc1.sock') as client:
+            client.subscribe()
+            while True:
+                batch = client.read_batch(timeout=1.0)
+    """
+
+    def __init__(self, path: str, timeout: float = 10.0) -> None:
+        """
+        Connect to a daemon.
+
+        :param path: Path of the Unix domain socket of the daemon
+        :param timeout: Time in seconds to wait for the reply to a request
+        """
+        _check_unix_sockets()
+        self._timeout = timeout
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.connect(path)
+        self._lock = threading.RLock()
+        self._buffer = bytearray()
+        self._replies: Dict[int, Tuple[int, bytes]] = {}
+        self._batches: Deque[TaggedBatch] = deque()
+        self._next_request_id = 1
+        self._batches_dropped = 0
+
+    def __enter__(self) -> 'Scc1DaemonClient':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    @property
+    def batches_dropped(self) -> int:
+        """Number of batches the daemon dropped for this client, as reported with the last batch"""
+        return self._batches_dropped
+
+    def close(self) -> None:
+        self._socket.close()
+
+    def cables(self) -> List[Dict[str, Any]]:
+        """
+        :return: The identity and configuration of the cables shared by the daemon
+        """
+        return json.loads(self._request(MSG_LIST_CABLES, b'').decode('utf-8'))
+
+    def subscribe(self, cable_serials: Optional[Sequence[str]] = None, max_pending_batches: int = 1000) -> None:
+        """
+        Receive the batches of the continuous measurement.
+
+        :param cable_serials: The cables to receive (default: all cables)
+        :param max_pending_batches: Number of batches the daemon queues for this client before it drops the oldest
+        """
+        request = {'cables': list(cable_serials or []), 'max_pending_batches': max_pending_batches}
+        self._request(MSG_SUBSCRIBE, json.dumps(request).encode())
+
+    def unsubscribe(self) -> None:
+        self._request(MSG_UNSUBSCRIBE, b'')
+
+    def read_batch(self, timeout: Optional[float] = None) -> Optional[TaggedBatch]:
+        """
+        :param timeout: Time in seconds to wait for a batch (None waits forever)
+        :return: The next batch, None if no batch arrived within the timeout
+        """
+        with self._lock:
+            while not self._batches:
+                if not self._receive(timeout):
+                    return None
+            return self._batches.popleft()
+
+    def transceive(self, cable_serial: str, slave_address: int, command_id: int, data: bytes,
+                   response_timeout: float) -> Tuple[int, int, int, bytes]:
+        """
+        Send a raw SHDLC frame to a cable of the daemon.
+
+        :return: The raw response as tuple with (address, command id, state, data)
+        """
+        payload = _pack_serial(cable_serial) + _TRANSCEIVE.pack(slave_address, command_id, response_timeout) + \
+            bytes(bytearray(data))
+        reply = self._request(MSG_TRANSCEIVE, payload)
+        address, command, state = _TRANSCEIVE_REPLY.unpack_from(reply)
+        return address, command, state, reply[_TRANSCEIVE_REPLY.size:]
+
+    def port(self, cable_serial: str) -> 'Scc1DaemonPort':
+        """
+        :param cable_serial: The serial number of a cable of the daemon
+        :return: A ShdlcPort sending the commands through the daemon, e.g. for a Scc1ShdlcDevice
+        """
+        return Scc1DaemonPort(self, cable_serial)
+
+    def _request(self, message_type: int, payload: bytes) -> bytes:
+        with self._lock:
+            request_id = self._next_request_id
+            self._next_request_id += 1
+            self._socket.sendall(_MESSAGE.pack(message_type, request_id, len(payload)) + payload)
+            while request_id not in self._replies:
+                if not self._receive(self._timeout):
+                    raise Scc1DaemonError("The daemon did not reply in time")
+            reply_type, reply = self._replies.pop(request_id)
+        if reply_type == MSG_ERROR:
+            error = json.loads(reply.decode('utf-8'))
+            if error['type'] == 'timeout':
+                raise ShdlcTimeoutError()
+            raise Scc1DaemonError(f"{error['type']}: {error['message']}")
+        return reply
+
+    def _receive(self, timeout: Optional[float]) -> bool:
+        """
+        Receive data and process the complete messages.
+
+        :return: False if no data arrived within the timeout
+        """
+        self._socket.settimeout(timeout)
+        try:
+            chunk = self._socket.recv(65536)
+        except socket.timeout:
+            return False
+        if not chunk:
+            raise Scc1DaemonError("The daemon closed the connection")
+        self._buffer += chunk
+        while len(self._buffer) >= _MESSAGE.size:
+            message_type, request_id, size = _MESSAGE.unpack_from(self._buffer)
+            end = _MESSAGE.size + size
+            if len(self._buffer) < end:
+                break
+            payload = bytes(self._buffer[_MESSAGE.size:end])
+            del self._buffer[:end]
+            if message_type == MSG_BATCH:
+                self._batches.append(self._decode_batch(payload))
+            else:
+                self._replies[request_id] = message_type, payload
+        return True
+
+    def _decode_batch(self, payload: bytes) -> TaggedBatch:
+        cable_serial, offset = _unpack_serial(payload)
+        host_timestamp, bytes_lost, num_signals, batches_dropped = _BATCH_HEADER.unpack_from(payload, offset)
+        self._batches_dropped = batches_dropped
+        values = array('h')
+        values.frombytes(payload[offset + _BATCH_HEADER.size:])
+        if sys.byteorder == 'big':
+            values.byteswap()
+        return TaggedBatch(cable_serial, host_timestamp, bytes_lost, Sf06SampleBatch(values, num_signals))
+
+
+class Scc1DaemonPort(ShdlcPort):
+    """ShdlcPort passing the frames through a Scc1Daemon to one of its cables"""
+
+    def __init__(self, client: Scc1DaemonClient, cable_serial: str, bitrate: int = 115200) -> None:
+        """
+        :param client: The connected client
+        :param cable_serial: The serial number of the cable
+        :param bitrate: Reported bitrate
+        """
+        super().__init__()
+        self._client = client
+        self._cable_serial = cable_serial
+        self._bitrate = bitrate
+        self._lock = threading.RLock()
+
+    @property
+    def description(self):
+        return f'scc1-daemon:{self._cable_serial}'
+
+    @property
+    def bitrate(self):
+        return self._bitrate
+
+    @bitrate.setter
+    def bitrate(self, bitrate):
+        self._bitrate = bitrate
+
+    @property
+    def lock(self):
+        return self._lock
+
+    @property
+    def is_open(self):
+        return True
+
+    def open(self):
+        pass
+
+    def close(self):
+        pass
+
+    def transceive(self, slave_address, command_id, data, response_timeout):
+        return self._client.transceive(self._cable_serial, slave_address, command_id, data, response_timeout)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Share SCC1 cables with local clients over a Unix domain socket')
+    parser.add_argument('--socket', '-s', default='/tmp/scc1.sock', help='Path of the Unix domain socket')
+    parser.add_argument('--serial-ports', '-p', nargs='+', required=True, help='Serial ports of the cables')
+    parser.add_argument('--baudrate', type=int, default=115200)
+    parser.add_argument('--interval', type=int, default=2, help='Measurement interval in milliseconds')
+    args = parser.parse_args(argv)
+
+    from sensirion_uart_scc1.acquisition.process_acquisition import open_sensor
+    logging.basicConfig(level=logging.INFO)
+    sensors = [open_sensor(port, args.baudrate) for port in args.serial_ports]
+    try:
+        with Scc1Daemon(args.socket, sensors, interval_ms=args.interval):
+            threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for sensor in sensors:
+            sensor.device.connection.port.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
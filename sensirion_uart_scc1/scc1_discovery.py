@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, NamedTuple, Optional, Sequence
+
+from sensirion_shdlc_driver import ShdlcConnection, ShdlcSerialPort
+from sensirion_shdlc_driver.port import ShdlcPort
+
+from sensirion_uart_scc1.scc1_shdlc_device import Scc1ShdlcDevice
+
+log = logging.getLogger(__name__)
+
+#: USB vendor id of the FTDI serial converter built into the SCC1 cable
+FTDI_VID = 0x0403
+
+#: Response timeout in seconds of the first request sent to a port during discovery
+IDENTIFICATION_TIMEOUT = 0.05
+
+#: Additional response time in seconds of a serial port once a cable has been identified (driver default)
+ADDITIONAL_RESPONSE_TIME = 0.1
+
+PortFactory = Callable[[str, int], ShdlcPort]
+
+
+class Scc1CableInfo(NamedTuple):
+    """Inventory entry of a cable found by discover_cables"""
+    port: str
+    serial_number: str
+    firmware_version: str
+    sensor_type: Optional[int]  #: Configured sensor type, None if not configured
+    i2c_address: Optional[int]  #: Configured I2C address, None if not configured
+    i2c_addresses: List[int]  #: I2C addresses that responded to the scan, empty if no scan was performed
+
+
+def _open_serial_port(port: str, baudrate: int) -> ShdlcPort:
+    # the short identification timeout must not be extended by the additional response time, it is restored by
+    # probe_cable once the cable has been identified
+    return ShdlcSerialPort(port=port, baudrate=baudrate, additional_response_time=0.0)
+
+
+def candidate_ports(vid: Optional[int] = FTDI_VID) -> List[str]:
+    """
+    :param vid: USB vendor id of the ports to return, None for all serial ports
+    :return: The names of the serial ports that may be connected to a cable
+    """
+    from serial.tools.list_ports import comports
+    return sorted(info.device for info in comports() if vid is None or info.vid == vid)
+
+
+def probe_cable(port: str, baudrate: int = 115200, timeout: float = IDENTIFICATION_TIMEOUT, scan_i2c: bool = True,
+                port_factory: PortFactory = _open_serial_port) -> Optional[Scc1CableInfo]:
+    """
+    Identify the cable connected to a serial port.
+
+    The product name is requested with a short timeout first, so ports without a cable are rejected quickly. The
+    identity of a responding cable is then read with the normal response time of the port.
+
+    :param port: Name of the serial port
+    :param baudrate: Baudrate of the cable in bit/s
+    :param timeout: Response timeout in seconds of the product name request
+    :param scan_i2c: Scan the I2C bus of the cable for connected sensors
+    :param port_factory: Callable opening a ShdlcPort from the port name and the baudrate
+    :return: The inventory entry of the cable, None if no SCC1 cable responded
+    :raises: The error of a request sent after the cable was identified as SCC1 cable
+    """
+    try:
+        shdlc_port = port_factory(port, baudrate)
+    except Exception as e:  # noqa
+        log.debug("Could not open %s: %s", port, e)
+        return None
+    try:
+        device = Scc1ShdlcDevice(ShdlcConnection(shdlc_port))
+        try:
+            product_name = device.transceive(0xD0, [0x01], timeout=timeout).rstrip(b'\x00')
+        except Exception as e:  # noqa
+            log.debug("No SCC1 cable found on %s: %s", port, e)
+            return None
+        if not product_name.startswith(b'SCC1'):
+            log.debug("Device on %s is not a SCC1 cable: %r", port, product_name)
+            return None
+        if hasattr(shdlc_port, 'additional_response_time'):
+            shdlc_port.additional_response_time = ADDITIONAL_RESPONSE_TIME
+        device.load_identity()
+        i2c_addresses = device.perform_i2c_scan() if scan_i2c else []
+        return Scc1CableInfo(port, device.serial_number, str(device.firmware_version), device.sensor_type,
+                             device.i2c_address, i2c_addresses)
+    finally:
+        shdlc_port.close()
+
+
+def _probe_or_warn(port: str, baudrate: int, timeout: float, scan_i2c: bool,
+                   port_factory: PortFactory) -> Optional[Scc1CableInfo]:
+    try:
+        return probe_cable(port, baudrate, timeout, scan_i2c, port_factory)
+    except Exception as e:  # noqa
+        log.warning("SCC1 cable on %s responded, but could not be identified: %s", port, e)
+        return None
+
+
+def discover_cables(ports: Optional[Sequence[str]] = None, baudrate: int = 115200,
+                    timeout: float = IDENTIFICATION_TIMEOUT, scan_i2c: bool = True, max_workers: Optional[int] = None,
+                    port_factory: PortFactory = _open_serial_port) -> List[Scc1CableInfo]:
+    """
+    Probe serial ports in parallel and return the inventory of the connected SCC1 cables.
+
+    Every port is probed by its own thread, so the discovery takes about as long as probing the slowest port instead
+    of the sum of all timeouts. The ports are closed after probing. Cables that respond as SCC1 cable but fail later
+    requests are logged as warning and left out.
+
+    Usage::
+
+        for cable in discover_cables():
+            print(cable.port, cable.serial_number, [hex(a) for a in cable.i2c_addresses])
+
+    :param ports: Names of the serial ports to probe (default: all FTDI ports, see candidate_ports)
+    :param baudrate: Baudrate of the cables in bit/s
+    :param timeout: Response timeout in seconds of the first request to every port
+    :param scan_i2c: Scan the I2C bus of every cable for connected sensors
+    :param max_workers: Maximum number of ports probed at the same time (default: all ports)
+    :param port_factory: Callable opening a ShdlcPort from the port name and the baudrate
+    :return: The found cables in the order of the ports
+    """
+    if ports is None:
+        ports = candidate_ports()
+    if not ports:
+        return []
+    with ThreadPoolExecutor(max_workers=max_workers or len(ports), thread_name_prefix='scc1-discovery') as executor:
+        results = executor.map(lambda p: _probe_or_warn(p, baudrate, timeout, scan_i2c, port_factory), ports)
+        return [info for info in results if info is not None]
@@ -0,0 +1,548 @@
+# -*- coding: utf-8 -*-
+
+"""
+Software stand-in for the SCC1 cable.
+
+The emulator implements the :py:class:`~sensirion_shdlc_driver.port.ShdlcPort` interface and can therefore be used
+with a plain :py:class:`~sensirion_shdlc_driver.ShdlcConnection`. It answers the SHDLC commands used by
+:py:class:`~sensirion_uart_scc1.scc1_shdlc_device.Scc1ShdlcDevice` and
+:py:class:`~sensirion_uart_scc1.drivers.scc1_sf06.Scc1Sf06` and simulates the continuous measurement buffer of the
+cable, including the loss of data when the buffer is not read out fast enough.
+"""
+
+import math
+import struct
+import time
+from threading import RLock
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sensirion_shdlc_driver.errors import ShdlcTimeoutError
+from sensirion_shdlc_driver.port import ShdlcPort
+
+#: SHDLC state codes used by the emulator
+STATE_OK = 0x00
+STATE_ILLEGAL_DATA_SIZE = 0x01
+STATE_UNKNOWN_COMMAND = 0x02
+STATE_PARAMETER_ERROR = 0x04
+STATE_SENSOR_BUSY = 0x21
+STATE_I2C_NACK = 0x22
+
+#: Maximum payload of a SHDLC frame
+MAX_FRAME_PAYLOAD = 255
+
+_ESCAPED_BYTES = (0x7E, 0x7D, 0x11, 0x13)
+
+#: SF06 I2C commands understood by the emulated sensor
+SF06_I2C_STOP_MEASUREMENT = 0x3FF9
+SF06_I2C_READ_PRODUCT_ID_1 = 0x367C
+SF06_I2C_READ_PRODUCT_ID_2 = 0xE102
+
+
+def sensirion_crc8(data: bytes) -> int:
+    """
+    Compute the CRC-8 checksum used by the Sensirion I2C sensors (polynomial 0x31, init 0xFF).
+
+    :param data: The data to compute the checksum for
+    :return: The checksum
+    """
+    crc = 0xFF
+    for byte in data:
+        crc ^= byte
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x31) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+    return crc
+
+
+def _stuffed_frame_length(frame_content: int, payload: bytes) -> int:
+    """
+    :param frame_content: Number of header and checksum bytes of the frame
+    :param payload: The frame payload
+    :return: Number of bytes of the frame on the wire including start/stop bytes and byte stuffing
+    """
+    escapes = sum(payload.count(b) for b in _ESCAPED_BYTES)
+    return 2 + frame_content + len(payload) + escapes
+
+
+class Scc1EmulatedSf06Sensor:
+    """
+    Model of a SF06 based sensor (e.g. SLF3x) attached to the emulated cable.
+
+    By default, the sensor delivers a slow sine on the flow signal, a constant temperature and no flags. A custom
+    signal source can be supplied that returns the raw (unscaled) signals for a given sample index.
+    """
+
+    def __init__(self, product_id: int = 0x07030402, serial_number: int = 0x12345678, scale_factor: int = 500,
+                 flow_unit: int = 0x0845, i2c_address: int = 0x08, min_interval_ms: float = 1.0,
+                 signal_source: Optional[Callable[[int], Tuple[int, ...]]] = None) -> None:
+        """
+        Initialize the emulated sensor.
+
+        :param product_id: The 32-bit product id reported by the sensor
+        :param serial_number: The 64-bit serial number reported by the sensor
+        :param scale_factor: Flow scale factor reported for every measurement command
+        :param flow_unit: Raw flow unit reported for every measurement command (default: ml/min)
+        :param i2c_address: The I2C address the sensor responds to
+        :param min_interval_ms: Sampling interval used when the measurement is started with interval 0
+        :param signal_source: Callable returning the raw signals for a sample index. All returned tuples must have
+            the same length (at least flow, temperature and flags).
+        """
+        self.product_id = product_id
+        self.serial_number = serial_number
+        self.scale_factor = scale_factor
+        self.flow_unit = flow_unit
+        self.i2c_address = i2c_address
+        self.min_interval_ms = min_interval_ms
+        self._signal_source = signal_source or self._default_signal
+        self.num_signals = len(self._signal_source(0))
+
+    def sample(self, index: int) -> Tuple[int, ...]:
+        """
+        :param index: The index of the sample since the start of the measurement
+        :return: The raw signals of the sample
+        """
+        return self._signal_source(index)
+
+    @staticmethod
+    def _default_signal(index: int) -> Tuple[int, int, int]:
+        flow = int(1000 * math.sin(index / 100.0))
+        return flow, 23 * 200, 0
+
+
+class Scc1EmulatorPort(ShdlcPort):
+    """
+    Emulated SCC1 cable that plugs in under a ShdlcConnection.
+
+    Every exchanged frame is delayed by the configured per-frame latency plus the time the request and response
+    frames would need on the serial line with the configured baudrate. The clock and sleep function can be replaced
+    in order to run the emulator in simulated time.
+    """
+
+    def __init__(self, sensor: Optional[Scc1EmulatedSf06Sensor] = None, baudrate: int = 115200,
+                 frame_latency: float = 0.0, simulate_transfer_time: bool = True, buffer_size: int = 2048,
+                 serial_number: str = 'EMU00001', firmware_version: Tuple[int, int] = (1, 9),
+                 clock: Callable[[], float] = time.perf_counter,
+                 sleep: Callable[[float], None] = time.sleep) -> None:
+        """
+        Initialize the emulated cable.
+
+        :param sensor: The sensor attached to the cable. If None, a default SF06 sensor is attached.
+        :param baudrate: The simulated baudrate in bit/s
+        :param frame_latency: Additional delay in seconds for every exchanged frame (USB latency, firmware)
+        :param simulate_transfer_time: If True, the serial transfer time of request and response is simulated
+        :param buffer_size: Size of the continuous measurement buffer in bytes
+        :param serial_number: The serial number of the cable
+        :param firmware_version: The firmware version of the cable as (major, minor)
+        :param clock: Monotonic clock in seconds
+        :param sleep: Function used to wait for the simulated transfer time
+        """
+        super().__init__()
+        self._lock = RLock()
+        self._is_open = True
+        self._bitrate = baudrate
+        self.frame_latency = frame_latency
+        self.simulate_transfer_time = simulate_transfer_time
+        self.sensor = sensor or Scc1EmulatedSf06Sensor()
+        self._buffer_size = buffer_size
+        self._cable_serial_number = serial_number
+        self._firmware_version = firmware_version
+        self._clock = clock
+        self._sleep = sleep
+        self._user_data = [bytes(20) for _ in range(5)]
+        self._sensor_type: Optional[int] = 3
+        self._i2c_address = self.sensor.i2c_address
+        self._sensor_voltage = 0
+        self._i2c_delay_us = 0
+        self._totalizer_enabled = False
+        self._totalizer_value = 0
+        self._i2c_measurement_command: Optional[int] = None
+        self._i2c_read_pointer: Optional[int] = None
+        self._i2c_start_time = 0.0
+        self._responses_to_drop = 0
+        self._reset_measurement()
+        self._handlers: Dict[int, Callable[[bytes], Tuple[int, bytes]]] = {
+            0x21: self._user_data_command,
+            0x22: self._selftest_command,
+            0x23: self._sensor_voltage_command,
+            0x24: self._sensor_type_command,
+            0x25: self._sensor_address_command,
+            0x26: self._measure_voltage_command,
+            0x28: self._i2c_delay_command,
+            0x29: self._i2c_scan_command,
+            0x2A: self._i2c_transceive_command,
+            0x30: self._sensor_status_command,
+            0x33: self._continuous_measurement_command,
+            0x34: self._stop_measurement_command,
+            0x35: self._last_measurement_command,
+            0x36: self._read_buffer_command,
+            0x37: self._totalizer_status_command,
+            0x38: self._totalizer_value_command,
+            0x39: self._reset_totalizer_command,
+            0x50: self._sensor_product_command,
+            0x53: self._flow_unit_and_scale_command,
+            0x54: self._sensor_serial_command,
+            0x65: self._sensor_reset_command,
+            0x90: self._slave_address_command,
+            0x91: self._baudrate_command,
+            0xD0: self._device_info_command,
+            0xD1: self._version_command,
+            0xD3: self._device_reset_command,
+        }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
+    def description(self) -> str:
+        return f'scc1-emulator-{self._cable_serial_number}@{self._bitrate}'
+
+    @property
+    def bitrate(self) -> int:
+        return self._bitrate
+
+    @bitrate.setter
+    def bitrate(self, bitrate: int) -> None:
+        self._bitrate = bitrate
+
+    @property
+    def lock(self) -> RLock:
+        return self._lock
+
+    @property
+    def is_open(self) -> bool:
+        return self._is_open
+
+    def open(self) -> None:
+        self._is_open = True
+
+    def close(self) -> None:
+        self._is_open = False
+
+    @property
+    def bytes_lost(self) -> int:
+        """Number of bytes lost since the last buffer read out"""
+        with self._lock:
+            self._update_buffer(self._clock())
+            return self._bytes_lost
+
+    @property
+    def buffered_bytes(self) -> int:
+        """Number of bytes currently stored in the continuous measurement buffer"""
+        with self._lock:
+            self._update_buffer(self._clock())
+            return len(self._buffer)
+
+    def drop_responses(self, count: int = 1) -> None:
+        """
+        Simulate lost frames: the next requests are executed, but their responses never arrive.
+
+        :param count: Number of responses to drop
+        """
+        with self._lock:
+            self._responses_to_drop += count
+
+    def transfer_time(self, request_length: int, response_length: int) -> float:
+        """
+        Compute the time needed to exchange one request and one response frame.
+
+        :param request_length: Number of bytes of the request frame on the wire
+        :param response_length: Number of bytes of the response frame on the wire
+        :return: The transfer time in seconds including the per-frame latency
+        """
+        wire_time = 0.0
+        if self.simulate_transfer_time:
+            # start bit + 8 data bits + stop bit
+            wire_time = (request_length + response_length) * 10.0 / self._bitrate
+        return self.frame_latency + wire_time
+
+    def transceive(self, slave_address, command_id, data, response_timeout):
+        """
+        Handle one SHDLC request and return the response frame content.
+
+        :param slave_address: Slave address.
+        :param command_id: SHDLC command ID.
+        :param data: Payload.
+        :param response_timeout: Response timeout in seconds (not used by the emulator)
+        :return: Received address, command_id, state, and payload.
+        """
+        with self._lock:
+            data = bytes(bytearray(data))
+            state, response = self.handle_request(command_id, data)
+            if self._responses_to_drop:
+                self._responses_to_drop -= 1
+                self._sleep(response_timeout)
+                raise ShdlcTimeoutError()
+            delay = self.transfer_time(_stuffed_frame_length(4, data), _stuffed_frame_length(5, response))
+            if delay > 0.0:
+                self._sleep(delay)
+            return slave_address, command_id, state, response
+
+    def transceive_many(self, slave_address, requests):
+        """
+        Handle several pipelined SHDLC requests. The frame latency is paid once for the whole burst.
+
+        :param slave_address: Slave address.
+        :param requests: Tuples with (command id, data, response timeout)
+        :return: The responses as tuples with (address, command_id, state, payload)
+        """
+        with self._lock:
+            responses = []
+            wire_bytes = 0
+            for command_id, data, _ in requests:
+                data = bytes(bytearray(data))
+                state, response = self.handle_request(command_id, data)
+                wire_bytes += _stuffed_frame_length(4, data) + _stuffed_frame_length(5, response)
+                responses.append((slave_address, command_id, state, response))
+            delay = self.transfer_time(wire_bytes, 0)
+            if delay > 0.0:
+                self._sleep(delay)
+            return responses
+
+    def handle_request(self, command_id: int, data: bytes) -> Tuple[int, bytes]:
+        """
+        Interpret a request without simulating any transfer time.
+
+        :param command_id: SHDLC command ID.
+        :param data: Payload.
+        :return: The SHDLC state and the response payload
+        """
+        with self._lock:
+            handler = self._handlers.get(command_id)
+            if handler is None:
+                return STATE_UNKNOWN_COMMAND, b''
+            self._update_buffer(self._clock())
+            try:
+                return handler(data)
+            except struct.error:
+                return STATE_ILLEGAL_DATA_SIZE, b''
+
+    def _reset_measurement(self) -> None:
+        self._measurement_interval_ms: Optional[int] = None
+        self._measurement_command = 0
+        self._measurement_start = 0.0
+        self._samples_produced = 0
+        self._buffer = bytearray()
+        self._bytes_lost = 0
+        self._last_sample: Optional[Tuple[int, ...]] = None
+
+    def _sample_period(self) -> float:
+        interval_ms = self._measurement_interval_ms or self.sensor.min_interval_ms
+        return interval_ms / 1000.0
+
+    def _update_buffer(self, now: float) -> None:
+        """Produce all samples that became due since the last update"""
+        if self._measurement_interval_ms is None:
+            return
+        due = int((now - self._measurement_start) / self._sample_period())
+        new_samples = due - self._samples_produced
+        if new_samples <= 0:
+            return
+        sample_size = 2 * self.sensor.num_signals
+        stored = min(new_samples, max(0, (self._buffer_size - len(self._buffer)) // sample_size))
+        fmt = '>' + 'h' * self.sensor.num_signals
+        first = self._samples_produced
+        for index in range(first, first + stored):
+            sample = self.sensor.sample(index)
+            self._buffer.extend(struct.pack(fmt, *sample))
+            if self._totalizer_enabled:
+                self._totalizer_value += sample[0]
+        if stored < new_samples:
+            # the buffer is full, the remaining samples are lost
+            self._bytes_lost += (new_samples - stored) * sample_size
+            if self._totalizer_enabled:
+                self._totalizer_value += sum(self.sensor.sample(i)[0] for i in range(first + stored, due))
+        self._last_sample = self.sensor.sample(due - 1)
+        self._samples_produced = due
+
+    def _start_measurement(self, interval_ms: int, command: int) -> None:
+        self._reset_measurement()
+        self._measurement_interval_ms = interval_ms
+        self._measurement_command = command
+        self._measurement_start = self._clock()
+
+    def _user_data_command(self, data: bytes) -> Tuple[int, bytes]:
+        if len(data) not in (1, 21):
+            return STATE_ILLEGAL_DATA_SIZE, b''
+        block = data[0]
+        if block >= len(self._user_data):
+            return STATE_PARAMETER_ERROR, b''
+        if len(data) == 21:
+            self._user_data[block] = bytes(data[1:])
+            return STATE_OK, b''
+        return STATE_OK, bytes([block]) + self._user_data[block]
+
+    def _selftest_command(self, data: bytes) -> Tuple[int, bytes]:
+        return STATE_OK, struct.pack('>H', 0)
+
+    def _sensor_voltage_command(self, data: bytes) -> Tuple[int, bytes]:
+        if data:
+            if data[0] not in (0, 1):
+                return STATE_PARAMETER_ERROR, b''
+            self._sensor_voltage = data[0]
+            return STATE_OK, b''
+        return STATE_OK, bytes([self._sensor_voltage])
+
+    def _sensor_type_command(self, data: bytes) -> Tuple[int, bytes]:
+        if data:
+            if data[0] > 4:
+                return STATE_PARAMETER_ERROR, b''
+            self._sensor_type = data[0]
+            return STATE_OK, b''
+        if self._sensor_type is None:
+            return STATE_OK, b''
+        return STATE_OK, bytes([self._sensor_type])
+
+    def _sensor_address_command(self, data: bytes) -> Tuple[int, bytes]:
+        if data:
+            if data[0] > 127:
+                return STATE_PARAMETER_ERROR, b''
+            self._i2c_address = data[0]
+            return STATE_OK, b''
+        return STATE_OK, bytes([self._i2c_address])
+
+    def _measure_voltage_command(self, data: bytes) -> Tuple[int, bytes]:
+        return STATE_OK, struct.pack('>H', 5000 if self._sensor_voltage else 3300)
+
+    def _i2c_delay_command(self, data: bytes) -> Tuple[int, bytes]:
+        if data:
+            self._i2c_delay_us = struct.unpack('>H', data)[0]
+            return STATE_OK, b''
+        return STATE_OK, struct.pack('>H', self._i2c_delay_us)
+
+    def _i2c_scan_command(self, data: bytes) -> Tuple[int, bytes]:
+        return STATE_OK, bytes([self.sensor.i2c_address])
+
+    def _i2c_transceive_command(self, data: bytes) -> Tuple[int, bytes]:
+        address, tx_size, rx_length, _ = struct.unpack('>BBBH', data[:5])
+        tx_data = data[5:5 + tx_size]
+        if address != self.sensor.i2c_address:
+            return STATE_I2C_NACK, b''
+        if len(tx_data) >= 2:
+            self._i2c_write(struct.unpack('>H', tx_data[:2])[0])
+        if rx_length == 0:
+            return STATE_OK, b''
+        return self._i2c_read(rx_length)
+
+    def _i2c_write(self, i2c_command: int) -> None:
+        if i2c_command == SF06_I2C_STOP_MEASUREMENT:
+            self._i2c_measurement_command = None
+        elif i2c_command in (SF06_I2C_READ_PRODUCT_ID_1, SF06_I2C_READ_PRODUCT_ID_2):
+            self._i2c_read_pointer = i2c_command
+        elif (i2c_command >> 8) == 0x36:
+            self._i2c_measurement_command = i2c_command
+            self._i2c_start_time = self._clock()
+
+    def _i2c_read(self, rx_length: int) -> Tuple[int, bytes]:
+        if self._i2c_read_pointer is not None:
+            words = list(struct.unpack('>HHHHHH', struct.pack('>IQ', self.sensor.product_id,
+                                                              self.sensor.serial_number)))
+            self._i2c_read_pointer = None
+        elif self._i2c_measurement_command is not None:
+            index = int((self._clock() - self._i2c_start_time) / (self.sensor.min_interval_ms / 1000.0))
+            words = [value & 0xFFFF for value in self.sensor.sample(index)]
+        else:
+            return STATE_I2C_NACK, b''
+        response = bytearray()
+        for word in words:
+            packed = struct.pack('>H', word)
+            response.extend(packed)
+            response.append(sensirion_crc8(packed))
+        return STATE_OK, bytes(response[:rx_length])
+
+    def _sensor_status_command(self, data: bytes) -> Tuple[int, bytes]:
+        status = 0x00
+        if self._measurement_interval_ms is not None:
+            status |= 0x02
+        return STATE_OK, bytes([status])
+
+    def _continuous_measurement_command(self, data: bytes) -> Tuple[int, bytes]:
+        if not data:
+            if self._measurement_interval_ms is None:
+                return STATE_OK, b''
+            return STATE_OK, struct.pack('>H', self._measurement_interval_ms)
+        if len(data) == 2:
+            interval_ms, = struct.unpack('>H', data)
+            command = self._measurement_command
+        else:
+            interval_ms, command = struct.unpack('>HH', data)
+        if self._measurement_interval_ms is not None:
+            return STATE_SENSOR_BUSY, b''
+        self._start_measurement(interval_ms, command)
+        return STATE_OK, b''
+
+    def _stop_measurement_command(self, data: bytes) -> Tuple[int, bytes]:
+        self._measurement_interval_ms = None
+        return STATE_OK, b''
+
+    def _last_measurement_command(self, data: bytes) -> Tuple[int, bytes]:
+        if self._measurement_interval_ms is None:
+            self._start_measurement(0, self._measurement_command)
+            return STATE_OK, b''
+        if self._last_sample is None:
+            return STATE_OK, b''
+        return STATE_OK, struct.pack('>' + 'h' * len(self._last_sample), *self._last_sample)
+
+    def _read_buffer_command(self, data: bytes) -> Tuple[int, bytes]:
+        sample_size = 2 * self.sensor.num_signals
+        max_bytes = (MAX_FRAME_PAYLOAD - 8) // sample_size * sample_size
+        chunk = bytes(self._buffer[:max_bytes])
+        del self._buffer[:max_bytes]
+        header = struct.pack('>IHH', self._bytes_lost, len(self._buffer), self.sensor.num_signals)
+        self._bytes_lost = 0
+        return STATE_OK, header + chunk
+
+    def _totalizer_status_command(self, data: bytes) -> Tuple[int, bytes]:
+        if data:
+            self._totalizer_enabled = bool(data[0])
+            return STATE_OK, b''
+        return STATE_OK, bytes([1 if self._totalizer_enabled else 0])
+
+    def _totalizer_value_command(self, data: bytes) -> Tuple[int, bytes]:
+        return STATE_OK, struct.pack('>q', self._totalizer_value)
+
+    def _reset_totalizer_command(self, data: bytes) -> Tuple[int, bytes]:
+        self._totalizer_value = 0
+        return STATE_OK, b''
+
+    def _sensor_product_command(self, data: bytes) -> Tuple[int, bytes]:
+        text = f'{self.sensor.product_id:08X}{self.sensor.serial_number:016X}'
+        return STATE_OK, text.encode('utf-8') + b'\x00'
+
+    def _flow_unit_and_scale_command(self, data: bytes) -> Tuple[int, bytes]:
+        struct.unpack('>H', data)
+        return STATE_OK, struct.pack('>HHH', self.sensor.scale_factor, self.sensor.flow_unit, 0)
+
+    def _sensor_serial_command(self, data: bytes) -> Tuple[int, bytes]:
+        return STATE_OK, f'{self.sensor.serial_number:016X}'.encode('utf-8') + b'\x00'
+
+    def _sensor_reset_command(self, data: bytes) -> Tuple[int, bytes]:
+        self._reset_measurement()
+        self._i2c_measurement_command = None
+        return STATE_OK, b''
+
+    def _slave_address_command(self, data: bytes) -> Tuple[int, bytes]:
+        if data:
+            return STATE_OK, b''
+        return STATE_OK, bytes([0])
+
+    def _baudrate_command(self, data: bytes) -> Tuple[int, bytes]:
+        if data:
+            self._bitrate = struct.unpack('>I', data)[0]
+            return STATE_OK, b''
+        return STATE_OK, struct.pack('>I', self._bitrate)
+
+    def _device_info_command(self, data: bytes) -> Tuple[int, bytes]:
+        info: List[str] = ['SCC1-EMU', 'SCC1', '1-101810-01', self._cable_serial_number]
+        if not data or data[0] >= len(info):
+            return STATE_PARAMETER_ERROR, b''
+        return STATE_OK, info[data[0]].encode('utf-8') + b'\x00'
+
+    def _version_command(self, data: bytes) -> Tuple[int, bytes]:
+        major, minor = self._firmware_version
+        return STATE_OK, bytes([major, minor, 0, 1, 0, 1, 0])
+
+    def _device_reset_command(self, data: bytes) -> Tuple[int, bytes]:
+        self._reset_measurement()
+        return STATE_OK, b''
@@ -13,3 +13,11 @@ class Scc1NotSupportedException(ValueError):
 
 class Scc1InvalidDataReceived(IOError):
     """Indicates the reception of invalid data from the device"""
+
+
+class Scc1ReplayError(IOError):
+    """Indicates a request that does not match the recording being replayed"""
+
+
+class Scc1DaemonError(IOError):
+    """Indicates an error reported by the acquisition daemon"""
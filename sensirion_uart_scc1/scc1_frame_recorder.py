@@ -0,0 +1,254 @@
+# -*- coding: utf-8 -*-
+
+"""
+Recording and replay of the SHDLC frames exchanged with a cable.
+
+Recordings are stored as JSON lines: a header line followed by one line per exchanged frame pair.
+"""
+
+import json
+import threading
+import time
+from typing import Callable, IO, Iterable, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+from sensirion_shdlc_driver.errors import ShdlcTimeoutError
+from sensirion_shdlc_driver.port import ShdlcPort
+
+from sensirion_uart_scc1.scc1_exceptions import Scc1ReplayError
+from sensirion_uart_scc1.scc1_shdlc_device import _transceive_pipelined
+
+#: Format identifier written to the header line of a recording
+RECORDING_FORMAT = 'scc1-shdlc-frames'
+RECORDING_FORMAT_VERSION = 1
+
+
+class RecordedFrame(NamedTuple):
+    """One request and its response"""
+    time: float  #: Time of the request in seconds since the start of the recording
+    duration: float  #: Time in seconds until the response was received or the request timed out
+    address: int
+    command: int
+    data: bytes
+    state: Optional[int]  #: State of the response, None if the request timed out
+    response: bytes
+
+    def to_json(self) -> str:
+        return json.dumps({'time': round(self.time, 6), 'duration': round(self.duration, 6), 'address': self.address,
+                           'command': self.command, 'data': self.data.hex(), 'state': self.state,
+                           'response': self.response.hex()})
+
+    @classmethod
+    def from_json(cls, line: str) -> 'RecordedFrame':
+        item = json.loads(line)
+        return cls(item['time'], item['duration'], item['address'], item['command'], bytes.fromhex(item['data']),
+                   item['state'], bytes.fromhex(item['response']))
+
+
+def load_recording(path: str) -> List[RecordedFrame]:
+    """
+    Load a recording written by Scc1RecordingPort.
+
+    :param path: Path of the recording
+    :return: The recorded frames
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        header = json.loads(f.readline() or '{}')
+        if header.get('format') != RECORDING_FORMAT or header.get('version') != RECORDING_FORMAT_VERSION:
+            raise ValueError(f"{path} is not a SHDLC frame recording")
+        return [RecordedFrame.from_json(line) for line in f if line.strip()]
+
+
+class Scc1RecordingPort(ShdlcPort):
+    """
+    ShdlcPort wrapper that records every exchanged frame pair with its timing.
+
+    Usage::
+
+        port = Scc1RecordingPort(ShdlcSerialPort(port='COM1', baudrate=115200), 'session.jsonl')
+        device = Scc1ShdlcDevice(ShdlcConnection(port))
+    """
+
+    def __init__(self, port: ShdlcPort, path: Optional[str] = None,
+                 clock: Callable[[], float] = time.perf_counter) -> None:
+        """
+        Wrap a port.
+
+        :param port: The port to record
+        :param path: File the frames are written to. Without a path, the frames are kept in memory.
+        :param clock: Clock in seconds used for the timing
+        """
+        super().__init__()
+        self._port = port
+        self._clock = clock
+        self._start = clock()
+        self._frames: List[RecordedFrame] = []
+        self._lock = threading.Lock()
+        self._file: Optional[IO[str]] = None
+        if path is not None:
+            self._file = open(path, 'w', encoding='utf-8')
+            self._file.write(json.dumps({'format': RECORDING_FORMAT, 'version': RECORDING_FORMAT_VERSION,
+                                         'description': port.description, 'bitrate': port.bitrate}) + '\n')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
+    def frames(self) -> List[RecordedFrame]:
+        """The recorded frames, if no file is written"""
+        return self._frames
+
+    @property
+    def description(self):
+        return self._port.description
+
+    @property
+    def bitrate(self):
+        return self._port.bitrate
+
+    @bitrate.setter
+    def bitrate(self, bitrate):
+        self._port.bitrate = bitrate
+
+    @property
+    def lock(self):
+        return self._port.lock
+
+    @property
+    def is_open(self):
+        return self._port.is_open
+
+    def open(self):
+        self._port.open()
+
+    def close(self):
+        self._port.close()
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def transceive(self, slave_address, command_id, data, response_timeout):
+        data = bytes(bytearray(data))
+        start = self._clock()
+        try:
+            result = self._port.transceive(slave_address, command_id, data, response_timeout)
+        except ShdlcTimeoutError:
+            self._record(RecordedFrame(start - self._start, self._clock() - start, slave_address, command_id, data,
+                                       None, b''))
+            raise
+        self._record(RecordedFrame(start - self._start, self._clock() - start, slave_address, command_id, data,
+                                   result[2], bytes(result[3])))
+        return result
+
+    def transceive_many(self, slave_address: int, requests: Sequence[Tuple[int, bytes, float]]
+                        ) -> List[Tuple[int, int, int, bytes]]:
+        """
+        Forward pipelined requests and record every frame pair. The duration is the duration of the whole burst.
+        """
+        requests = [(command_id, bytes(bytearray(data)), timeout) for command_id, data, timeout in requests]
+        start = self._clock()
+        responses = _transceive_pipelined(self._port, slave_address, requests)
+        duration = self._clock() - start
+        for (command_id, data, _), response in zip(requests, responses):
+            self._record(RecordedFrame(start - self._start, duration, slave_address, command_id, data, response[2],
+                                       bytes(response[3])))
+        return responses
+
+    def _record(self, frame: RecordedFrame) -> None:
+        with self._lock:
+            if self._file is None:
+                self._frames.append(frame)
+            else:
+                self._file.write(frame.to_json() + '\n')
+
+
+class Scc1ReplayPort(ShdlcPort):
+    """
+    ShdlcPort that answers requests from a recording.
+
+    The requests must arrive in the recorded order. With speed 1.0 the responses are delayed as recorded, higher
+    speeds replay faster, speed None replays as fast as possible.
+    """
+
+    def __init__(self, recording: Union[str, Iterable[RecordedFrame]], speed: Optional[float] = None,
+                 strict: bool = True, description: str = 'scc1-replay', bitrate: int = 115200,
+                 clock: Callable[[], float] = time.perf_counter,
+                 sleep: Callable[[float], None] = time.sleep) -> None:
+        """
+        Initialize the replay.
+
+        :param recording: Path of a recording or the recorded frames
+        :param speed: Replay speed relative to the recording, None for maximum speed
+        :param strict: Raise Scc1ReplayError if a request differs from the recorded request
+        :param description: Description of the port
+        :param bitrate: Reported bitrate
+        :param clock: Clock in seconds
+        :param sleep: Function used to wait for the recorded timing
+        """
+        super().__init__()
+        self._frames = load_recording(recording) if isinstance(recording, str) else list(recording)
+        self._speed = speed
+        self._strict = strict
+        self._description = description
+        self._bitrate = bitrate
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.RLock()
+        self._is_open = True
+        self._position = 0
+        self._start: Optional[float] = None
+
+    @property
+    def description(self):
+        return self._description
+
+    @property
+    def bitrate(self):
+        return self._bitrate
+
+    @bitrate.setter
+    def bitrate(self, bitrate):
+        self._bitrate = bitrate
+
+    @property
+    def lock(self):
+        return self._lock
+
+    @property
+    def is_open(self):
+        return self._is_open
+
+    def open(self):
+        self._is_open = True
+
+    def close(self):
+        self._is_open = False
+
+    @property
+    def remaining(self) -> int:
+        """Number of frames not replayed yet"""
+        return len(self._frames) - self._position
+
+    def transceive(self, slave_address, command_id, data, response_timeout):
+        with self._lock:
+            if self._position >= len(self._frames):
+                raise Scc1ReplayError("The recording is exhausted")
+            frame = self._frames[self._position]
+            data = bytes(bytearray(data))
+            if self._strict and (frame.address, frame.command, frame.data) != (slave_address, command_id, data):
+                raise Scc1ReplayError(f"Request 0x{command_id:02X} {data.hex()} does not match recorded request "
+                                      f"0x{frame.command:02X} {frame.data.hex()} at frame {self._position}")
+            self._position += 1
+            if self._speed:
+                now = self._clock()
+                if self._start is None:
+                    self._start = now - frame.time / self._speed
+                wait = self._start + (frame.time + frame.duration) / self._speed - now
+                if wait > 0.0:
+                    self._sleep(wait)
+            if frame.state is None:
+                raise ShdlcTimeoutError()
+            return frame.address, frame.command, frame.state, frame.response
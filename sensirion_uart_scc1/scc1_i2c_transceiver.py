@@ -1,8 +1,12 @@
 # -*- coding: utf-8 -*-
 
-from struct import pack
-from typing import Optional, Any, Tuple
+from collections import deque
+from struct import pack, unpack
+from typing import Deque, Optional, Any, Tuple
 
+from sensirion_i2c_driver import CrcCalculator
+
+from sensirion_uart_scc1.drivers.slf_common import SlfMeasurementCommand
 from sensirion_uart_scc1.protocols.i2c_transceiver import RxTx, I2cTransceiver
 from sensirion_uart_scc1.protocols.shdlc_transceiver import ShdlcTransceiver
 
@@ -40,3 +44,94 @@ class Scc1I2cTransceiver(I2cTransceiver):
         if result is None or rx_length == 0:
             return bytearray()
         return result
+
+
+class Scc1BufferedI2cTransceiver(Scc1I2cTransceiver):
+    """
+    I2cTransceiver that serves the continuous measurement of SF06 sensors from the measurement buffer of the cable.
+
+    The start and stop continuous measurement commands of the public drivers are translated into the corresponding
+    commands of the cable (0x33 and 0x34). While the measurement runs, the cable samples the sensor with the
+    configured interval. Every read of measurement data returns the next buffered sample, so a public driver that
+    reads fast enough receives every sample. The buffer of the cable is only read when all locally buffered samples
+    are consumed, 41 samples per round trip. When no new sample is available, the newest sample is returned again,
+    as the sensor itself does. All other commands are passed to the sensor unchanged.
+
+    The cable must be configured for SF06 sensors (sensor type 3).
+    """
+
+    #: Start continuous measurement commands of SF06 sensors
+    START_COMMANDS = frozenset(SlfMeasurementCommand.MEASUREMENT_COMMANDS.values())
+    STOP_COMMAND = 0x3FF9
+    SENSOR_TYPE = 3
+
+    def __init__(self, device: ShdlcTransceiver, interval_ms: int = 0, max_buffered_samples: int = 100_000) -> None:
+        """
+        :param device: The SCC1 device
+        :param interval_ms: Measurement interval used by the cable (0: as fast as possible)
+        :param max_buffered_samples: Maximum number of samples kept on the host, older samples are dropped
+        """
+        super().__init__(device)
+        self._interval_ms = interval_ms
+        self._samples: Deque[bytes] = deque(maxlen=max_buffered_samples)
+        self._last_sample: Optional[bytes] = None
+        self._measuring = False
+        self._bytes_lost = 0
+        self._crc = CrcCalculator(8, 0x31, 0xFF, 0x00)
+
+    @property
+    def is_measuring(self) -> bool:
+        return self._measuring
+
+    @property
+    def bytes_lost(self) -> int:
+        """Number of bytes reported as lost by the cable"""
+        return self._bytes_lost
+
+    def transceive(self, target_address: int, tx_data: Optional[bytes], rx_length: Optional[int], read_delay: float,
+                   timeout: float = 0.01) -> bytes:
+        """Implements the I2cTransceiver protocol"""
+        command = unpack('>H', tx_data)[0] if tx_data is not None and len(tx_data) == 2 else None
+        if command in self.START_COMMANDS:
+            self._samples.clear()
+            self._last_sample = None
+            self._scc1.transceive(0x33, pack('>HH', self._interval_ms, command), 0.01)
+            self._measuring = True
+            return bytearray()
+        if command == self.STOP_COMMAND and self._measuring:
+            self._scc1.transceive(0x34, [], 0.01)
+            self._measuring = False
+            return bytearray()
+        if self._measuring and not tx_data and rx_length and rx_length % 3 == 0 and rx_length <= 9:
+            return self._next_sample()[:rx_length]
+        return super().transceive(target_address, tx_data, rx_length, read_delay, timeout)
+
+    def _next_sample(self) -> bytes:
+        if not self._samples:
+            self._read_buffer()
+        if self._samples:
+            self._last_sample = self._samples.popleft()
+        elif self._last_sample is None:
+            data = self._scc1.transceive(0x35, [self.SENSOR_TYPE], 0.01)
+            if len(data) >= 6:
+                self._last_sample = self._encode(data[:6])
+        return self._last_sample or bytearray()
+
+    def _read_buffer(self) -> None:
+        data = self._scc1.transceive(0x36, [self.SENSOR_TYPE], 0.01)
+        if not data:
+            return
+        bytes_lost, _, num_signals = unpack('>IHH', data[:8])
+        self._bytes_lost += bytes_lost
+        sample_size = 2 * num_signals
+        for start in range(8, len(data) - sample_size + 1, sample_size):
+            self._samples.append(self._encode(data[start:start + 6]))
+
+    def _encode(self, words: bytes) -> bytes:
+        """Add the CRC of the sensor to flow, temperature and flags"""
+        encoded = bytearray()
+        for i in range(0, 6, 2):
+            word = words[i:i + 2]
+            encoded += word
+            encoded.append(self._crc(word))
+        return bytes(encoded)
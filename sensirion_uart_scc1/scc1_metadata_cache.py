@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+
+import json
+import logging
+import os
+import tempfile
+import threading
+from typing import Any, Dict, Optional
+
+log = logging.getLogger(__name__)
+
+#: Version of the file format, files with another version are ignored
+CACHE_FORMAT_VERSION = 1
+
+
+class Scc1MetadataCache:
+    """
+    File backed store for sensor metadata that never changes for a given sensor, e.g. the identity, part name, flow
+    unit and scale factor.
+
+    The entries are grouped by the serial number of the cable. A connection validates the entries of its cable once
+    with validate(), which discards them when the cable reports another firmware version. The identity and part name
+    of the attached sensor are stored per cable, so the cable must be invalidated when its sensor is replaced. Entries
+    read with the identity of the sensor, e.g. the flow unit and scale factor, are keyed by its product id and serial
+    number.
+
+    Usage::
+
+        cache = Scc1MetadataCache('~/.cache/scc1_metadata.json')
+        device = Scc1ShdlcDevice(ShdlcConnection(port), metadata_cache=cache)
+    """
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        """
+        Initialize the cache and load the file, if it exists.
+
+        :param path: Path of the cache file. Without a path, the cache is kept in memory only.
+        """
+        self._path = os.path.expanduser(path) if path else None
+        self._lock = threading.Lock()
+        self._cables: Dict[str, Dict[str, Any]] = {}
+        self.load()
+
+    @property
+    def path(self) -> Optional[str]:
+        return self._path
+
+    def load(self) -> None:
+        """
+        Replace the content of the cache with the content of the file. Unreadable files are ignored.
+        """
+        cables: Dict[str, Dict[str, Any]] = {}
+        if self._path and os.path.exists(self._path):
+            try:
+                with open(self._path, 'r', encoding='utf-8') as f:
+                    content = json.load(f)
+                if content.get('version') == CACHE_FORMAT_VERSION:
+                    cables = content['cables']
+            except (OSError, ValueError, KeyError, AttributeError) as e:
+                log.warning("Ignoring metadata cache %s: %s", self._path, e)
+        with self._lock:
+            self._cables = cables
+
+    def save(self) -> None:
+        """
+        Write the cache to the file. The file is replaced atomically.
+        """
+        if not self._path:
+            return
+        with self._lock:
+            content = json.dumps({'version': CACHE_FORMAT_VERSION, 'cables': self._cables}, indent=1, sort_keys=True)
+        directory = os.path.dirname(os.path.abspath(self._path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.scc1_metadata_')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(content)
+            os.replace(tmp_path, self._path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def validate(self, cable_serial: str, firmware_version: str) -> None:
+        """
+        Discard the entries of a cable if they were stored with another firmware version.
+
+        :param cable_serial: The serial number of the cable
+        :param firmware_version: The firmware version reported by the cable
+        """
+        with self._lock:
+            cable = self._cables.get(cable_serial)
+            if cable is not None and cable.get('firmware') == firmware_version:
+                return
+            self._cables[cable_serial] = {'firmware': firmware_version, 'sensors': {}}
+        if cable is not None:
+            self.save()
+
+    def lookup(self, cable_serial: str, sensor_key: str, field: str) -> Optional[Any]:
+        """
+        Look up a cached value. The entries of the cable must have been validated.
+
+        :param cable_serial: The serial number of the cable
+        :param sensor_key: The key of the sensor, e.g. product id and serial number
+        :param field: The name of the value
+        :return: The cached value, None if not cached
+        """
+        with self._lock:
+            cable = self._cables.get(cable_serial)
+            if cable is None:
+                return None
+            return cable['sensors'].get(sensor_key, {}).get(field)
+
+    def store(self, cable_serial: str, sensor_key: str, field: str, value: Any) -> None:
+        """
+        Store a value and save the cache. The entries of the cable should have been validated, otherwise they are
+        discarded by the next validation.
+
+        :param cable_serial: The serial number of the cable
+        :param sensor_key: The key of the sensor, e.g. product id and serial number
+        :param field: The name of the value
+        :param value: A JSON serializable value
+        """
+        with self._lock:
+            cable = self._cables.setdefault(cable_serial, {'firmware': None, 'sensors': {}})
+            cable['sensors'].setdefault(sensor_key, {})[field] = value
+        self.save()
+
+    def invalidate(self, cable_serial: Optional[str] = None) -> None:
+        """
+        Remove the entries of one cable or of all cables and save the cache.
+
+        :param cable_serial: The serial number of the cable, None for all cables
+        """
+        with self._lock:
+            if cable_serial is None:
+                self._cables.clear()
+            else:
+                self._cables.pop(cable_serial, None)
+        self.save()
@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+
+import threading
+from bisect import bisect_left
+from typing import Dict, List, Mapping, NamedTuple, Sequence, Tuple
+
+#: Upper bounds of the latency histogram buckets in seconds
+LATENCY_BUCKETS = (0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0, 3.0)
+
+#: Outcomes of a command
+OUTCOME_OK = 'ok'
+OUTCOME_TIMEOUT = 'timeout'
+OUTCOME_ERROR = 'error'
+
+
+class Scc1CommandStatistics(NamedTuple):
+    """Statistics of one SHDLC command"""
+    count: int
+    timeouts: int
+    errors: int
+    bytes_sent: int
+    bytes_received: int
+    latency_sum: float
+    latency_buckets: Tuple[int, ...]  #: Cumulative counts per bucket of LATENCY_BUCKETS, followed by +Inf
+
+
+class Scc1MetricsSnapshot(NamedTuple):
+    """Consistent copy of all metrics of one cable"""
+    commands: Dict[int, Scc1CommandStatistics]
+    buffer_reads: int
+    samples_decoded: int
+    bytes_lost: int
+
+
+class _CommandCounters:
+    __slots__ = ('count', 'timeouts', 'errors', 'bytes_sent', 'bytes_received', 'latency_sum', 'buckets')
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.latency_sum = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+
+
+class Scc1Metrics:
+    """
+    Counters for the SHDLC commands and the measurement buffer of one cable.
+
+    The metrics are opt-in: pass an instance to Scc1ShdlcDevice. Without metrics, the transceive path only checks
+    for None.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._commands: Dict[int, _CommandCounters] = {}
+        self._buffer_reads = 0
+        self._samples_decoded = 0
+        self._bytes_lost = 0
+
+    def record_command(self, command_id: int, bytes_sent: int, bytes_received: int, latency: float,
+                       outcome: str = OUTCOME_OK) -> None:
+        """
+        Record one executed command.
+
+        :param command_id: The SHDLC command id
+        :param bytes_sent: Payload bytes sent
+        :param bytes_received: Payload bytes received
+        :param latency: Time in seconds until the response was received or the command failed
+        :param outcome: One of OUTCOME_OK, OUTCOME_TIMEOUT, OUTCOME_ERROR
+        """
+        with self._lock:
+            counters = self._commands.get(command_id)
+            if counters is None:
+                counters = self._commands[command_id] = _CommandCounters()
+            counters.count += 1
+            counters.bytes_sent += bytes_sent
+            counters.bytes_received += bytes_received
+            if outcome == OUTCOME_TIMEOUT:
+                counters.timeouts += 1
+            elif outcome == OUTCOME_ERROR:
+                counters.errors += 1
+            else:
+                counters.latency_sum += latency
+                counters.buckets[bisect_left(LATENCY_BUCKETS, latency)] += 1
+
+    def record_buffer_read(self, samples: int, bytes_lost: int) -> None:
+        """
+        Record one read out of the measurement buffer.
+
+        :param samples: Number of samples decoded
+        :param bytes_lost: Number of bytes the cable reported as lost
+        """
+        with self._lock:
+            self._buffer_reads += 1
+            self._samples_decoded += samples
+            self._bytes_lost += bytes_lost
+
+    def reset(self) -> None:
+        with self._lock:
+            self._commands.clear()
+            self._buffer_reads = 0
+            self._samples_decoded = 0
+            self._bytes_lost = 0
+
+    def snapshot(self) -> Scc1MetricsSnapshot:
+        """
+        :return: A copy of all metrics
+        """
+        with self._lock:
+            commands = {}
+            for command_id, c in self._commands.items():
+                cumulative = []
+                total = 0
+                for count in c.buckets:
+                    total += count
+                    cumulative.append(total)
+                commands[command_id] = Scc1CommandStatistics(c.count, c.timeouts, c.errors, c.bytes_sent,
+                                                             c.bytes_received, c.latency_sum, tuple(cumulative))
+            return Scc1MetricsSnapshot(commands, self._buffer_reads, self._samples_decoded, self._bytes_lost)
+
+
+def _format_labels(labels: Sequence[Tuple[str, str]]) -> str:
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in labels)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(labels, escaped)) + '}'
+
+
+def to_prometheus_text(metrics: Mapping[str, Scc1Metrics]) -> str:
+    """
+    Export the metrics of several cables in the Prometheus text exposition format.
+
+    :param metrics: The metrics keyed by the cable serial number
+    :return: The exposition text
+    """
+    families: Dict[str, Tuple[str, str, List[str]]] = {}
+
+    def add(name: str, kind: str, description: str, labels: Sequence[Tuple[str, str]], value: float) -> None:
+        family = name
+        for suffix in ('_bucket', '_sum', '_count'):
+            if kind == 'histogram' and name.endswith(suffix):
+                family = name[:-len(suffix)]
+        samples = families.setdefault(family, (kind, description, []))[2]
+        # counters are exported with all digits, rate() needs every increment
+        text = str(value) if isinstance(value, int) else repr(float(value))
+        samples.append(f'{name}{_format_labels(labels)} {text}')
+
+    latency_help = 'Latency of successful SHDLC commands in seconds'
+    for cable, cable_metrics in metrics.items():
+        snapshot = cable_metrics.snapshot()
+        for command_id, c in sorted(snapshot.commands.items()):
+            labels = [('cable', cable), ('command', f'0x{command_id:02X}')]
+            ok = c.count - c.timeouts - c.errors
+            for outcome, count in ((OUTCOME_OK, ok), (OUTCOME_TIMEOUT, c.timeouts), (OUTCOME_ERROR, c.errors)):
+                add('scc1_commands_total', 'counter', 'Number of SHDLC commands by outcome',
+                    labels + [('outcome', outcome)], count)
+            add('scc1_command_bytes_sent_total', 'counter', 'Payload bytes sent', labels, c.bytes_sent)
+            add('scc1_command_bytes_received_total', 'counter', 'Payload bytes received', labels, c.bytes_received)
+            for bound, count in zip(LATENCY_BUCKETS + (float('inf'),), c.latency_buckets):
+                le = '+Inf' if bound == float('inf') else f'{bound:g}'
+                add('scc1_command_latency_seconds_bucket', 'histogram', latency_help, labels + [('le', le)], count)
+            add('scc1_command_latency_seconds_sum', 'histogram', latency_help, labels, c.latency_sum)
+            add('scc1_command_latency_seconds_count', 'histogram', latency_help, labels, ok)
+        labels = [('cable', cable)]
+        add('scc1_buffer_reads_total', 'counter', 'Read outs of the measurement buffer', labels,
+            snapshot.buffer_reads)
+        add('scc1_samples_decoded_total', 'counter', 'Samples decoded from the measurement buffer', labels,
+            snapshot.samples_decoded)
+        add('scc1_bytes_lost_total', 'counter', 'Bytes reported as lost by the measurement buffer', labels,
+            snapshot.bytes_lost)
+
+    lines = []
+    for family, (kind, description, samples) in families.items():
+        lines.append(f'# HELP {family} {description}')
+        lines.append(f'# TYPE {family} {kind}')
+        lines.extend(samples)
+    return '\n'.join(lines) + '\n'
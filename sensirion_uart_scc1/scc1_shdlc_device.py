@@ -2,37 +2,131 @@
 
 import logging
 import struct
+import time
 from struct import unpack
-from typing import Optional, Iterable, Union, List
+from typing import Any, Callable, Optional, Iterable, Union, List, NamedTuple, Sequence, Tuple, TypeVar
 
 from packaging.version import Version
-from sensirion_shdlc_driver import ShdlcDevice, ShdlcConnection
+from sensirion_shdlc_driver import ShdlcDevice, ShdlcConnection, ShdlcSerialPort
 from sensirion_shdlc_driver.command import ShdlcCommand
+from sensirion_shdlc_driver.commands.device_info import ShdlcCmdGetSerialNumber
+from sensirion_shdlc_driver.commands.device_version import ShdlcCmdGetVersion
+from sensirion_shdlc_driver.errors import ShdlcResponseError, ShdlcTimeoutError
+from sensirion_shdlc_driver.serial_frame_builder import ShdlcSerialMisoFrameBuilder, ShdlcSerialMosiFrameBuilder
 
 from sensirion_uart_scc1.protocols.i2c_transceiver import I2cTransceiver
-from sensirion_uart_scc1.scc1_i2c_transceiver import Scc1I2cTransceiver
+from sensirion_uart_scc1.scc1_i2c_transceiver import Scc1BufferedI2cTransceiver, Scc1I2cTransceiver
+from sensirion_uart_scc1.scc1_metadata_cache import Scc1MetadataCache
+from sensirion_uart_scc1.scc1_metrics import OUTCOME_ERROR, OUTCOME_OK, OUTCOME_TIMEOUT, Scc1Metrics
+from sensirion_uart_scc1.scc1_timeout_policy import Scc1TimeoutPolicy
 
 log = logging.getLogger(__name__)
 
+T = TypeVar('T')
+
+#: Marker for identity attributes that were not read from the device yet
+_NOT_LOADED: Any = object()
+
+_FRAME_DELIMITER = 0x7E
+
+#: Size of one user data block in the EEPROM of the cable
+USER_DATA_BLOCK_SIZE = 20
+#: Number of user data blocks
+USER_DATA_BLOCK_COUNT = 5
+
+
+def _transceive_pipelined(port: Any, slave_address: int, requests: Sequence[Tuple[int, bytes, float]]
+                          ) -> List[Tuple[int, int, int, bytes]]:
+    """
+    Send several request frames before waiting for the first response.
+
+    Ports providing transceive_many (e.g. the emulator) are used directly. Frames to a ShdlcSerialPort are written
+    in one burst, so the round trip latency of the USB serial converter is paid only once. The burst uses internals
+    of ShdlcSerialPort, other ports and driver versions without these internals fall back to sequential transceive
+    calls. The burst bypasses the timeout policy of the device.
+
+    :param port: The ShdlcPort of the connection
+    :param slave_address: The SHDLC address of the device
+    :param requests: Tuples with (command id, data, response timeout)
+    :return: The raw responses as tuples with (address, command id, state, data)
+    """
+    if hasattr(port, 'transceive_many'):
+        return port.transceive_many(slave_address, requests)
+    serial = getattr(port, '_serial', None)
+    maximum_frame_time = getattr(port, '_calculate_maximum_frame_time', None)
+    if not isinstance(port, ShdlcSerialPort) or serial is None or maximum_frame_time is None:
+        return [port.transceive(slave_address, command_id, data, timeout) for command_id, data, timeout in requests]
+    with port.lock:
+        serial.flushInput()
+        serial.write(b''.join(ShdlcSerialMosiFrameBuilder(slave_address, command_id, data).to_bytes()
+                              for command_id, data, _ in requests))
+        serial.flush()
+        responses = []
+        pending = bytearray()
+        timeout = sum(t for _, _, t in requests) + port.additional_response_time
+        deadline = time.time() + timeout + len(requests) * maximum_frame_time()
+        while len(responses) < len(requests):
+            pending.extend(serial.read(max(serial.inWaiting(), 1)))
+            while pending.count(_FRAME_DELIMITER) >= 2:
+                start = pending.index(_FRAME_DELIMITER)
+                end = pending.index(_FRAME_DELIMITER, start + 1)
+                builder = ShdlcSerialMisoFrameBuilder()
+                builder.add_data(pending[start:end + 1])
+                responses.append(builder.interpret_data())
+                del pending[:end + 1]
+            if len(responses) < len(requests) and time.time() > deadline:
+                raise ShdlcTimeoutError()
+        return responses
+
+
+class Scc1StatusSnapshot(NamedTuple):
+    """Status of the cable read with Scc1ShdlcDevice.execute_pipelined"""
+    sensor_status: Optional[int]
+    continuous_measurement_interval: Optional[int]
+    totalizator_enabled: Optional[bool]
+    totalizator_value: Optional[int]
+
 
 class Scc1ShdlcDevice(ShdlcDevice):
     """
     The Scc1 SHDLC device is used to communicate with various sensors using the Sensirion SCC1 sensor cable.
     """
 
-    def __init__(self, connection: ShdlcConnection, target_address: int = 0) -> None:
+    def __init__(self, connection: ShdlcConnection, target_address: int = 0, eager: bool = False,
+                 metadata_cache: Optional[Scc1MetadataCache] = None,
+                 timeout_policy: Optional[Scc1TimeoutPolicy] = None,
+                 metrics: Optional[Scc1Metrics] = None, pipelined: bool = False) -> None:
         """Initialize SCC1 SHDLC Device.
 
+        The identity of the cable (version, serial number, sensor type and i2c address) is read on first access.
+
         :param connection: The used ShdlcConnection
         :param target_address: The SHDLC target address used by this device (default: 0).
                                Usually 0 unless multiple devices are connected to the same USB port.
+        :param eager: Read the identity of the cable immediately
+        :param metadata_cache: Cache consulted before reading constant sensor metadata. It is validated with the
+                               serial number and firmware version of the cable on first use.
+        :param timeout_policy: Policy deriving the response timeouts from the observed latencies and retrying
+                               idempotent reads. Note that ShdlcSerialPort adds its additional_response_time to
+                               every timeout.
+        :param metrics: Metrics recording every command sent with transceive or execute_pipelined
+        :param pipelined: Send the requests of execute_pipelined in one burst before waiting for the responses.
+                          Whether the firmware accepts back-to-back frames has not been verified on a cable yet, by
+                          default the requests are sent one after the other.
         """
         super().__init__(connection, target_address)
-        self._version = self.get_version()
-        self._serial_number = self.get_serial_number()
-        self._sensor_type = self.get_sensor_type()
-        self._i2c_address = self.get_sensor_address()
+        self._version = _NOT_LOADED
+        self._serial_number = _NOT_LOADED
+        self._sensor_type = _NOT_LOADED
+        self._i2c_address = _NOT_LOADED
         self._connected_i2c_addresses: List[int] = []
+        self._metadata_cache = metadata_cache
+        self._metadata_validated = False
+        self._timeout_policy = timeout_policy
+        self._metrics = metrics
+        self._pipelined = pipelined
+        if eager:
+            self.load_identity()
 
     def __str__(self) -> str:
         return f"SCC1-{self.serial_number}@{self.com_port}"
@@ -43,12 +137,143 @@ class Scc1ShdlcDevice(ShdlcDevice):
 
     @property
     def serial_number(self) -> str:
+        if self._serial_number is _NOT_LOADED:
+            self._serial_number = self.get_serial_number()
         return self._serial_number
 
     @property
     def firmware_version(self) -> Version:
+        if self._version is _NOT_LOADED:
+            self._version = self.get_version()
         return Version(str(self._version.firmware))
 
+    @property
+    def sensor_type(self) -> Optional[int]:
+        """The configured sensor type, read from the device on first access"""
+        if self._sensor_type is _NOT_LOADED:
+            self._sensor_type = self.get_sensor_type()
+        return self._sensor_type
+
+    @property
+    def i2c_address(self) -> Optional[int]:
+        """The configured i2c address, read from the device on first access"""
+        if self._i2c_address is _NOT_LOADED:
+            self._i2c_address = self.get_sensor_address()
+        return self._i2c_address
+
+    @property
+    def metrics(self) -> Optional[Scc1Metrics]:
+        return self._metrics
+
+    @property
+    def timeout_policy(self) -> Optional[Scc1TimeoutPolicy]:
+        return self._timeout_policy
+
+    @property
+    def pipelined(self) -> bool:
+        """True if execute_pipelined sends all requests in one burst"""
+        return self._pipelined
+
+    @property
+    def metadata_cache(self) -> Optional[Scc1MetadataCache]:
+        return self._metadata_cache
+
+    def get_cached_metadata(self, sensor_key: str, field: str, read: Callable[[], T]) -> T:
+        """
+        Get a constant sensor value from the metadata cache, or read and cache it.
+
+        The first access validates the cache with the serial number and firmware version of this cable, later
+        accesses do not communicate with the cable unless the value is missing. None is never cached.
+
+        :param sensor_key: The key of the sensor, e.g. product id and serial number
+        :param field: The name of the value
+        :param read: Function reading the value from the sensor
+        :return: The cached or read value
+        """
+        cache = self._metadata_cache
+        if cache is None:
+            return read()
+        if not self._metadata_validated:
+            if self._version is _NOT_LOADED and self._serial_number is _NOT_LOADED:
+                self._version, self._serial_number = self.execute_pipelined([ShdlcCmdGetVersion(),
+                                                                             ShdlcCmdGetSerialNumber()])
+            cache.validate(self.serial_number, str(self.firmware_version))
+            self._metadata_validated = True
+        value = cache.lookup(self.serial_number, sensor_key, field)
+        if value is None:
+            value = read()
+            if value is not None:
+                cache.store(self.serial_number, sensor_key, field, value)
+        return value
+
+    def load_identity(self) -> None:
+        """
+        Read version, serial number, sensor type and i2c address of the cable with execute_pipelined.
+        """
+        version, serial_number, sensor_type, i2c_address = self.execute_pipelined([
+            ShdlcCmdGetVersion(),
+            ShdlcCmdGetSerialNumber(),
+            ShdlcCommand(id=0x24, data=[], max_response_time=0.025),
+            ShdlcCommand(id=0x25, data=[], max_response_time=0.025),
+        ])
+        self._version = version
+        self._serial_number = serial_number
+        self._sensor_type = int(sensor_type[0]) if sensor_type else None
+        self._i2c_address = int(i2c_address[0]) if i2c_address else None
+
+    def execute_pipelined(self, commands: Sequence[ShdlcCommand]) -> List[Any]:
+        """
+        Execute several SHDLC commands whose execution does not depend on each other.
+
+        If the device was created with pipelined=True, all requests are sent before waiting for the first response,
+        otherwise the commands are sent one after the other with transceive. Only use commands without post processing
+        time.
+
+        :param commands: The commands to execute
+        :return: The interpreted responses in the order of the commands
+        """
+        if not self._pipelined:
+            results = []
+            for command in commands:
+                data = self.transceive(command.id, command.data, command.max_response_time)
+                command.check_response_length(data)
+                results.append(command.interpret_response(data))
+            return results
+        requests = [(command.id, bytes(bytearray(command.data)), command.max_response_time) for command in commands]
+        start = time.monotonic()
+        try:
+            responses = _transceive_pipelined(self.connection.port, self.slave_address, requests)
+        except ShdlcTimeoutError:
+            self._record_burst(requests, start, OUTCOME_TIMEOUT)
+            raise
+        except Exception:
+            self._record_burst(requests, start, OUTCOME_ERROR)
+            raise
+        results = []
+        for command, (address, command_id, state, data) in zip(commands, responses):
+            if address != self.slave_address or command_id != command.id:
+                raise ShdlcResponseError(f"Received response to command 0x{command_id:02X} from address "
+                                         f"{address} instead of 0x{command.id:02X} from {self.slave_address}.")
+            self._last_error_flag = bool(state & 0x80)
+            if self._metrics is not None:
+                self._metrics.record_command(command.id, len(command.data), len(data), time.monotonic() - start,
+                                             OUTCOME_ERROR if state & 0x7F else OUTCOME_OK)
+            if state & 0x7F:
+                raise self._get_device_error(state & 0x7F)
+            command.check_response_length(data)
+            results.append(command.interpret_response(data))
+        return results
+
+    def _record_burst(self, requests: Sequence[Tuple[int, bytes, float]], start: float, outcome: str) -> None:
+        """
+        Record every frame of a failed burst in the metrics. The latency of every frame is the duration of the burst.
+        """
+        if self._metrics is None:
+            return
+        latency = time.monotonic() - start
+        for command_id, data, _ in requests:
+            self._metrics.record_command(command_id, len(data), 0, latency, outcome)
+
     @property
     def connected_i2c_addresses(self) -> List[int]:
         """Returns the connected I2C addresses. You need to call find_chips to fill this attribute."""
@@ -102,6 +327,60 @@ class Scc1ShdlcDevice(ShdlcDevice):
         payload.extend(data)
         self.transceive(0x21, payload, timeout=0.01)
 
+    def read_user_data_blocks(self, block_numbers: Sequence[int]) -> List[bytes]:
+        """
+        Read several blocks of user data with execute_pipelined, in one burst if the device was created with
+        pipelined=True.
+
+        :param block_numbers: The block numbers to read (0..4).
+        :return: 20 bytes of user data for each block.
+        """
+        if any(block not in range(USER_DATA_BLOCK_COUNT) for block in block_numbers):
+            raise ValueError("Block number must be between 0 and 4.")
+        responses = self.execute_pipelined([ShdlcCommand(id=0x21, data=[block], max_response_time=0.01)
+                                            for block in block_numbers])
+        blocks = []
+        for block, result in zip(block_numbers, responses):
+            if len(result) != USER_DATA_BLOCK_SIZE + 1:
+                raise ValueError(f"Unexpected response length for User Data: {len(result)} bytes (expected 21)")
+            if result[0] != block:
+                raise ValueError(f"Received block number {result[0]} does not match requested block {block}")
+            blocks.append(bytes(result[1:]))
+        return blocks
+
+    def read_all_user_data(self) -> bytes:
+        """
+        Read the complete user data area from EEPROM.
+        :return: 100 bytes of user data.
+        """
+        return b''.join(self.read_user_data_blocks(range(USER_DATA_BLOCK_COUNT)))
+
+    def write_user_data(self, data: bytes, offset: int = 0) -> int:
+        """
+        Write user data at any offset of the user data area. Only blocks whose content changes are written.
+        :param data: The data to write.
+        :param offset: Offset within the user data area (0..99).
+        :return: The number of blocks written.
+        """
+        end = offset + len(data)
+        if offset < 0 or end > USER_DATA_BLOCK_COUNT * USER_DATA_BLOCK_SIZE:
+            raise ValueError("User data exceeds the user data area of 100 bytes.")
+        if not data:
+            return 0
+        first_block = offset // USER_DATA_BLOCK_SIZE
+        block_numbers = list(range(first_block, (end - 1) // USER_DATA_BLOCK_SIZE + 1))
+        current = self.read_user_data_blocks(block_numbers)
+        updated = bytearray(b''.join(current))
+        start = offset - first_block * USER_DATA_BLOCK_SIZE
+        updated[start:start + len(data)] = data
+        written = 0
+        for index, block in enumerate(block_numbers):
+            content = bytes(updated[index * USER_DATA_BLOCK_SIZE:(index + 1) * USER_DATA_BLOCK_SIZE])
+            if content != current[index]:
+                self.set_user_data(block, content)
+                written += 1
+        return written
+
     def device_selftest(self) -> int:
         """
         Execute a device selftest.
@@ -196,21 +475,28 @@ class Scc1ShdlcDevice(ShdlcDevice):
 
     def get_sensor_serial_number(self, sensor_type: int) -> str:
         """
-        Get the serial number of the connected sensor.
+        Get the serial number of the connected sensor. The serial number is taken from the metadata cache if available.
         :param sensor_type: The sensors type
         :return: the sensor serial number as string
         """
-        result = self.transceive(0x54, [sensor_type], timeout=0.01)
-        return result.rstrip(b'\x00').decode('utf-8')
+        return self.get_cached_metadata(f'sensor_type/{sensor_type}', 'serial_number',
+                                        lambda: self._read_sensor_string(0x54, sensor_type)) or ''
 
     def get_sensor_part_name(self, sensor_type: int) -> str:
         """
-        Get the part name of the connected sensor.
+        Get the part name of the connected sensor. The part name is taken from the metadata cache if available.
         :param sensor_type: The sensors' type
         :return: the sensors' part name as string
         """
-        result = self.transceive(0x50, [sensor_type], timeout=0.01)
-        return result.rstrip(b'\x00').decode('utf-8')
+        return self.get_cached_metadata(f'sensor_type/{sensor_type}', 'part_name',
+                                        lambda: self._read_sensor_string(0x50, sensor_type)) or ''
+
+    def _read_sensor_string(self, command: int, sensor_type: int) -> Optional[str]:
+        """
+        :return: The string returned by the command, None if it is empty
+        """
+        result = self.transceive(command, [sensor_type], timeout=0.01)
+        return result.rstrip(b'\x00').decode('utf-8') or None
 
     def i2c_transceive(self, i2c_address: int, tx_data: bytes, rx_length: int, timeout_ms: int) -> bytes:
         """
@@ -285,6 +571,26 @@ class Scc1ShdlcDevice(ShdlcDevice):
             return None
         return int(unpack('>H', result)[0])
 
+    def get_status_snapshot(self) -> Scc1StatusSnapshot:
+        """
+        Read sensor status, continuous measurement status, totalizator status and totalizator value with
+        execute_pipelined, in one burst if the device was created with pipelined=True.
+
+        :return: The status of the cable
+        """
+        sensor_status, interval, totalizator_status, totalizator_value = self.execute_pipelined([
+            ShdlcCommand(id=0x30, data=[], max_response_time=0.01),
+            ShdlcCommand(id=0x33, data=[], max_response_time=0.01),
+            ShdlcCommand(id=0x37, data=[], max_response_time=0.01),
+            ShdlcCommand(id=0x38, data=[], max_response_time=0.01),
+        ])
+        return Scc1StatusSnapshot(
+            sensor_status=int(sensor_status[0]) if sensor_status else None,
+            continuous_measurement_interval=int(unpack('>H', interval)[0]) if interval else None,
+            totalizator_enabled=bool(totalizator_status[0]) if totalizator_status else None,
+            totalizator_value=int(unpack('>q', totalizator_value)[0]) if totalizator_value else None,
+        )
+
     def sensor_reset(self) -> None:
         """
         Execute a hard reset on the sensor. Sensor must be idle for execution of this command.
@@ -301,23 +607,73 @@ class Scc1ShdlcDevice(ShdlcDevice):
         :param timeout: Response timeout in seconds (-1 for using the default value).
         :return: The returned data as bytes.
         """
-        if timeout <= 0.0:
-            timeout = 3.0
-        result = self.execute(ShdlcCommand(
-            id=command,
-            data=data,
-            max_response_time=float(timeout)
-        ))
+        metrics = self._metrics
+        if metrics is None:
+            return self._transceive(command, data, timeout)
+        data = bytes(bytearray(data))
+        start = time.monotonic()
+        try:
+            result = self._transceive(command, data, timeout)
+        except ShdlcTimeoutError:
+            metrics.record_command(command, len(data), 0, time.monotonic() - start, OUTCOME_TIMEOUT)
+            raise
+        except Exception:
+            metrics.record_command(command, len(data), 0, time.monotonic() - start, OUTCOME_ERROR)
+            raise
+        metrics.record_command(command, len(data), len(result), time.monotonic() - start)
+        return result
+
+    def _transceive(self, command: int, data: Union[bytes, Iterable], timeout: float) -> bytes:
+        policy = self._timeout_policy
+        if policy is None:
+            if timeout <= 0.0:
+                timeout = 3.0
+            result = self.execute(ShdlcCommand(
+                id=command,
+                data=data,
+                max_response_time=float(timeout)
+            ))
+        else:
+            result = self._transceive_with_policy(policy, command, bytes(bytearray(data)), timeout)
         if not result:
             return b''
         return result
 
-    def get_i2c_transceiver(self) -> I2cTransceiver:
+    def _transceive_with_policy(self, policy: Scc1TimeoutPolicy, command: int, data: bytes, timeout: float) -> Any:
+        """
+        Execute a command with the timeout of the policy and retry idempotent reads after a timeout.
+        """
+        retries = policy.retries_for(command)
+        for attempt in range(retries + 1):
+            start = time.monotonic()
+            try:
+                result = self.execute(ShdlcCommand(
+                    id=command,
+                    data=data,
+                    max_response_time=policy.timeout(command, timeout)
+                ))
+            except ShdlcTimeoutError:
+                retry = attempt < retries
+                policy.observe_timeout(command, retry)
+                if not retry:
+                    raise
+                # str(self) may read the serial number, which must not send a command from within the retry path
+                log.warning("%s: command 0x%02X timed out, retrying", self.connection.port.description, command)
+                continue
+            policy.observe(command, time.monotonic() - start)
+            return result
+
+    def get_i2c_transceiver(self, buffered: bool = False, interval_ms: int = 0) -> I2cTransceiver:
         """
         An I2cTransceiver object is required in or der to use the cable with public python i2c drivers.
 
         In general, all functionality of the sensors is available in the public python drivers as well.
         The throughput of the public python driver will be lower than the throughput that can be achieved with
-        the sensor-specific api of the SCC1 sensor cable.
+        the sensor-specific api of the SCC1 sensor cable, unless the buffered transceiver is used with SF06 sensors.
+
+        :param buffered: Serve the continuous measurement of SF06 sensors from the measurement buffer of the cable
+        :param interval_ms: Measurement interval of the buffered continuous measurement (0: as fast as possible)
         """
+        if buffered:
+            return Scc1BufferedI2cTransceiver(self, interval_ms)
         return Scc1I2cTransceiver(self)
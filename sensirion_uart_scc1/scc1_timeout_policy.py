@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+
+import threading
+from collections import deque
+from typing import Deque, Dict, FrozenSet, Iterable, Optional
+
+#: Read commands that can be repeated without side effects on the cable
+IDEMPOTENT_READ_COMMANDS = frozenset({0x30, 0x33, 0x38})
+
+#: Get last measurement, which starts a single measurement if no continuous measurement is running. Retrying it is an
+#: opt-in: ``retry_commands=IDEMPOTENT_READ_COMMANDS | {LAST_MEASUREMENT_COMMAND}``. Buffer reads (0x36) must never
+#: be retried, every read removes the returned samples from the buffer of the cable and the samples of a lost
+#: response would be missing from the stream without being counted as lost.
+LAST_MEASUREMENT_COMMAND = 0x35
+
+#: Timeout used for commands called without timeout and without observed latencies
+DEFAULT_TIMEOUT = 3.0
+
+
+class Scc1TimeoutPolicy:
+    """
+    Per cable response timeouts derived from the observed latency of every command.
+
+    The policy only extends timeouts, it never shortens a timeout requested by the caller, e.g. for slow I2C
+    transfers of the same command. The drivers pass an explicit timeout with every command, so for them the learned
+    timeout only matters when the cable answers slower than the requested timeout. Commands sent without a timeout
+    use the learned timeout directly, which is usually much shorter than the default of 3 seconds.
+
+    As long as fewer than min_observations responses of a command were observed, the requested timeout (or the
+    default) is used. Afterwards the learned timeout is the high quantile of the recent latencies multiplied by a
+    safety margin. Every timeout doubles the timeout of the command until the next response arrives, so a command that
+    became slower is not retried forever with a too short timeout.
+
+    Idempotent reads are retried up to the configured number of times after a timeout.
+    """
+
+    def __init__(self, retries: int = 2, retry_commands: Iterable[int] = IDEMPOTENT_READ_COMMANDS,
+                 margin: float = 3.0, quantile: float = 0.99, min_timeout: float = 0.005,
+                 max_timeout: float = DEFAULT_TIMEOUT, history: int = 64, min_observations: int = 8) -> None:
+        """
+        Initialize the timeout policy.
+
+        :param retries: Number of retries after a timeout of a command in retry_commands
+        :param retry_commands: The command ids that may be retried. Only add commands without side effects, or
+                               LAST_MEASUREMENT_COMMAND if starting another single measurement is acceptable.
+        :param margin: Factor applied to the latency quantile
+        :param quantile: The latency quantile the timeout is derived from (0..1)
+        :param min_timeout: Shortest timeout in seconds
+        :param max_timeout: Longest timeout in seconds
+        :param history: Number of latencies kept per command
+        :param min_observations: Number of latencies needed before the timeout is derived from them
+        """
+        if not 0.0 < quantile <= 1.0:
+            raise ValueError("Quantile must be within (0, 1]")
+        self._retries = retries
+        self._retry_commands: FrozenSet[int] = frozenset(retry_commands)
+        self._margin = margin
+        self._quantile = quantile
+        self._min_timeout = min_timeout
+        self._max_timeout = max_timeout
+        self._history = history
+        self._min_observations = min_observations
+        self._lock = threading.Lock()
+        self._latencies: Dict[int, Deque[float]] = {}
+        self._learned: Dict[int, float] = {}
+        self._backoff: Dict[int, float] = {}
+        self._timeouts = 0
+        self._retried = 0
+
+    @property
+    def timeouts(self) -> int:
+        """Number of timeouts observed"""
+        return self._timeouts
+
+    @property
+    def retried(self) -> int:
+        """Number of retries performed"""
+        return self._retried
+
+    def retries_for(self, command_id: int) -> int:
+        """
+        :param command_id: The SHDLC command id
+        :return: Number of retries allowed after a timeout of the command
+        """
+        return self._retries if command_id in self._retry_commands else 0
+
+    def timeout(self, command_id: int, requested: float = -1.0) -> float:
+        """
+        :param command_id: The SHDLC command id
+        :param requested: The timeout requested by the caller in seconds (<= 0 if not specified)
+        :return: The response timeout in seconds, the longer of the learned and the requested timeout
+        """
+        with self._lock:
+            learned = self._learned.get(command_id)
+            if learned is None:
+                timeout = requested if requested > 0.0 else DEFAULT_TIMEOUT
+            else:
+                timeout = max(learned, requested)
+            timeout *= self._backoff.get(command_id, 1.0)
+        return min(max(timeout, self._min_timeout), self._max_timeout)
+
+    def observe(self, command_id: int, latency: float) -> None:
+        """
+        Record the latency of a successful command.
+
+        :param command_id: The SHDLC command id
+        :param latency: Time in seconds from sending the request until the response was received
+        """
+        with self._lock:
+            latencies = self._latencies.get(command_id)
+            if latencies is None:
+                latencies = self._latencies[command_id] = deque(maxlen=self._history)
+            latencies.append(latency)
+            self._backoff.pop(command_id, None)
+            if len(latencies) >= self._min_observations:
+                ordered = sorted(latencies)
+                index = min(len(ordered) - 1, int(self._quantile * len(ordered)))
+                self._learned[command_id] = ordered[index] * self._margin
+
+    def observe_timeout(self, command_id: int, retry: bool) -> None:
+        """
+        Record a timeout of a command.
+
+        :param command_id: The SHDLC command id
+        :param retry: True if the command is retried
+        """
+        with self._lock:
+            self._timeouts += 1
+            self._retried += retry
+            self._backoff[command_id] = self._backoff.get(command_id, 1.0) * 2.0
+
+    def learned_timeout(self, command_id: int) -> Optional[float]:
+        """
+        :param command_id: The SHDLC command id
+        :return: The timeout derived from the observed latencies, None if not enough latencies were observed
+        """
+        with self._lock:
+            return self._learned.get(command_id)
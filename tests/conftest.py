@@ -1,26 +1,59 @@
 # -*- coding: utf-8 -*-
 import pytest
-from serial.tools.list_ports import comports
 from sensirion_shdlc_driver.connection import ShdlcConnection
 from sensirion_shdlc_driver.port import ShdlcSerialPort
+from sensirion_uart_scc1.scc1_discovery import discover_cables
 from sensirion_uart_scc1.scc1_shdlc_device import Scc1ShdlcDevice
 
 
 @pytest.fixture
 def scc1_device():
-    for port_info in comports():
-        if port_info.vid != 0x0403:
-            continue
-        try:
-            shdlc_port = ShdlcSerialPort(port=port_info.device, baudrate=115200)
-            with shdlc_port:
-                try:
-                    device = Scc1ShdlcDevice(ShdlcConnection(shdlc_port), 0)
-                    device.get_product_name()
-                    yield device
-                    device.sensor_reset()
-                    return
-                except: # noqa
-                    ...
-        except: # noqa
-            ...
+    cables = discover_cables(scan_i2c=False)
+    if not cables:
+        return
+    with ShdlcSerialPort(port=cables[0].port, baudrate=115200) as shdlc_port:
+        device = Scc1ShdlcDevice(ShdlcConnection(shdlc_port), 0)
+        yield device
+        device.sensor_reset()
+
+
+class FakeClock:
+    """Simulated time for the SCC1 emulator"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def fake_clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def emulator_port(fake_clock):
+    from sensirion_uart_scc1.scc1_emulator import Scc1EmulatorPort
+    return Scc1EmulatorPort(clock=fake_clock, sleep=fake_clock.sleep)
+
+
+@pytest.fixture
+def scc1_emulator(emulator_port):
+    return Scc1ShdlcDevice(ShdlcConnection(emulator_port), 0)
+
+
+@pytest.fixture
+def emulated_sensor():
+    """Factory of SF06 drivers on emulated cables producing a flow ramp in real time"""
+    from sensirion_uart_scc1.drivers.scc1_sf06 import Scc1Sf06
+    from sensirion_uart_scc1.scc1_emulator import Scc1EmulatedSf06Sensor, Scc1EmulatorPort
+
+    def create(serial_number):
+        signal = Scc1EmulatedSf06Sensor(signal_source=lambda i: (i % 30000, 0, 0))
+        port = Scc1EmulatorPort(sensor=signal, serial_number=serial_number)
+        return Scc1Sf06(Scc1ShdlcDevice(ShdlcConnection(port)))
+    return create
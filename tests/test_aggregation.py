@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+import math
+import statistics
+
+import pytest
+
+from sensirion_uart_scc1.acquisition.aggregation import create_decimator, DECIMATION_LTTB, Scc1BlockAverageDecimator, \
+    Scc1MinMaxDecimator, Scc1WindowAggregator, _WindowedStage
+from sensirion_uart_scc1.drivers.sf06_sample_batch import Sf06SampleBatch
+
+
+def _samples(values, flags=0):
+    return Sf06SampleBatch.from_samples([(v, 0, flags) for v in values])
+
+
+def test_window_statistics_across_read_outs():
+    aggregator = Scc1WindowAggregator(window_size=4)
+    values = [3, -1, 7, 2, 5, 5, 0, 9, 4]
+    windows = aggregator.process(_samples(values[:3], flags=0x03)) + aggregator.process(_samples(values[3:]))
+    windows += aggregator.flush()
+    assert [w.first_index for w in windows] == [0, 4, 8]
+    for window, chunk in zip(windows, (values[0:4], values[4:8], values[8:])):
+        assert window.count == len(chunk)
+        assert (window.minimum, window.maximum) == (min(chunk), max(chunk))
+        assert window.mean == pytest.approx(statistics.mean(chunk))
+        assert window.variance == pytest.approx(statistics.pvariance(chunk))
+    assert (windows[0].air_in_line, windows[0].high_flow) == (3, 3)
+    assert (windows[1].air_in_line, windows[1].high_flow) == (0, 0)
+
+
+def test_lost_samples_are_missing_in_their_window():
+    aggregator = Scc1WindowAggregator(window_size=4)
+    windows = aggregator.process(_samples([1, 2]), first_index=0) + aggregator.process(_samples([7, 8]), first_index=6)
+    assert [(w.first_index, w.count, w.mean) for w in windows] == [(0, 2, 1.5), (4, 2, 7.5)]
+    with pytest.raises(ValueError):
+        aggregator.process(_samples([1]), first_index=3)
+
+
+def test_block_average_and_envelope():
+    values = [1, 5, -3, 2, 8, 0]
+    average = Scc1BlockAverageDecimator(window_size=3)
+    points = average.process(_samples(values))
+    assert list(points.indexes) == [1.0, 4.0] and list(points.values) == [1.0, pytest.approx(10 / 3)]
+    envelope = Scc1MinMaxDecimator(window_size=3)
+    points = envelope.process(_samples(values))
+    assert list(points.indexes) == [1.0, 2.0, 4.0, 5.0] and list(points.values) == [5.0, -3.0, 8.0, 0.0]
+
+
+def test_lttb_keeps_peaks_with_bounded_output():
+    values = [int(100 * math.sin(i / 50.0)) for i in range(1000)]
+    values[503] = 1000
+    decimator = create_decimator(DECIMATION_LTTB, window_size=20)
+    indexes, points = [], []
+    for start in range(0, len(values), 37):
+        result = decimator.process(_samples(values[start:start + 37]))
+        indexes.extend(result.indexes)
+        points.extend(result.values)
+    result = decimator.flush()
+    indexes.extend(result.indexes)
+    points.extend(result.values)
+    assert indexes[0] == 0 and indexes[-1] == 999
+    assert indexes == sorted(indexes) and len(indexes) <= 1000 // 20 + 2
+    assert 1000.0 in points
+
+
+def test_incomplete_stage_cannot_be_created():
+    class IncompleteStage(_WindowedStage):
+        def _add(self, columns, start, end, index):
+            pass
+
+    with pytest.raises(TypeError):
+        IncompleteStage(10, 0)
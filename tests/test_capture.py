@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from sensirion_uart_scc1.acquisition.capture import GAP_VALUE, Scc1CaptureReader, Scc1CaptureWriter
+from sensirion_uart_scc1.acquisition.timestamper import SampleGap
+from sensirion_uart_scc1.drivers.scc1_sf06 import Scc1Sf06
+from sensirion_uart_scc1.drivers.sf06_sample_batch import Sf06SampleBatch
+
+
+def test_capture_round_trip(tmp_path, scc1_emulator):
+    path = str(tmp_path / 'capture.scc1')
+    sensor = Scc1Sf06(scc1_emulator)
+    with Scc1CaptureWriter.from_sensor(path, sensor, interval_ms=2, start_time=100.0, chunk_size=12) as writer:
+        writer.write([(1, 2, 3), (4, 5, 6)])
+        writer.write_records([SampleGap(2, 100.004, 2)])
+    # the session starts one interval after the end of the capture
+    with Scc1CaptureWriter.from_sensor(path, sensor, interval_ms=2, start_time=100.010) as writer:
+        assert writer.samples_written == 5
+        writer.write(Sf06SampleBatch.from_samples([(-7, 8, 9)]))
+
+    with Scc1CaptureReader(path) as reader:
+        assert reader.header.product_id == sensor.product_id
+        assert reader.header.scale_factor == 500
+        assert reader.header.start_time == 100.0
+        assert len(reader) == 6
+        view = reader.samples()
+        assert view.tolist() == [[1, 2, 3], [4, 5, 6]] + [[GAP_VALUE] * 3] * 3 + [[-7, 8, 9]]
+        assert reader.index_range(100.0015, 100.006) == (1, 3)
+        assert reader.samples_between(100.0015, 100.006).tolist() == [[4, 5, 6], [GAP_VALUE] * 3]
+        assert list(reader.timestamps(4)) == [100.008, 100.010]
+        view.release()
+
+
+def test_capture_rejects_append_after_long_interruption(tmp_path):
+    path = str(tmp_path / 'capture.scc1')
+    with Scc1CaptureWriter(path, interval_ms=2, start_time=100.0) as writer:
+        writer.write([(1, 2, 3)])
+    with pytest.raises(ValueError):
+        Scc1CaptureWriter(path, interval_ms=2, start_time=100.0)
+    with pytest.raises(ValueError):
+        Scc1CaptureWriter(path, interval_ms=2, start_time=200.0, max_append_gap=60.0)
+
+
+def test_capture_empty_ranges(tmp_path):
+    path = str(tmp_path / 'capture.scc1')
+    Scc1CaptureWriter(path, interval_ms=2, start_time=100.0).close()
+    with Scc1CaptureReader(path) as reader:
+        assert len(reader) == 0
+        view = reader.samples()
+        assert view.shape == (0, 3) and view.tolist() == []
+    with Scc1CaptureWriter(path, interval_ms=2, start_time=100.0) as writer:
+        writer.write([(1, 2, 3)])
+    with Scc1CaptureReader(path) as reader:
+        assert reader.samples_between(200.0).tolist() == []
+        assert reader.samples(1, 1).shape == (0, 3)
+
+
+def test_capture_rejects_other_metadata(tmp_path):
+    path = str(tmp_path / 'capture.scc1')
+    Scc1CaptureWriter(path, interval_ms=2).close()
+    with pytest.raises(ValueError):
+        Scc1CaptureWriter(path, interval_ms=5)
+
+
+def test_capture_numpy_view(tmp_path):
+    np = pytest.importorskip('numpy')
+    path = str(tmp_path / 'capture.scc1')
+    with Scc1CaptureWriter(path, interval_ms=1) as writer:
+        writer.write([(i, -i, 0) for i in range(10)])
+    with Scc1CaptureReader(path) as reader:
+        values = reader.to_numpy(2, 4)
+        assert np.array_equal(values, [[2, -2, 0], [3, -3, 0]])
+        del values
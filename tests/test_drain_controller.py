@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from sensirion_uart_scc1.acquisition.drain_controller import Scc1DrainController
+from sensirion_uart_scc1.drivers.scc1_sf06 import Scc1Sf06
+
+
+def test_drain_buffer_reads_until_empty(scc1_emulator, fake_clock):
+    sensor = Scc1Sf06(scc1_emulator)
+    sensor.start_continuous_measurement(interval_ms=1)
+    fake_clock.now += 0.2
+    remaining, lost, data = sensor.drain_buffer()
+    assert remaining == 0
+    assert lost == 0
+    # 200 samples plus the samples produced while reading
+    assert len(data) >= 200
+    assert None not in data
+    remaining, lost, data = sensor.drain_buffer()
+    # only the samples produced during the last read out (one frame takes about 22 ms)
+    assert 0 < len(data) < 41
+
+
+def test_drain_controller_converges_to_target_occupancy():
+    controller = Scc1DrainController(buffer_size=2000, target_occupancy=0.5, max_period=1.0)
+    # buffer fills with 6000 bytes/s
+    controller.update(0, 0, 0, now=0.0)
+    for i in range(1, 5):
+        controller.update(600, 0, 0, now=i * 0.1)
+    assert controller.fill_rate == pytest.approx(6000.0)
+    assert controller.poll_period == pytest.approx(1000 / 6000.0)
+
+
+def test_drain_controller_halves_period_on_loss():
+    controller = Scc1DrainController(initial_period=0.1, min_period=0.01)
+    controller.update(0, 0, 60)
+    assert controller.poll_period == pytest.approx(0.05)
+    assert controller.bytes_lost == 60
+
+
+def test_drain_controller_avoids_loss(fake_clock):
+    from sensirion_shdlc_driver import ShdlcConnection
+    from sensirion_uart_scc1.scc1_emulator import Scc1EmulatorPort
+    from sensirion_uart_scc1.scc1_shdlc_device import Scc1ShdlcDevice
+    port = Scc1EmulatorPort(buffer_size=600, clock=fake_clock, sleep=fake_clock.sleep)
+    sensor = Scc1Sf06(Scc1ShdlcDevice(ShdlcConnection(port)))
+    controller = Scc1DrainController(buffer_size=600, initial_period=0.5, clock=fake_clock)
+    sensor.start_continuous_measurement(interval_ms=1)
+    received = []
+    controller.run(sensor, received.extend, lambda: fake_clock.now > 5.0, sleep=fake_clock.sleep)
+    # the initial period is too long, the controller reduces the period until no data is lost anymore
+    assert controller.poll_period < 0.1
+    lost_before = controller.bytes_lost
+    controller.run(sensor, received.extend, lambda: fake_clock.now > 10.0, sleep=fake_clock.sleep)
+    assert controller.bytes_lost == lost_before
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+
+from sensirion_uart_scc1.acquisition.multi_cable_manager import Scc1AcquisitionManager, TaggedBatch
+from sensirion_uart_scc1.drivers.sf06_sample_batch import Sf06SampleBatch
+
+
+class HungSensor:
+    """Sensor whose cable stops responding after the measurement was started"""
+
+    def __init__(self):
+        self.release = threading.Event()
+
+    def start_continuous_measurement(self, interval_ms):
+        ...
+
+    def stop_continuous_measurement(self):
+        ...
+
+    def read_extended_buffer_batch(self):
+        self.release.wait()
+        raise IOError("timeout")
+
+
+def test_manager_merges_cables(emulated_sensor):
+    sensors = [emulated_sensor('EMU00001'), emulated_sensor('EMU00002')]
+    received = {}
+    with Scc1AcquisitionManager(sensors, interval_ms=1) as manager:
+        assert manager.cable_serials == ['EMU00001', 'EMU00002']
+        time.sleep(0.2)
+    for batch in manager:
+        assert batch.host_timestamp > 0
+        received.setdefault(batch.cable_serial, []).extend(batch.samples.flow)
+    for cable in manager.cable_serials:
+        assert received[cable] == list(range(len(received[cable])))
+    assert [s.samples for s in manager.statistics()] == [len(received['EMU00001']), len(received['EMU00002'])]
+
+
+def test_hung_cable_does_not_stall_others(emulated_sensor):
+    hung = HungSensor()
+    manager = Scc1AcquisitionManager(interval_ms=1)
+    manager.add(hung, cable_serial='HUNG')
+    manager.add(emulated_sensor('EMU00001'))
+    manager.start()
+    batches = manager.read(timeout=1.0)
+    manager.stop(timeout=0.1)
+    assert batches and all(b.cable_serial == 'EMU00001' for b in batches)
+    hung.release.set()
+    manager.stop()
+    statistics = {s.cable_serial: s for s in manager.statistics()}
+    assert isinstance(statistics['HUNG'].error, IOError)
+    assert statistics['EMU00001'].error is None
+
+
+def test_abandoned_worker_is_not_started_twice():
+    hung = HungSensor()
+    manager = Scc1AcquisitionManager(interval_ms=1)
+    manager.add(hung, cable_serial='HUNG')
+    manager.start()
+    time.sleep(0.05)
+    manager.stop(timeout=0.1)
+    manager.start()
+    workers = [t for t in threading.enumerate() if t.name == 'scc1-acquisition-HUNG']
+    assert len(workers) == 1
+    hung.release.set()
+    workers[0].join(1.0)
+    assert not workers[0].is_alive()
+    manager.stop(timeout=1.0)
+
+
+def test_manager_drops_oldest_batches():
+    manager = Scc1AcquisitionManager(max_pending_batches=2)
+    for i in range(3):
+        manager.publish(TaggedBatch('EMU00001', 0.0, i, Sf06SampleBatch.empty()))
+    assert manager.batches_dropped == 1
+    assert [b.bytes_lost for b in manager.read()] == [1, 2]
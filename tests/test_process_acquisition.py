@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+import time
+
+import pytest
+from sensirion_shdlc_driver import ShdlcConnection
+
+from sensirion_uart_scc1.acquisition.process_acquisition import Scc1ProcessAcquisition
+from sensirion_uart_scc1.acquisition.shared_ring import Scc1SharedSampleRing
+from sensirion_uart_scc1.drivers.scc1_sf06 import Scc1Sf06
+from sensirion_uart_scc1.drivers.sf06_sample_batch import Sf06SampleBatch
+from sensirion_uart_scc1.scc1_emulator import Scc1EmulatedSf06Sensor, Scc1EmulatorPort
+from sensirion_uart_scc1.scc1_shdlc_device import Scc1ShdlcDevice
+
+
+def _batch(first, count):
+    return Sf06SampleBatch.from_samples([(i, 0, 0) for i in range(first, first + count)])
+
+
+def _emulated_sensor():
+    return Scc1Sf06(Scc1ShdlcDevice(ShdlcConnection(Scc1EmulatorPort())))
+
+
+def _failing_sensor():
+    raise IOError("cable unplugged")
+
+
+def test_ring_wraps_and_reports_overrun():
+    with Scc1SharedSampleRing(capacity=8) as ring:
+        reader = ring.reader()
+        ring.write(_batch(0, 5))
+        first, batch = reader.read(max_samples=3)
+        assert first == 0 and [s[0] for s in batch] == [0, 1, 2]
+        ring.write(_batch(7, 6), samples_lost=2)
+        first, batch = reader.read()
+        assert first == 7 and [s[0] for s in batch] == list(range(7, 13))
+        assert reader.samples_overrun == 2 and reader.samples_lost == 2 and ring.samples_lost == 2
+
+
+class _InterleavedData:
+    """Slots of a ring that run a read while the writer is in the middle of a write"""
+
+    def __init__(self, data, during_write):
+        self._data = data
+        self._during_write = during_write
+
+    def __getitem__(self, key):
+        return self._data[key]
+
+    def __setitem__(self, key, value):
+        self._data[key] = value
+        if self._during_write is not None:
+            during_write, self._during_write = self._during_write, None
+            during_write()
+
+
+def test_lost_samples_keep_the_measurement_index():
+    with Scc1SharedSampleRing(capacity=16) as ring:
+        reader = ring.reader()
+        ring.write(_batch(0, 4))
+        ring.write(_batch(10, 2), samples_lost=6)
+        assert ring.write_index == 12 and ring.samples_lost == 6
+        first, batch = reader.read()
+        assert first == 0 and [s[0] for s in batch] == [0, 1, 2, 3]
+        first, batch = reader.read()
+        assert first == 10 and [s[0] for s in batch] == [10, 11]
+        assert reader.samples_lost == 6 and reader.samples_overrun == 0
+
+
+def test_reader_behind_dropped_gaps_skips_to_the_horizon():
+    with Scc1SharedSampleRing(capacity=256) as ring:
+        reader = ring.reader()
+        for i in range(40):
+            ring.write(_batch(2 * i + 1, 1), samples_lost=1)
+        first, batch = reader.read()
+        # the first 8 gaps were dropped from the table
+        assert first == 15 and [s[0] for s in batch] == [15]
+        assert reader.samples_overrun == 15
+        first, batch = reader.read()
+        assert first == 17 and [s[0] for s in batch] == [17]
+        assert reader.samples_lost == 1
+
+
+def test_read_during_write_skips_the_overwritten_slots():
+    with Scc1SharedSampleRing(capacity=8) as ring:
+        reader = ring.reader()
+        ring.write(_batch(0, 8))
+        results = []
+        data = ring._data
+        ring._data = _InterleavedData(data, lambda: results.append(reader.read()))
+        try:
+            ring.write(_batch(8, 3))
+        finally:
+            ring._data = data
+        first, batch = results[0]
+        assert first == 3 and [s[0] for s in batch] == [3, 4, 5, 6, 7]
+        assert reader.samples_overrun == 3
+        first, batch = reader.read()
+        assert first == 8 and [s[0] for s in batch] == [8, 9, 10]
+
+
+def test_ring_is_shared_by_name():
+    with Scc1SharedSampleRing(capacity=16) as ring:
+        ring.write(_batch(0, 4))
+        other = Scc1SharedSampleRing.attach(ring.name)
+        try:
+            first, batch = other.reader(from_start=True).read()
+            assert first == 0 and len(batch) == 4
+        finally:
+            other.close()
+
+
+def test_worker_process_fills_ring():
+    with Scc1ProcessAcquisition(_emulated_sensor, interval_ms=1, capacity=4096) as acquisition:
+        reader = acquisition.reader(from_start=True)
+        samples = []
+        deadline = time.monotonic() + 10.0
+        while len(samples) < 200 and time.monotonic() < deadline:
+            first, batch = reader.read()
+            samples.extend(batch)
+            time.sleep(0.01)
+        assert acquisition.running and acquisition.error is None
+    assert len(samples) >= 200
+    assert samples[:200] == [Scc1EmulatedSf06Sensor().sample(i) for i in range(200)]
+
+
+def test_worker_error_is_reported():
+    acquisition = Scc1ProcessAcquisition(_failing_sensor)
+    acquisition.start()
+    try:
+        deadline = time.monotonic() + 10.0
+        while acquisition.running and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert acquisition.error == "OSError: cable unplugged"
+    finally:
+        acquisition.stop()
+    with pytest.raises(RuntimeError):
+        acquisition.ring
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+import asyncio
+
+from sensirion_shdlc_driver import ShdlcConnection
+
+from sensirion_uart_scc1.drivers.scc1_sf06_async import AsyncScc1Sf06
+from sensirion_uart_scc1.drivers.scc1_slf3x import Scc1Slf3x
+from sensirion_uart_scc1.scc1_async_device import AsyncScc1ShdlcDevice
+from sensirion_uart_scc1.scc1_emulator import Scc1EmulatorPort
+
+
+def test_async_transceive():
+    async def main():
+        device = await AsyncScc1ShdlcDevice.create(ShdlcConnection(Scc1EmulatorPort()))
+        assert device.serial_number == 'EMU00001'
+        assert await device.transceive(0x24, []) == b'\x03'
+        assert await device.get_sensor_address() == 0x08
+
+    asyncio.run(main())
+
+
+def test_async_stream_multiple_cables():
+    async def acquire(serial_number):
+        port = Scc1EmulatorPort(serial_number=serial_number, frame_latency=0.001)
+        device = await AsyncScc1ShdlcDevice.create(ShdlcConnection(port))
+        sensor = await AsyncScc1Sf06.create(device, driver_class=Scc1Slf3x)
+        assert isinstance(sensor.sensor, Scc1Slf3x)
+        samples = 0
+        async with sensor.stream(interval_ms=1) as batches:
+            async for batch in batches:
+                samples += len(batch)
+                if samples >= 50:
+                    break
+        # the measurement is stopped when the block is left
+        assert await device.get_continuous_measurement_status() is None
+        return samples, sensor.bytes_lost
+
+    async def main():
+        return await asyncio.gather(*(acquire(f'EMU{i:05d}') for i in range(4)))
+
+    for samples, lost in asyncio.run(main()):
+        assert samples >= 50
+        assert lost == 0
+
+
+def test_async_calls_to_one_cable_are_serialized():
+    async def main():
+        device = await AsyncScc1ShdlcDevice.create(ShdlcConnection(Scc1EmulatorPort()))
+        sensor = await AsyncScc1Sf06.create(device)
+        results = await asyncio.gather(sensor.get_flow_unit_and_scale(), device.get_sensor_status(),
+                                       sensor.get_sensor_status())
+        assert results == [(500, 0x0845), 0, 0]
+
+    asyncio.run(main())
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+import json
+
+import pytest
+from sensirion_shdlc_driver import ShdlcConnection
+
+from sensirion_uart_scc1 import scc1_benchmark
+from sensirion_uart_scc1.scc1_emulator import Scc1EmulatorPort
+from sensirion_uart_scc1.scc1_shdlc_device import Scc1ShdlcDevice
+
+
+@pytest.fixture
+def realtime_emulator():
+    return Scc1ShdlcDevice(ShdlcConnection(Scc1EmulatorPort()))
+
+
+def test_percentile():
+    assert scc1_benchmark.percentile([], 0.5) == 0.0
+    assert scc1_benchmark.percentile([3.0, 1.0, 2.0], 0.5) == 2.0
+    assert scc1_benchmark.percentile([0.0, 10.0], 0.9) == pytest.approx(9.0)
+
+
+def test_run_benchmarks(realtime_emulator):
+    results = scc1_benchmark.run_benchmarks(realtime_emulator, intervals_ms=[2], duration=0.05)
+    assert [r.path for r in results] == list(scc1_benchmark.ALL_PATHS)
+    for result in results:
+        assert result.interval_ms == 2
+        assert result.calls > 0
+        assert result.samples > 0
+        assert result.latency_p50_ms <= result.latency_p99_ms <= result.latency_max_ms
+    document = json.loads(json.dumps(scc1_benchmark.results_to_json(realtime_emulator, results)))
+    assert document['firmware_version'] == '1.9'
+    assert len(document['results']) == 3
+
+
+def test_run_benchmarks_unknown_path(realtime_emulator):
+    with pytest.raises(ValueError, match="Unknown benchmark path"):
+        scc1_benchmark.run_benchmarks(realtime_emulator, paths=['foo'])
+
+
+def test_benchmark_main_writes_json(tmp_path):
+    output = tmp_path / 'results.json'
+    assert scc1_benchmark.main(['--emulate', '--frame-latency', '0', '--duration', '0.02', '--intervals', '5',
+                                '--paths', 'read_extended_buffer', '--output', str(output)]) == 0
+    document = json.loads(output.read_text())
+    assert document['results'][0]['path'] == 'read_extended_buffer'
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+import json
+import socket
+import struct
+import time
+
+import pytest
+from sensirion_shdlc_driver import ShdlcConnection
+
+from sensirion_uart_scc1.acquisition.multi_cable_manager import TaggedBatch
+from sensirion_uart_scc1.drivers.sf06_sample_batch import Sf06SampleBatch
+from sensirion_uart_scc1.scc1_daemon import MSG_BATCH, MSG_SUBSCRIBE, Scc1Daemon, Scc1DaemonClient, _ClientSession, \
+    _encode_batch
+from sensirion_uart_scc1.scc1_exceptions import Scc1DaemonError
+from sensirion_uart_scc1.scc1_shdlc_device import Scc1ShdlcDevice
+
+
+@pytest.fixture
+def daemon(tmp_path, emulated_sensor):
+    sensors = [emulated_sensor('EMU00001'), emulated_sensor('EMU00002')]
+    with Scc1Daemon(str(tmp_path / 'scc1.sock'), sensors, interval_ms=1) as daemon:
+        yield daemon
+
+
+def _read_flow(client, cable_serial, count):
+    flow = []
+    deadline = time.monotonic() + 5.0
+    while len(flow) < count and time.monotonic() < deadline:
+        batch = client.read_batch(timeout=0.5)
+        if batch is not None and batch.cable_serial == cable_serial:
+            flow.extend(batch.samples.flow)
+    return flow
+
+
+def _read_message(stream):
+    message_type, _, size = struct.unpack('<BII', stream.read(9))
+    payload = stream.read(size)
+    assert message_type == MSG_BATCH
+    offset = 1 + payload[0]
+    _, _, _, dropped = struct.unpack_from('<dIHI', payload, offset)
+    flow = struct.unpack_from('<h', payload, offset + 18)[0]
+    return flow, dropped
+
+
+def test_list_cables(daemon):
+    with Scc1DaemonClient(daemon.path) as client:
+        cables = client.cables()
+    assert [c['cable_serial'] for c in cables] == ['EMU00001', 'EMU00002']
+    assert all(c['interval_ms'] == 1 and c['scale_factor'] for c in cables)
+
+
+def test_clients_share_the_stream(daemon):
+    with Scc1DaemonClient(daemon.path) as first, Scc1DaemonClient(daemon.path) as second:
+        first.subscribe()
+        second.subscribe(['EMU00002'])
+        flow = _read_flow(first, 'EMU00001', 200)
+        assert flow == list(range(flow[0], flow[0] + len(flow)))
+        batch = second.read_batch(timeout=1.0)
+        assert batch.cable_serial == 'EMU00002' and batch.samples.num_signals == 3
+
+
+def test_commands_are_passed_through(daemon):
+    with Scc1DaemonClient(daemon.path) as client:
+        client.subscribe()
+        device = Scc1ShdlcDevice(ShdlcConnection(client.port('EMU00001')))
+        assert device.get_sensor_type() == 3
+        assert device.serial_number == 'EMU00001'
+        with pytest.raises(Scc1DaemonError):
+            client.transceive('EMU00001', 0, 0x34, b'', 0.1)
+        with pytest.raises(Scc1DaemonError):
+            client.transceive('UNKNOWN', 0, 0xD0, b'\x01', 0.1)
+        with pytest.raises(Scc1DaemonError):
+            client.transceive('EMU00001', 0, 0xD3, b'', 0.1)
+        with pytest.raises(Scc1DaemonError):
+            device.set_sensor_type(2)
+        # the acquisition is not disturbed by the commands
+        assert len(_read_flow(client, 'EMU00001', 50)) >= 50
+
+
+def test_slow_client_drops_only_its_own_batches(daemon):
+    connection, peer = socket.socketpair()
+    session = _ClientSession(daemon, connection)
+    session._handle(MSG_SUBSCRIBE, json.dumps({'cables': ['EMU00001'], 'max_pending_batches': 2}).encode())
+    for i in range(5):
+        batch = TaggedBatch('EMU00001', float(i), 0, Sf06SampleBatch.from_samples([(i, 0, 0)]))
+        session.offer_batch(batch, _encode_batch(batch))
+    session.start()
+    with Scc1DaemonClient(daemon.path) as fast:
+        fast.subscribe(['EMU00001'])
+        flow = _read_flow(fast, 'EMU00001', 100)
+        assert flow == list(range(flow[0], flow[0] + len(flow)))
+        assert fast.batches_dropped == 0
+    with peer.makefile('rb') as stream:
+        received = [_read_message(stream) for _ in range(2)]
+    session.close()
+    peer.close()
+    assert received == [(3, 3), (4, 3)]
+
+
+def test_socket_of_running_daemon_is_not_taken_over(daemon, emulated_sensor):
+    with pytest.raises(Scc1DaemonError):
+        Scc1Daemon(daemon.path, [emulated_sensor('EMU00003')]).start()
+    with Scc1DaemonClient(daemon.path) as client:
+        assert len(client.cables()) == 2
+
+
+def test_stale_socket_is_replaced(tmp_path, emulated_sensor):
+    path = str(tmp_path / 'scc1.sock')
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(path)
+    stale.close()
+    with Scc1Daemon(path, [emulated_sensor('EMU00001')], interval_ms=1):
+        with Scc1DaemonClient(path) as client:
+            assert client.cables()[0]['cable_serial'] == 'EMU00001'
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+import logging
+import time
+
+import pytest
+from sensirion_shdlc_driver.errors import ShdlcTimeoutError
+
+from sensirion_uart_scc1.scc1_discovery import discover_cables, probe_cable
+from sensirion_uart_scc1.scc1_emulator import Scc1EmulatorPort
+
+
+class SerialLikePort(Scc1EmulatorPort):
+    """Emulated cable recording the additional response time of the first request of every command, optionally failing
+    a command"""
+
+    def __init__(self, failing_command=None, **kwargs):
+        super().__init__(**kwargs)
+        self.additional_response_time = 0.0
+        self.response_times = {}
+        self._failing_command = failing_command
+
+    def transceive(self, slave_address, command_id, data, response_timeout):
+        self.response_times.setdefault(command_id, self.additional_response_time)
+        if command_id == self._failing_command:
+            raise ShdlcTimeoutError()
+        return super().transceive(slave_address, command_id, data, response_timeout)
+
+
+def _silent_port():
+    port = Scc1EmulatorPort()
+    port.drop_responses(100)
+    return port
+
+
+def test_discovery_returns_inventory_of_responding_cables():
+    ports = {
+        'COM1': Scc1EmulatorPort(serial_number='EMU00001'),
+        'COM2': _silent_port(),
+        'COM3': Scc1EmulatorPort(serial_number='EMU00003', firmware_version=(1, 10)),
+    }
+    ports['COM3'].transceive(0, 0x24, [0x03], 0.1)
+    cables = discover_cables(list(ports), timeout=0.05, port_factory=lambda name, baudrate: ports[name])
+    assert [(c.port, c.serial_number, c.firmware_version) for c in cables] == \
+        [('COM1', 'EMU00001', '1.9'), ('COM3', 'EMU00003', '1.10')]
+    assert cables[1].sensor_type == 3
+    assert cables[0].i2c_addresses == [0x08]
+    assert not any(port.is_open for port in ports.values())
+
+
+def test_silent_ports_are_probed_in_parallel():
+    ports = {f'COM{i}': _silent_port() for i in range(16)}
+    start = time.perf_counter()
+    assert discover_cables(list(ports), timeout=0.2, port_factory=lambda name, baudrate: ports[name]) == []
+    assert time.perf_counter() - start < 1.5
+
+
+def test_probe_ignores_ports_that_cannot_be_opened():
+    def fail(name, baudrate):
+        raise ShdlcTimeoutError()
+    assert probe_cable('COM1', port_factory=fail) is None
+
+
+def test_normal_response_time_is_restored_after_identification():
+    port = SerialLikePort()
+    assert probe_cable('COM1', port_factory=lambda name, baudrate: port) is not None
+    assert port.response_times[0xD0] == 0.0
+    assert port.response_times[0x29] == 0.1
+
+
+def test_failure_after_identification_is_not_hidden(caplog):
+    ports = {'COM1': SerialLikePort(failing_command=0x29), 'COM2': Scc1EmulatorPort(serial_number='EMU00002')}
+    with pytest.raises(ShdlcTimeoutError):
+        probe_cable('COM1', port_factory=lambda name, baudrate: ports[name])
+    with caplog.at_level(logging.WARNING):
+        cables = discover_cables(list(ports), port_factory=lambda name, baudrate: ports[name])
+    assert [c.port for c in cables] == ['COM2']
+    assert 'COM1' in caplog.text
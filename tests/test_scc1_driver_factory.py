@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+import pytest
+from sensirion_shdlc_driver import ShdlcConnection
+
+from sensirion_uart_scc1.drivers.scc1_driver_factory import create_sensor_driver
+from sensirion_uart_scc1.drivers.scc1_ld20 import Scc1Ld20
+from sensirion_uart_scc1.drivers.scc1_slf3x import Scc1Slf3x
+from sensirion_uart_scc1.drivers.slf_common import SlfMode, SlfProduct, SlfProductName
+from sensirion_uart_scc1.scc1_emulator import Scc1EmulatedSf06Sensor, Scc1EmulatorPort
+from sensirion_uart_scc1.scc1_exceptions import Scc1InvalidProductId, Scc1NotSupportedException
+from sensirion_uart_scc1.scc1_frame_recorder import Scc1RecordingPort
+from sensirion_uart_scc1.scc1_shdlc_device import Scc1ShdlcDevice
+
+
+def _recorded_device(emulator_port):
+    port = Scc1RecordingPort(emulator_port)
+    return Scc1ShdlcDevice(ShdlcConnection(port), pipelined=True), port
+
+
+def test_configured_cable_is_detected_in_one_burst(emulator_port):
+    device, port = _recorded_device(emulator_port)
+    sensor = create_sensor_driver(device)
+    assert type(sensor) is Scc1Slf3x
+    assert sensor.liquid_mode is SlfMode.LIQUI_1
+    assert sensor.product_id == 0x07030402
+    assert [frame.command for frame in port.frames] == [0x24, 0x33, 0x50]
+
+
+def test_cable_is_only_reconfigured_when_needed(emulator_port):
+    emulator_port.transceive(0, 0x24, [0x00], 0.1)
+    emulator_port.transceive(0, 0x33, [0x00, 0x0A], 0.1)
+    device, port = _recorded_device(emulator_port)
+    create_sensor_driver(device)
+    commands = [frame.command for frame in port.frames]
+    assert 0x34 in commands and 0x65 not in commands
+    assert device.get_sensor_type() == 3
+    assert device.get_continuous_measurement_status() is None
+
+
+def test_product_of_other_sensor_type_is_not_parsed(emulator_port):
+    emulator_port.transceive(0, 0x24, [0x00], 0.1)
+    handle_request = emulator_port.handle_request
+    sensor_type = [0]
+
+    def other_sensor_type(command_id, data):
+        if command_id == 0x24 and data:
+            sensor_type[0] = data[0]
+        if command_id == 0x50 and sensor_type[0] != 3:
+            return 0, b'not a product\x00'
+        return handle_request(command_id, data)
+
+    emulator_port.handle_request = other_sensor_type
+    sensor = create_sensor_driver(Scc1ShdlcDevice(ShdlcConnection(emulator_port)))
+    assert sensor.product_id == 0x07030402
+
+
+def test_driver_matches_product_and_liquid(fake_clock):
+    port = Scc1EmulatorPort(Scc1EmulatedSf06Sensor(product_id=0x07010201), clock=fake_clock, sleep=fake_clock.sleep)
+    device = Scc1ShdlcDevice(ShdlcConnection(port))
+    assert type(create_sensor_driver(device)) is Scc1Ld20
+    with pytest.raises(Scc1NotSupportedException):
+        create_sensor_driver(device, SlfMode.LIQUI_2)
+
+
+def test_unknown_product_is_rejected(fake_clock):
+    port = Scc1EmulatorPort(Scc1EmulatedSf06Sensor(product_id=0x01020304), clock=fake_clock, sleep=fake_clock.sleep)
+    with pytest.raises(Scc1InvalidProductId):
+        create_sensor_driver(Scc1ShdlcDevice(ShdlcConnection(port)))
+
+
+def test_product_index():
+    assert SlfProduct.from_product_id(0x07030402) is SlfProduct.SLF3x
+    assert SlfProduct.from_product_id(0x07020301) is SlfProduct.SF06
+    assert SlfProductName.from_product_id(0x07010201) == 'LD20_2600B'
+    with pytest.raises(Scc1InvalidProductId):
+        SlfProduct.from_product_id(None)
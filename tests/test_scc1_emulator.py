@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+import pytest
+from sensirion_shdlc_driver import ShdlcConnection
+from sensirion_shdlc_driver.errors import ShdlcDeviceError
+
+from sensirion_uart_scc1.drivers.scc1_sf06 import Scc1Sf06
+from sensirion_uart_scc1.scc1_emulator import Scc1EmulatorPort, Scc1EmulatedSf06Sensor, sensirion_crc8
+from sensirion_uart_scc1.scc1_shdlc_device import Scc1ShdlcDevice
+
+
+def test_emulator_identity(scc1_emulator):
+    assert str(scc1_emulator) == "SCC1-EMU00001@scc1-emulator-EMU00001"
+    assert str(scc1_emulator.firmware_version) == "1.9"
+    assert scc1_emulator.get_sensor_type() == 3
+    assert scc1_emulator.get_sensor_address() == 0x08
+    assert scc1_emulator.perform_i2c_scan() == [0x08]
+
+
+def test_emulator_sf06_identity(scc1_emulator):
+    sensor = Scc1Sf06(scc1_emulator)
+    assert sensor.product_id == 0x07030402
+    assert sensor.serial_number == 0x12345678
+    assert sensor.get_flow_unit_and_scale() == (500, 0x0845)
+
+
+def test_emulator_buffer_fills_with_interval(scc1_emulator, fake_clock):
+    sensor = Scc1Sf06(scc1_emulator)
+    sensor.start_continuous_measurement(interval_ms=2)
+    fake_clock.now += 0.1
+    remaining, lost, data = sensor.read_extended_buffer()
+    assert lost == 0
+    # 41 samples fit into one frame, about 50 samples were produced
+    assert len(data) == 41
+    assert remaining > 0
+    assert all(len(sample) == 3 for sample in data)
+    assert data[0] == Scc1EmulatedSf06Sensor().sample(0)
+
+
+def test_emulator_buffer_overflow_reports_bytes_lost(fake_clock):
+    port = Scc1EmulatorPort(buffer_size=60, clock=fake_clock, sleep=fake_clock.sleep)
+    sensor = Scc1Sf06(Scc1ShdlcDevice(ShdlcConnection(port)))
+    sensor.start_continuous_measurement(interval_ms=1)
+    fake_clock.now += 0.1
+    remaining, lost, data = sensor.read_extended_buffer()
+    assert len(data) == 10
+    assert remaining == 0
+    assert lost > 0
+    assert lost % 6 == 0
+    # bytes lost are reported only once
+    _, lost, _ = sensor.read_extended_buffer()
+    assert lost == 0
+
+
+def test_emulator_transfer_time(fake_clock):
+    port = Scc1EmulatorPort(baudrate=115200, frame_latency=0.001, clock=fake_clock, sleep=fake_clock.sleep)
+    device = Scc1ShdlcDevice(ShdlcConnection(port))
+    start = fake_clock.now
+    device.get_sensor_status()
+    # request frame of 6 bytes and response frame of 8 bytes at 10 bit per byte
+    assert fake_clock.now - start == pytest.approx(0.001 + 14 * 10 / 115200)
+
+
+def test_emulator_unknown_command(scc1_emulator):
+    with pytest.raises(ShdlcDeviceError):
+        scc1_emulator.transceive(0x7F, [])
+
+
+def test_emulator_totalizer(scc1_emulator, fake_clock):
+    sensor = Scc1Sf06(scc1_emulator)
+    sensor.set_totalizator_status(True)
+    sensor.start_continuous_measurement(interval_ms=10)
+    fake_clock.now += 0.05
+    expected = sum(Scc1EmulatedSf06Sensor().sample(i)[0] for i in range(5))
+    assert sensor.get_totalizator_value() == expected
+
+
+def test_emulator_i2c_measurement(scc1_emulator):
+    transceiver = scc1_emulator.get_i2c_transceiver()
+    transceiver.transceive(0x08, b'\x36\x08', 0, 0.0)
+    data = transceiver.transceive(0x08, None, 9, 0.0)
+    assert len(data) == 9
+    assert data[2] == sensirion_crc8(data[:2])
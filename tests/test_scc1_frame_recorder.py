@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+import pytest
+from sensirion_shdlc_driver import ShdlcConnection
+from sensirion_shdlc_driver.errors import ShdlcTimeoutError
+
+from sensirion_uart_scc1.drivers.scc1_sf06 import Scc1Sf06
+from sensirion_uart_scc1.scc1_exceptions import Scc1ReplayError
+from sensirion_uart_scc1.scc1_frame_recorder import Scc1RecordingPort, Scc1ReplayPort
+from sensirion_uart_scc1.scc1_shdlc_device import Scc1ShdlcDevice
+
+
+def _session(port, fake_clock):
+    device = Scc1ShdlcDevice(ShdlcConnection(port), eager=True)
+    sensor = Scc1Sf06(device)
+    sensor.start_continuous_measurement(interval_ms=2)
+    fake_clock.sleep(0.05)
+    return device.serial_number, device.get_sensor_status(), sensor.read_extended_buffer()
+
+
+def test_record_and_replay(tmp_path, emulator_port, fake_clock):
+    path = str(tmp_path / 'session.jsonl')
+    with Scc1RecordingPort(emulator_port, path, clock=fake_clock) as recorder:
+        recorded = _session(recorder, fake_clock)
+        emulator_port.drop_responses(1)
+        with pytest.raises(ShdlcTimeoutError):
+            Scc1ShdlcDevice(ShdlcConnection(recorder)).get_sensor_status()
+
+    replay = Scc1ReplayPort(path)
+    assert _session(replay, fake_clock) == recorded
+    with pytest.raises(ShdlcTimeoutError):
+        Scc1ShdlcDevice(ShdlcConnection(replay)).get_sensor_status()
+    assert replay.remaining == 0
+
+
+def test_replay_timing_and_mismatch(emulator_port, fake_clock):
+    recorder = Scc1RecordingPort(emulator_port, clock=fake_clock)
+    device = Scc1ShdlcDevice(ShdlcConnection(recorder))
+    device.get_sensor_status()
+    fake_clock.sleep(1.0)
+    device.get_sensor_status()
+    assert len(recorder.frames) == 2
+
+    replay = Scc1ReplayPort(recorder.frames, speed=10.0, clock=fake_clock, sleep=fake_clock.sleep)
+    device = Scc1ShdlcDevice(ShdlcConnection(replay))
+    start = fake_clock.now
+    device.get_sensor_status()
+    device.get_sensor_status()
+    assert fake_clock.now - start == pytest.approx(0.1, abs=0.001)
+
+    replay = Scc1ReplayPort(recorder.frames)
+    with pytest.raises(Scc1ReplayError):
+        Scc1ShdlcDevice(ShdlcConnection(replay)).get_sensor_type()
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+import struct
+from unittest.mock import call, patch
+
+from sensirion_shdlc_driver import ShdlcConnection
+
+from sensirion_uart_scc1.scc1_emulator import Scc1EmulatorPort, Scc1EmulatedSf06Sensor, sensirion_crc8
+from sensirion_uart_scc1.scc1_i2c_transceiver import Scc1BufferedI2cTransceiver
+from sensirion_uart_scc1.scc1_shdlc_device import Scc1ShdlcDevice
+
+
+def test_buffered_transceiver_serves_every_sample(fake_clock):
+    signal = Scc1EmulatedSf06Sensor(signal_source=lambda i: (i, -i, 0))
+    port = Scc1EmulatorPort(sensor=signal, clock=fake_clock, sleep=fake_clock.sleep)
+    transceiver = Scc1ShdlcDevice(ShdlcConnection(port)).get_i2c_transceiver(buffered=True, interval_ms=1)
+    assert isinstance(transceiver, Scc1BufferedI2cTransceiver)
+    transceiver.transceive(0x08, b'\x36\x08', 0, 0.0)
+    assert transceiver.is_measuring
+    fake_clock.sleep(0.1)
+    flows = []
+    with patch.object(port, 'handle_request', wraps=port.handle_request) as handle_request:
+        for _ in range(80):
+            data = transceiver.transceive(0x08, None, 9, 0.0)
+            assert data[2] == sensirion_crc8(data[:2]) and data[8] == sensirion_crc8(data[6:8])
+            flow, temperature = struct.unpack('>hxhx', data[:6])
+            assert temperature == -flow
+            flows.append(flow)
+    assert flows == list(range(80))
+    assert handle_request.call_count == 2
+    transceiver.transceive(0x08, b'\x3F\xF9', 0, 0.0)
+    assert not transceiver.is_measuring
+    assert transceiver.transceive(0x08, b'\x36\x7C', 0, 0.0) == bytearray()
+
+
+def test_buffered_transceiver_without_sample_yet(fake_clock):
+    signal = Scc1EmulatedSf06Sensor(signal_source=lambda i: (i + 1, 0, 0))
+    port = Scc1EmulatorPort(sensor=signal, clock=fake_clock, sleep=fake_clock.sleep)
+    transceiver = Scc1ShdlcDevice(ShdlcConnection(port)).get_i2c_transceiver(buffered=True, interval_ms=10)
+    transceiver.transceive(0x08, b'\x36\x08', 0, 0.0)
+    with patch.object(port, 'handle_request', wraps=port.handle_request) as handle_request:
+        assert transceiver.transceive(0x08, None, 9, 0.0) == bytearray()
+    assert handle_request.call_args_list == [call(0x36, b'\x03'), call(0x35, b'\x03')]
+    fake_clock.sleep(0.05)
+    data = transceiver.transceive(0x08, None, 3, 0.0)
+    assert struct.unpack('>h', data[:2])[0] == 1 and data[2] == sensirion_crc8(data[:2])
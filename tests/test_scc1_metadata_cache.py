@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+from unittest.mock import patch
+
+import pytest
+from sensirion_shdlc_driver import ShdlcConnection
+
+from sensirion_uart_scc1.drivers.scc1_sf06 import Scc1Sf06
+from sensirion_uart_scc1.scc1_metadata_cache import Scc1MetadataCache
+from sensirion_uart_scc1.scc1_shdlc_device import Scc1ShdlcDevice
+
+
+def test_cache_is_persisted(tmp_path):
+    path = str(tmp_path / 'metadata.json')
+    cache = Scc1MetadataCache(path)
+    cache.validate('EMU00001', '1.9')
+    cache.store('EMU00001', 'sensor', 'field', [1, 2])
+    reloaded = Scc1MetadataCache(path)
+    reloaded.validate('EMU00001', '1.9')
+    assert reloaded.lookup('EMU00001', 'sensor', 'field') == [1, 2]
+    reloaded.validate('EMU00001', '1.10')
+    assert reloaded.lookup('EMU00001', 'sensor', 'field') is None
+    assert Scc1MetadataCache(path).lookup('EMU00001', 'sensor', 'field') is None
+    cache.store('EMU00001', 'sensor', 'field', [1, 2])
+    cache.invalidate('EMU00001')
+    assert Scc1MetadataCache(path).lookup('EMU00001', 'sensor', 'field') is None
+
+
+def test_cache_ignores_corrupt_file(tmp_path):
+    path = tmp_path / 'metadata.json'
+    path.write_text('{not json')
+    assert Scc1MetadataCache(str(path)).lookup('EMU00001', 'sensor', 'field') is None
+
+
+def test_flow_unit_and_scale_is_read_once(tmp_path, emulator_port):
+    path = str(tmp_path / 'metadata.json')
+    for expected_reads in (1, 0):
+        device = Scc1ShdlcDevice(ShdlcConnection(emulator_port), metadata_cache=Scc1MetadataCache(path))
+        sensor = Scc1Sf06(device)
+        with patch.object(emulator_port, 'handle_request', wraps=emulator_port.handle_request) as handle_request:
+            assert sensor.get_flow_unit_and_scale() == (500, 0x0845)
+        commands = [call.args[0] for call in handle_request.call_args_list]
+        assert commands.count(0x53) == expected_reads
+
+
+def test_flow_unit_and_scale_without_cache_reads_no_identity(emulator_port):
+    sensor = Scc1Sf06(Scc1ShdlcDevice(ShdlcConnection(emulator_port)))
+    with patch.object(emulator_port, 'handle_request', wraps=emulator_port.handle_request) as handle_request:
+        assert sensor.get_flow_unit_and_scale() == (500, 0x0845)
+    assert [call.args[0] for call in handle_request.call_args_list] == [0x53]
+
+
+@pytest.mark.parametrize('pipelined,round_trips', [(False, 2), (True, 1)])
+def test_warm_cache_only_validates_the_cable(tmp_path, emulator_port, pipelined, round_trips):
+    path = str(tmp_path / 'metadata.json')
+    results = []
+    for _ in range(2):
+        device = Scc1ShdlcDevice(ShdlcConnection(emulator_port), metadata_cache=Scc1MetadataCache(path),
+                                 pipelined=pipelined)
+        sensor = Scc1Sf06(device)
+        with patch.object(emulator_port, 'transceive', wraps=emulator_port.transceive) as transceive, \
+                patch.object(emulator_port, 'transceive_many', wraps=emulator_port.transceive_many) as many:
+            results.append((sensor.serial_number, sensor.product_id, sensor.get_flow_unit_and_scale(),
+                            sensor.get_flow_unit_and_scale(0x3603), device.get_sensor_part_name(3),
+                            device.get_sensor_serial_number(3)))
+    assert results[0] == results[1]
+    assert results[1][:3] == (0x12345678, 0x07030402, (500, 0x0845))
+    assert transceive.call_count + many.call_count == round_trips
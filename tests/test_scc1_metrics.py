@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+import pytest
+from sensirion_shdlc_driver import ShdlcConnection
+from sensirion_shdlc_driver.errors import ShdlcTimeoutError
+
+from sensirion_uart_scc1.drivers.scc1_sf06 import Scc1Sf06
+from sensirion_uart_scc1.scc1_metrics import Scc1Metrics, to_prometheus_text
+from sensirion_uart_scc1.scc1_shdlc_device import Scc1ShdlcDevice
+
+
+def test_metrics_record_commands_and_buffer_reads(emulator_port, fake_clock):
+    metrics = Scc1Metrics()
+    sensor = Scc1Sf06(Scc1ShdlcDevice(ShdlcConnection(emulator_port), metrics=metrics))
+    sensor.start_continuous_measurement(interval_ms=2)
+    fake_clock.sleep(0.02)
+    _, lost, samples = sensor.read_extended_buffer()
+    emulator_port.drop_responses(1)
+    with pytest.raises(ShdlcTimeoutError):
+        sensor.get_sensor_status()
+
+    snapshot = metrics.snapshot()
+    assert snapshot.buffer_reads == 1
+    assert snapshot.samples_decoded == len(samples) > 0
+    assert snapshot.bytes_lost == lost
+    buffer_read = snapshot.commands[0x36]
+    assert buffer_read.count == 1
+    assert buffer_read.bytes_sent == 1
+    assert buffer_read.bytes_received == 8 + 6 * len(samples)
+    assert buffer_read.latency_buckets[-1] == 1
+    assert snapshot.commands[0x30].timeouts == 1
+
+
+def test_prometheus_text():
+    metrics = Scc1Metrics()
+    metrics.record_command(0x36, 1, 14, 0.003)
+    metrics.record_buffer_read(1234567, 0)
+    text = to_prometheus_text({'EMU00001': metrics})
+    assert text.count('# TYPE scc1_command_latency_seconds histogram') == 1
+    assert 'scc1_commands_total{cable="EMU00001",command="0x36",outcome="ok"} 1\n' in text
+    assert 'scc1_command_latency_seconds_bucket{cable="EMU00001",command="0x36",le="0.002"} 0\n' in text
+    assert 'scc1_command_latency_seconds_bucket{cable="EMU00001",command="0x36",le="0.005"} 1\n' in text
+    assert 'scc1_command_latency_seconds_bucket{cable="EMU00001",command="0x36",le="+Inf"} 1\n' in text
+    assert 'scc1_samples_decoded_total{cable="EMU00001"} 1234567\n' in text
+    assert 'scc1_command_latency_seconds_sum{cable="EMU00001",command="0x36"} 0.003\n' in text
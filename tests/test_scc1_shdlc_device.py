@@ -1,7 +1,14 @@
 # -*- coding: utf-8 -*-
 import re
+from unittest.mock import MagicMock, patch
 
 import pytest
+from sensirion_shdlc_driver import ShdlcConnection, ShdlcSerialPort
+from sensirion_shdlc_driver.errors import ShdlcTimeoutError
+
+from sensirion_uart_scc1.drivers.scc1_sf06 import Scc1Sf06
+from sensirion_uart_scc1.scc1_metrics import Scc1Metrics
+from sensirion_uart_scc1.scc1_shdlc_device import Scc1ShdlcDevice, _transceive_pipelined
 
 
 @pytest.mark.needs_hardware
@@ -34,8 +41,6 @@ def test_scc1_user_data(scc1_device):
 
 
 def test_scc1_user_data_invalid_block():
-    from sensirion_uart_scc1.scc1_shdlc_device import Scc1ShdlcDevice
-    from unittest.mock import MagicMock
     # Mock connection to return something for execute to avoid initialization errors
     connection = MagicMock()
     connection.execute.return_value = (b'', 0)
@@ -49,18 +54,11 @@ def test_scc1_user_data_invalid_block():
 
 
 def test_scc1_get_user_data_parsing():
-    from sensirion_uart_scc1.scc1_shdlc_device import Scc1ShdlcDevice
-    from unittest.mock import MagicMock
     connection = MagicMock()
     # Correct response: block number 2 followed by 20 bytes of 'A'
     mock_data = b'\x02' + b'A' * 20
-    # Initialization calls: get_version, get_serial_number, get_sensor_type, get_sensor_address
-    # Then get_user_data
+    # The identity is read lazily, so the initialization does not communicate with the device
     connection.execute.side_effect = [
-        (b'\x01\x02\x00\x01\x02\x03', 0),  # get_version (6 bytes)
-        (b'123456', 0),                 # get_serial_number
-        (b'\x03', 0),                    # get_sensor_type (1 byte)
-        (b'\x10', 0),                    # get_sensor_address (1 byte)
         (mock_data, 0),                 # get_user_data (first call)
         (mock_data, 0),                 # get_user_data (second call)
         (b'\x02' + b'A' * 19, 0),       # get_user_data (third call, wrong length)
@@ -98,3 +96,138 @@ def test_scc1_measure_sensor_voltage(scc1_device):
     voltage_mv = scc1_device.measure_sensor_voltage()
     assert isinstance(voltage_mv, int)
     assert 3000 <= voltage_mv <= 6000
+
+
+def test_scc1_identity_is_loaded_lazily(emulator_port):
+    with patch.object(emulator_port, 'transceive', wraps=emulator_port.transceive) as transceive:
+        device = Scc1ShdlcDevice(ShdlcConnection(emulator_port))
+        assert transceive.call_count == 0
+        assert device.serial_number == 'EMU00001'
+        assert device.serial_number == 'EMU00001'
+        assert transceive.call_count == 1
+
+
+def test_scc1_eager_identity_uses_one_burst(emulator_port, fake_clock):
+    emulator_port.frame_latency = 0.01
+    device = Scc1ShdlcDevice(ShdlcConnection(emulator_port), eager=True, pipelined=True)
+    assert fake_clock.now < 0.02
+    start = fake_clock.now
+    assert str(device.firmware_version) == '1.9'
+    assert device.serial_number == 'EMU00001'
+    assert device.sensor_type == 3
+    assert device.i2c_address == 0x08
+    assert fake_clock.now == start
+
+
+@pytest.mark.parametrize('pipelined,round_trips', [(False, 4), (True, 1)])
+def test_scc1_status_snapshot(emulator_port, fake_clock, pipelined, round_trips):
+    scc1_emulator = Scc1ShdlcDevice(ShdlcConnection(emulator_port), pipelined=pipelined)
+    sensor = Scc1Sf06(scc1_emulator)
+    sensor.start_continuous_measurement(interval_ms=2)
+    scc1_emulator.set_totalizator_status(True)
+    fake_clock.sleep(0.1)
+    emulator_port.frame_latency = 0.01
+    start = fake_clock.now
+    snapshot = scc1_emulator.get_status_snapshot()
+    assert round_trips * 0.01 <= fake_clock.now - start < round_trips * 0.01 + 0.01
+    assert snapshot.continuous_measurement_interval == 2
+    assert snapshot.totalizator_enabled is True
+    assert snapshot.sensor_status == scc1_emulator.get_sensor_status()
+    assert 0 < snapshot.totalizator_value <= scc1_emulator.get_totalizator_value()
+
+
+@pytest.mark.parametrize('pipelined', [False, True])
+def test_scc1_bulk_user_data(emulator_port, pipelined):
+    scc1_emulator = Scc1ShdlcDevice(ShdlcConnection(emulator_port), pipelined=pipelined)
+    scc1_emulator.set_user_data(1, b'B' * 20)
+    data = scc1_emulator.read_all_user_data()
+    assert len(data) == 100
+    assert data[20:40] == b'B' * 20
+    with patch.object(emulator_port, 'handle_request', wraps=emulator_port.handle_request) as handle_request:
+        assert scc1_emulator.write_user_data(b'BBBXYZ', offset=37) == 1
+        assert scc1_emulator.write_user_data(b'BBBXYZ', offset=37) == 0
+    writes = [call.args[1][0] for call in handle_request.call_args_list if len(call.args[1]) == 21]
+    assert writes == [2]
+    assert scc1_emulator.read_all_user_data()[37:43] == b'BBBXYZ'
+    with pytest.raises(ValueError):
+        scc1_emulator.write_user_data(b'A', offset=100)
+
+
+class FakeSerial:
+    """serial.Serial answering SHDLC frames with the emulator, all frames written in one burst are answered at once"""
+
+    _STUFFING = {0x7E: b'\x7D\x5E', 0x7D: b'\x7D\x5D', 0x11: b'\x7D\x31', 0x13: b'\x7D\x33'}
+
+    def __init__(self, emulator):
+        self.name = 'COM1'
+        self.baudrate = 115200
+        self.writes = []
+        self._emulator = emulator
+        self._rx = bytearray()
+
+    def flushInput(self):
+        self._rx.clear()
+
+    def flush(self):
+        pass
+
+    def inWaiting(self):
+        return len(self._rx)
+
+    def read(self, size):
+        data = bytes(self._rx[:size])
+        del self._rx[:size]
+        return data
+
+    def write(self, data):
+        self.writes.append(data)
+        for frame in re.findall(rb'\x7e([^\x7e]+)\x7e', data):
+            content = re.sub(rb'\x7d(.)', lambda m: bytes([m.group(1)[0] ^ 0x20]), frame)
+            address, command_id, length = content[0], content[1], content[2]
+            state, response = self._emulator.handle_request(command_id, content[3:3 + length])
+            miso = bytes([address, command_id, state, len(response)]) + response
+            miso += bytes([~sum(miso) & 0xFF])
+            self._rx += b'\x7e' + b''.join(self._STUFFING.get(b, bytes([b])) for b in miso) + b'\x7e'
+
+
+def test_scc1_pipelined_burst_on_serial_port(emulator_port):
+    port = ShdlcSerialPort(port='COM1', baudrate=115200, do_open=False)
+    port._serial = FakeSerial(emulator_port)
+    device = Scc1ShdlcDevice(ShdlcConnection(port), pipelined=True)
+    device.load_identity()
+    assert len(port._serial.writes) == 1
+    assert str(device.firmware_version) == '1.9'
+    assert device.serial_number == 'EMU00001'
+    assert device.sensor_type == 3
+    assert device.i2c_address == 0x08
+
+
+def test_scc1_pipelined_falls_back_without_serial_internals(emulator_port):
+    port = MagicMock(spec=ShdlcSerialPort)
+    del port.transceive_many
+    port.transceive.side_effect = lambda address, command_id, data, timeout: \
+        emulator_port.transceive(address, command_id, data, timeout)
+    responses = _transceive_pipelined(port, 0, [(0x24, b'', 0.025), (0x25, b'', 0.025)])
+    assert [r[1] for r in responses] == [0x24, 0x25]
+    assert port.transceive.call_count == 2
+
+
+def test_scc1_identity_is_read_sequentially_by_default(emulator_port, fake_clock):
+    emulator_port.frame_latency = 0.01
+    device = Scc1ShdlcDevice(ShdlcConnection(emulator_port), eager=True, metrics=Scc1Metrics())
+    assert not device.pipelined
+    assert fake_clock.now >= 0.04
+    assert device.serial_number == 'EMU00001'
+    assert set(device.metrics.snapshot().commands) == {0xD1, 0xD0, 0x24, 0x25}
+
+
+def test_scc1_pipelined_frames_are_recorded(emulator_port):
+    device = Scc1ShdlcDevice(ShdlcConnection(emulator_port), pipelined=True, metrics=Scc1Metrics())
+    device.load_identity()
+    commands = device.metrics.snapshot().commands
+    assert set(commands) == {0xD1, 0xD0, 0x24, 0x25}
+    assert all(c.count == 1 and c.bytes_received > 0 for c in commands.values())
+    with patch.object(emulator_port, 'transceive_many', side_effect=ShdlcTimeoutError()):
+        with pytest.raises(ShdlcTimeoutError):
+            device.load_identity()
+    assert all(c.timeouts == 1 for c in device.metrics.snapshot().commands.values())
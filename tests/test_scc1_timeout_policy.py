@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+from unittest.mock import patch
+
+import pytest
+from sensirion_shdlc_driver import ShdlcConnection
+from sensirion_shdlc_driver.errors import ShdlcTimeoutError
+
+from sensirion_uart_scc1.scc1_shdlc_device import Scc1ShdlcDevice
+from sensirion_uart_scc1.scc1_timeout_policy import IDEMPOTENT_READ_COMMANDS, LAST_MEASUREMENT_COMMAND, \
+    Scc1TimeoutPolicy
+
+
+def test_policy_learns_timeout():
+    policy = Scc1TimeoutPolicy(margin=2.0, min_observations=4)
+    assert policy.timeout(0x30, 0.01) == 0.01
+    assert policy.timeout(0x30) == 3.0
+    for latency in (0.001, 0.002, 0.003, 0.004):
+        policy.observe(0x30, latency)
+    assert policy.timeout(0x30) == pytest.approx(0.008)
+    assert policy.timeout(0x30, 0.001) == pytest.approx(0.008)
+    # a longer timeout requested by the caller is kept
+    assert policy.timeout(0x30, 0.5) == 0.5
+    policy.observe_timeout(0x30, retry=True)
+    assert policy.timeout(0x30) == pytest.approx(0.016)
+    policy.observe(0x30, 0.004)
+    assert policy.timeout(0x30) == pytest.approx(0.008)
+
+
+def test_dropped_read_is_retried_quickly(emulator_port, fake_clock):
+    policy = Scc1TimeoutPolicy(min_observations=4)
+    device = Scc1ShdlcDevice(ShdlcConnection(emulator_port), timeout_policy=policy)
+    for _ in range(4):
+        device.get_sensor_status()
+    emulator_port.drop_responses(1)
+    start = fake_clock.now
+    assert device.get_sensor_status() is not None
+    # the lost response costs one requested timeout of 10ms before the retry
+    assert fake_clock.now - start < 0.02
+    assert policy.retried == 1
+
+
+def test_non_idempotent_command_is_not_retried(emulator_port):
+    policy = Scc1TimeoutPolicy()
+    device = Scc1ShdlcDevice(ShdlcConnection(emulator_port), timeout_policy=policy)
+    emulator_port.drop_responses(1)
+    with pytest.raises(ShdlcTimeoutError):
+        device.reset_totalizator()
+    assert policy.timeouts == 1
+    assert policy.retried == 0
+
+
+def test_reads_with_side_effects_are_not_retried_by_default():
+    policy = Scc1TimeoutPolicy()
+    assert policy.retries_for(0x36) == 0
+    assert policy.retries_for(LAST_MEASUREMENT_COMMAND) == 0
+    opted_in = Scc1TimeoutPolicy(retry_commands=IDEMPOTENT_READ_COMMANDS | {LAST_MEASUREMENT_COMMAND})
+    assert opted_in.retries_for(LAST_MEASUREMENT_COMMAND) == 2
+
+
+def test_retry_warning_sends_no_command(emulator_port):
+    device = Scc1ShdlcDevice(ShdlcConnection(emulator_port), timeout_policy=Scc1TimeoutPolicy())
+    emulator_port.drop_responses(1)
+    with patch.object(emulator_port, 'handle_request', wraps=emulator_port.handle_request) as handle_request:
+        device.get_sensor_status()
+    assert [call.args[0] for call in handle_request.call_args_list] == [0x30, 0x30]
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+import struct
+
+import pytest
+
+from sensirion_uart_scc1.drivers.scc1_sf06 import Scc1Sf06
+from sensirion_uart_scc1.drivers.sf06_sample_batch import Sf06SampleBatch
+from sensirion_uart_scc1.scc1_exceptions import Scc1InvalidDataReceived
+
+
+def _payload(samples):
+    return b''.join(struct.pack('>hhH', *sample) for sample in samples)
+
+
+def test_batch_decoding():
+    batch = Sf06SampleBatch.from_buffer(_payload([(1, 4600, 0), (-2, 4601, 3)]), 3)
+    assert len(batch) == 2
+    assert batch[1] == (-2, 4601, 3)
+    assert batch[-1] == batch[1]
+    assert list(batch) == [(1, 4600, 0), (-2, 4601, 3)]
+    assert list(batch.flow) == [1, -2]
+    assert list(batch.temperature) == [4600, 4601]
+    assert list(batch.flags) == [0, 3]
+    with pytest.raises(IndexError):
+        batch[2]
+
+
+def test_batch_flags_are_unsigned():
+    batch = Sf06SampleBatch.from_buffer(_payload([(0, 0, 0x8001)]), 3)
+    assert list(batch.flags) == [0x8001]
+
+
+def test_batch_with_additional_signals():
+    batch = Sf06SampleBatch.from_buffer(struct.pack('>hhhh', 1, 2, 3, 4), 4)
+    assert batch.num_signals == 4
+    assert list(batch.column(3)) == [4]
+
+
+def test_batch_invalid_length():
+    with pytest.raises(Scc1InvalidDataReceived):
+        Sf06SampleBatch.from_buffer(b'\x00' * 7, 3)
+
+
+def test_batch_to_numpy():
+    np = pytest.importorskip('numpy')
+    batch = Sf06SampleBatch.from_buffer(_payload([(1, 4600, 0x8000)]), 3)
+    records = batch.to_numpy()
+    assert records['flow'][0] == 1
+    assert records['flags'][0] == 0x8000
+    assert np.shares_memory(records, np.frombuffer(memoryview(batch.values), dtype='i2'))
+
+
+def test_read_extended_buffer_batch_matches_list(scc1_emulator, fake_clock):
+    sensor = Scc1Sf06(scc1_emulator)
+    sensor.start_continuous_measurement(interval_ms=1)
+    fake_clock.now += 0.1
+    remaining, lost, batch = sensor.read_extended_buffer_batch()
+    assert len(batch) == 41
+    assert remaining > 0
+    sensor.stop_continuous_measurement()
+
+    sensor.start_continuous_measurement(interval_ms=1)
+    fake_clock.now += 0.1
+    _, _, data = sensor.read_extended_buffer()
+    assert batch.to_list() == data
+
+
+@pytest.mark.parametrize('read', [Scc1Sf06.read_extended_buffer, Scc1Sf06.read_extended_buffer_batch])
+def test_read_extended_buffer_invalid_length(read):
+    from unittest.mock import MagicMock, call
+    device = MagicMock()
+    # header announcing 3 signals followed by 7 bytes, which is not a whole number of samples
+    device.transceive.side_effect = [struct.pack('>IHH', 0, 0, 3) + b'\x00' * 7]
+    sensor = Scc1Sf06(device)
+    with pytest.raises(Scc1InvalidDataReceived):
+        read(sensor)
+    assert device.transceive.call_args_list == [call(0x36, [3], 0.01)]
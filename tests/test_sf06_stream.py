@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+import time
+
+import pytest
+from sensirion_shdlc_driver import ShdlcConnection
+
+from sensirion_uart_scc1.acquisition.sample_ring_buffer import SampleRingBuffer
+from sensirion_uart_scc1.acquisition.sf06_stream import Scc1Sf06Stream
+from sensirion_uart_scc1.drivers.scc1_sf06 import Scc1Sf06
+from sensirion_uart_scc1.scc1_emulator import Scc1EmulatorPort, Scc1EmulatedSf06Sensor
+from sensirion_uart_scc1.scc1_shdlc_device import Scc1ShdlcDevice
+
+
+def test_ring_buffer_put_get():
+    buffer = SampleRingBuffer(4)
+    buffer.put([(1, 2, 3), (4, 5, 6)])
+    assert len(buffer) == 2
+    assert buffer.get(max_samples=1) == [(1, 2, 3)]
+    assert buffer.get(timeout=0) == [(4, 5, 6)]
+    assert buffer.get(timeout=0) == []
+
+
+def test_ring_buffer_overwrites_oldest():
+    buffer = SampleRingBuffer(3, num_signals=1)
+    buffer.put([(1,), (2,)])
+    assert buffer.put([(3,), (4,)]) == 1
+    assert buffer.put([(5,), (6,), (7,), (8,)]) == 4
+    assert buffer.samples_dropped == 5
+    assert buffer.get() == [(6,), (7,), (8,)]
+
+
+def test_ring_buffer_rejects_wrong_signal_count():
+    buffer = SampleRingBuffer(3)
+    with pytest.raises(ValueError):
+        buffer.put([(1, 2)])
+    assert len(buffer) == 0
+
+
+def test_stream_collects_all_samples_with_slow_consumer():
+    signal = Scc1EmulatedSf06Sensor(signal_source=lambda i: (i % 30000, 0, 0))
+    device = Scc1ShdlcDevice(ShdlcConnection(Scc1EmulatorPort(sensor=signal)))
+    sensor = Scc1Sf06(device)
+    received = []
+    with Scc1Sf06Stream(sensor, interval_ms=1) as stream:
+        end = time.monotonic() + 0.2
+        while time.monotonic() < end:
+            received.extend(stream.read())
+            time.sleep(0.05)  # slow consumer
+    received.extend(stream.read())
+    assert stream.bytes_lost == 0
+    assert stream.samples_dropped == 0
+    assert len(received) == stream.samples_acquired > 0
+    assert [sample[0] for sample in received] == list(range(len(received)))
+
+
+def test_stream_propagates_reader_error():
+    class FailingSensor:
+        def start_continuous_measurement(self, interval_ms):
+            ...
+
+        def stop_continuous_measurement(self):
+            ...
+
+        def read_extended_buffer(self):
+            raise IOError("cable unplugged")
+
+    stream = Scc1Sf06Stream(FailingSensor())
+    stream.start()
+    with pytest.raises(IOError, match="cable unplugged"):
+        list(stream)
+    stream.stop()
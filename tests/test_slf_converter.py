@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from sensirion_uart_scc1.drivers.scc1_sf06 import Scc1Sf06
+from sensirion_uart_scc1.drivers.sf06_sample_batch import Sf06SampleBatch
+from sensirion_uart_scc1.drivers.slf_common import get_flow_unit_si_factor, get_flow_unit_label
+from sensirion_uart_scc1.drivers.slf_converter import SlfSignalConverter
+from sensirion_uart_scc1.scc1_exceptions import Scc1NotSupportedException
+
+ML_PER_MIN = 0x0845
+
+
+def test_flow_unit_si_factor():
+    assert get_flow_unit_label(ML_PER_MIN) == 'ml/min'
+    assert get_flow_unit_si_factor(ML_PER_MIN) == pytest.approx(1e-6 / 60)
+    assert get_flow_unit_si_factor(0x0000) is None
+
+
+def test_convert_batch_in_sensor_unit():
+    converter = SlfSignalConverter(500, ML_PER_MIN, si_units=False)
+    assert converter.flow_unit_label == 'ml/min'
+    values = converter.convert([(500, 4600, 0), (-250, 4700, 3)])
+    assert list(values.flow) == [1.0, -0.5]
+    assert list(values.temperature) == [23.0, 23.5]
+    assert list(values.air_in_line) == [0, 1]
+    assert list(values.high_flow) == [0, 1]
+
+
+def test_convert_batch_in_si_units():
+    converter = SlfSignalConverter(500, ML_PER_MIN)
+    assert converter.flow_unit_label == 'm3/s'
+    values = converter.convert(Sf06SampleBatch.from_samples([(30000, 0, 0)]))
+    assert values.flow[0] == pytest.approx(60 * 1e-6 / 60)
+
+
+def test_convert_sample_matches_batch():
+    converter = SlfSignalConverter(500, ML_PER_MIN, si_units=False)
+    flow, temperature, air_in_line, high_flow = converter.convert_sample((123, 4567, 2))
+    values = converter.convert([(123, 4567, 2)])
+    assert (flow, temperature) == (values.flow[0], values.temperature[0])
+    assert (air_in_line, high_flow) == (False, True)
+
+
+def test_convert_numpy():
+    pytest.importorskip('numpy')
+    converter = SlfSignalConverter(500, ML_PER_MIN, si_units=False, use_numpy=True)
+    values = converter.convert([(500, 4600, 1)])
+    assert values.flow[0] == 1.0
+    assert bool(values.air_in_line[0]) is True
+
+
+def test_unknown_unit():
+    with pytest.raises(Scc1NotSupportedException):
+        SlfSignalConverter(500, 0x0000)
+
+
+def test_converter_from_sensor(scc1_emulator):
+    converter = SlfSignalConverter.from_sensor(Scc1Sf06(scc1_emulator), si_units=False)
+    assert converter.scale_factor == 500
+    assert converter.flow_unit_label == 'ml/min'
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+import pytest
+from sensirion_shdlc_driver import ShdlcConnection
+
+from sensirion_uart_scc1.acquisition.timestamper import SampleGap, Scc1SampleTimestamper, TimestampedSamples
+from sensirion_uart_scc1.drivers.scc1_sf06 import Scc1Sf06
+from sensirion_uart_scc1.drivers.sf06_sample_batch import Sf06SampleBatch
+from sensirion_uart_scc1.scc1_emulator import Scc1EmulatorPort, Scc1EmulatedSf06Sensor
+from sensirion_uart_scc1.scc1_shdlc_device import Scc1ShdlcDevice
+
+
+def test_gap_is_placed_behind_buffered_samples():
+    timestamper = Scc1SampleTimestamper(interval_ms=10)
+    samples = [(i, 0, 0) for i in range(4)]
+    # 4 samples read, 2 remaining in the buffer, then 3 samples lost
+    records = timestamper.process(12, 18, samples, read_time=1.0)
+    assert [type(r) for r in records] == [TimestampedSamples]
+    records = timestamper.process(0, 0, Sf06SampleBatch.from_samples(samples[:2] + samples[:1]), read_time=1.0)
+    assert [type(r) for r in records] == [TimestampedSamples, SampleGap, TimestampedSamples]
+    assert records[0].first_index == 4 and len(records[0].samples) == 2
+    assert records[1] == SampleGap(6, pytest.approx(timestamper.timestamp(6)), 3)
+    assert records[2].first_index == 9 and len(records[2].samples) == 1
+    assert timestamper.samples_lost == 3
+
+
+def test_drift_and_jitter_are_compensated(emulator_port, fake_clock):
+    # the cable clock runs 1 % slow: a 2 ms interval takes 2.02 ms of host time
+    signal = Scc1EmulatedSf06Sensor(signal_source=lambda i: (i % 30000, 0, 0))
+    port = Scc1EmulatorPort(sensor=signal, clock=lambda: fake_clock.now / 1.01, sleep=fake_clock.sleep)
+    sensor = Scc1Sf06(Scc1ShdlcDevice(ShdlcConnection(port)))
+    timestamper = Scc1SampleTimestamper(interval_ms=2, clock=fake_clock)
+    start = fake_clock.now
+    sensor.start_continuous_measurement(interval_ms=2)
+    records = []
+    for i in range(400):
+        fake_clock.sleep(0.05 + 0.01 * (i % 3))  # irregular polling
+        request_time = fake_clock.now
+        records.extend(timestamper.process(*sensor.read_extended_buffer(), read_time=request_time))
+    assert timestamper.period == pytest.approx(0.00202, rel=2e-3)
+    assert timestamper.drift_ppm == pytest.approx(10000, abs=2000)
+    last = records[-1]
+    # the emulated cable stores sample k one interval after its start
+    true_time = start + 0.00202 * (last.first_index + len(last.samples))
+    assert last.timestamps[-1] == pytest.approx(true_time, abs=0.002)
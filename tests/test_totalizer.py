@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+import pytest
+from sensirion_shdlc_driver import ShdlcConnection
+
+from sensirion_uart_scc1.acquisition.totalizer import GAP_HOLD, GAP_IGNORE, Scc1HostTotalizer
+from sensirion_uart_scc1.drivers.scc1_sf06 import Scc1Sf06
+from sensirion_uart_scc1.drivers.sf06_sample_batch import Sf06SampleBatch
+from sensirion_uart_scc1.scc1_emulator import Scc1EmulatedSf06Sensor, Scc1EmulatorPort
+from sensirion_uart_scc1.scc1_shdlc_device import Scc1ShdlcDevice
+
+ML_PER_MIN = 0x0845
+
+
+def test_volume_per_sample():
+    # scale factor 10, 600 ms interval: a raw flow of 10 (1 ml/min) adds 0.01 ml per sample
+    totalizer = Scc1HostTotalizer(10, ML_PER_MIN, interval_ms=600)
+    volumes = totalizer.process(0, 0, Sf06SampleBatch.from_samples([(10, 0, 0), (20, 0, 0), (30, 0, 0)]))
+    assert list(volumes) == pytest.approx([0.01, 0.03, 0.06])
+    assert totalizer.volume == pytest.approx(0.06)
+    assert totalizer.volume_unit_label == 'ml'
+
+
+@pytest.mark.parametrize('gap_policy, estimate', [('interpolate', 3 * 25), (GAP_HOLD, 3 * 10), (GAP_IGNORE, 0)])
+def test_gap_estimation(gap_policy, estimate):
+    totalizer = Scc1HostTotalizer(1, ML_PER_MIN, interval_ms=60000, gap_policy=gap_policy)
+    # 1 sample read, 1 remaining in the buffer, then 3 samples lost
+    totalizer.process(6, 18, [(0, 0, 0)])
+    totalizer.process(0, 0, [(10, 0, 0), (40, 0, 0)])
+    assert totalizer.raw_sum == 50 + estimate
+    assert totalizer.samples == 3 and totalizer.samples_estimated == 3
+
+
+def _read_all(sensor, totalizer):
+    while True:
+        remaining, lost, samples = sensor.read_extended_buffer()
+        totalizer.process(remaining, lost, samples)
+        if not remaining:
+            return
+
+
+def test_reconcile_with_firmware_totalizator(fake_clock):
+    signal = Scc1EmulatedSf06Sensor(signal_source=lambda i: (1000 + i // 50, 0, 0))
+    port = Scc1EmulatorPort(sensor=signal, buffer_size=600, clock=fake_clock, sleep=fake_clock.sleep)
+    sensor = Scc1Sf06(Scc1ShdlcDevice(ShdlcConnection(port)))
+    sensor.set_totalizator_status(True)
+    sensor.reset_totalizator()
+    totalizer = Scc1HostTotalizer.from_sensor(sensor, interval_ms=2)
+    sensor.start_continuous_measurement(interval_ms=2)
+    for _ in range(10):
+        fake_clock.sleep(0.25)  # the buffer overflows between the read outs
+        _read_all(sensor, totalizer)
+    sensor.stop_continuous_measurement()
+    _read_all(sensor, totalizer)
+    firmware_value = sensor.get_totalizator_value()
+    assert totalizer.samples_estimated > 0
+    assert totalizer.raw_sum == pytest.approx(firmware_value, rel=1e-3)
+    correction = totalizer.reconcile(firmware_value)
+    assert totalizer.raw_sum == firmware_value
+    assert correction == pytest.approx(0.0, abs=1e-3 * totalizer.volume)
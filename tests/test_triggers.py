@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from sensirion_uart_scc1.acquisition.triggers import EDGE_FALLING, EDGE_RISING, Scc1FlagTrigger, Scc1SlopeTrigger, \
+    Scc1ThresholdTrigger, Scc1Trigger, Scc1TriggerEngine
+from sensirion_uart_scc1.drivers.sf06_sample_batch import Sf06SampleBatch
+
+
+def _samples(flows, flags=None):
+    flags = flags or [0] * len(flows)
+    return Sf06SampleBatch.from_samples([(f, 0, g) for f, g in zip(flows, flags)])
+
+
+def test_flag_edges_across_batches():
+    trigger = Scc1FlagTrigger.air_in_line()
+    events = trigger.process(_samples([0] * 4, [0, 1, 3, 1]), 0) + trigger.process(_samples([0] * 3, [1, 0, 2]), 4)
+    assert [(e.index, e.edge) for e in events] == [(1, EDGE_RISING), (5, EDGE_FALLING)]
+    high_flow = Scc1FlagTrigger.high_flow(edge=EDGE_RISING).process(_samples([0] * 4, [0, 1, 3, 2]), 0)
+    assert [e.index for e in high_flow] == [2]
+
+
+def test_threshold_and_slope_triggers():
+    flows = [0, 10, 60, 40, 70, 75, 20]
+    threshold = Scc1ThresholdTrigger('high', 50, edge=EDGE_RISING)
+    assert [e.index for e in threshold.process(_samples(flows), 0)] == [2, 4]
+    holdoff = Scc1ThresholdTrigger('high', 50, holdoff=3)
+    assert [e.index for e in holdoff.process(_samples(flows), 0)] == [2]
+    rising = Scc1SlopeTrigger('jump', 30)
+    assert [(e.index, e.value) for e in rising.process(_samples(flows), 0)] == [(2, 60), (4, 70)]
+    falling = Scc1SlopeTrigger('drop', -30)
+    assert [e.index for e in falling.process(_samples(flows[:3]), 0) + falling.process(_samples(flows[3:]), 3)] == [6]
+
+
+def test_windows_around_events():
+    windows = []
+    engine = Scc1TriggerEngine([Scc1ThresholdTrigger('high', 50)], pre_samples=3, post_samples=2,
+                               on_window=windows.append)
+    flows = [0] * 100
+    flows[10] = flows[12] = flows[50] = 100
+    for start in range(0, 100, 7):
+        engine.process(_samples(flows[start:start + 7]))
+    assert [(w.first_index, len(w.samples), [e.index for e in w.events]) for w in windows] == \
+        [(7, 8, [10, 12]), (47, 6, [50])]
+    assert [s[0] for s in windows[1].samples] == flows[47:53]
+
+
+def test_open_window_is_completed_by_gap_and_flush():
+    engine = Scc1TriggerEngine([Scc1ThresholdTrigger('high', 50)], pre_samples=1, post_samples=5)
+    result = engine.process(_samples([0, 100, 0]))
+    assert len(result.events) == 1 and not result.windows
+    result = engine.process(_samples([100, 0]), first_index=10)
+    assert [(w.first_index, len(w.samples)) for w in result.windows] == [(0, 3)]
+    assert [(w.first_index, len(w.samples)) for w in engine.flush()] == [(10, 2)]
+    with pytest.raises(ValueError):
+        engine.process(_samples([0]), first_index=5)
+
+
+def test_trigger_without_condition_cannot_be_created():
+    class IncompleteTrigger(Scc1Trigger):
+        pass
+
+    with pytest.raises(TypeError):
+        IncompleteTrigger('incomplete', 0)